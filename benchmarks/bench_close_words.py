@@ -0,0 +1,60 @@
+"""
+Benchmark of close words evaluation. Compares legacy quadratic scan with sliding window implementation
+on synthetic corpus with zipf like word distribution. Run from repository root:
+    python -m benchmarks.bench_close_words --words 500000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from src.backend.service.nlp_service import NlpService
+from src.domain.config import Config
+from src.domain.unique_word import UniqueWord
+from test_utils import TestUtils
+
+
+class FakeToken:
+    """Token with only attributes needed by close words evaluation"""
+
+    def __init__(self, i):
+        self.i = i
+        self._ = SimpleNamespace(word_index=i)
+
+
+def create_corpus(total_words, vocabulary_size, seed):
+    """Create fake document with zipf like distribution of words"""
+    rnd = random.Random(seed)
+    vocabulary = [f"slovo{i}" for i in range(vocabulary_size)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary_size)]
+    tokens = [FakeToken(i) for i in range(total_words)]
+    unique_words = {}
+    for i, word in enumerate(rnd.choices(vocabulary, weights=weights, k=total_words)):
+        unique_word = unique_words.get(word, None)
+        if unique_word is None:
+            unique_word = UniqueWord(word, tokens)
+            unique_words[word] = unique_word
+        unique_word.append(i, i, len(word), i)
+    return SimpleNamespace(_=SimpleNamespace(unique_words=unique_words, lemmas=unique_words))
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=500000, help="Number of words in corpus")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="Number of distinct words in corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    doc = create_corpus(args.words, args.vocabulary, args.seed)
+    config = Config()
+    legacy_result, legacy_time = measure(TestUtils.legacy_evaluate_close_words, doc, config)
+    result, new_time = measure(NlpService.evaluate_close_words, doc, config)
+    assert result == legacy_result, "Results of legacy and new implementation differ"
+    print(f"words: {args.words}, close words: {len(result)}")
+    print(f"legacy: {legacy_time:.3f}s")
+    print(f"sliding window: {new_time:.3f}s ({legacy_time / max(new_time, 1e-9):.1f}x)")
@@ -0,0 +1,44 @@
+"""
+Micro benchmark of MorphoDiTa component. Reports tokens per second of original implementation, that allocated
+buffers for every sentence, and of current implementation. Run from repository root:
+    python -m benchmarks.bench_morphodita --repeat 20
+"""
+import argparse
+import time
+
+from src.backend.service.nlp_service import NlpService
+from test_utils import TestUtils, MORPHODITA_PIPE_NAME
+
+
+def prepare_docs(nlp, text, repeat):
+    """Tokenize and split text to sentences, so only MorphoDiTa component is measured"""
+    sentencizer = nlp.get_pipe('sentencizer')
+    paragraphs = NlpService.split_to_paragraphs(text) * repeat
+    return [sentencizer(nlp.make_doc(paragraph)) for paragraph in paragraphs]
+
+
+def measure(name, docs, function):
+    tokens = sum(len(doc) for doc in docs)
+    start = time.perf_counter()
+    function(docs)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: {tokens / elapsed:.0f} tokens/s ({elapsed:.3f}s)")
+    return elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default="test_files/sample.txt", help="Text file used as corpus")
+    parser.add_argument("--repeat", type=int, default=20, help="How many times is corpus repeated")
+    args = parser.parse_args()
+    nlp = NlpService.initialize()
+    component = nlp.get_pipe(MORPHODITA_PIPE_NAME)
+    with open(args.file, 'r', encoding='utf-8') as file:
+        corpus = file.read()
+    legacy_time = measure("legacy", prepare_docs(nlp, corpus, args.repeat),
+                          lambda docs: [TestUtils.legacy_call(component, doc) for doc in docs])
+    call_time = measure("__call__", prepare_docs(nlp, corpus, args.repeat),
+                        lambda docs: [component(doc) for doc in docs])
+    pipe_time = measure("pipe", prepare_docs(nlp, corpus, args.repeat),
+                        lambda docs: list(component.pipe(docs)))
+    print(f"speedup: __call__ {legacy_time / call_time:.2f}x, pipe {legacy_time / pipe_time:.2f}x")
@@ -0,0 +1,192 @@
+"""
+Benchmark suite of NLP, spellcheck, import and export hot paths at several document sizes.
+Every benchmark is repeated and reports latency percentiles, throughput and peak RSS of process.
+Results are written as JSON, so they can be compared between releases. Run from repository root:
+    python -m benchmarks.bench_suite --pages 1 10 100 500 --repeat 5 --output bench.json
+    python -m benchmarks.bench_suite --pages 1 10 --baseline bench.json
+Peak RSS is high-water mark of whole process, so it never decreases between benchmarks.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from src.backend.document_stats import DocumentStats
+from src.backend.service.export_service import ExportService
+from src.backend.service.import_service import ImportService
+from src.backend.service.nlp_service import NlpService
+from src.backend.service.spellcheck_service import SpellcheckService
+from src.const.values import NLP_BATCH_SIZE, VERSION
+from src.domain.config import Config
+from benchmarks.bench_morphodita import prepare_docs
+from test_utils import TestUtils, MORPHODITA_PIPE_NAME, PAGE_SIZE
+
+# PERCENTILES OF LATENCY REPORTED FOR EVERY BENCHMARK
+PERCENTILES = [50, 90, 99]
+
+
+def peak_rss_mb():
+    """Get peak resident set size of process in megabytes. Returns None if platform does not provide it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # LINUX REPORTS KILOBYTES, MAC OS REPORTS BYTES
+    if platform.system() == "Darwin":
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+def run_benchmark(name, text, repeat, setup, function):
+    """
+    Run function repeat times and return its statistics. Setup is called before every run and is not measured.
+    Its result is passed to function.
+    """
+    timings = []
+    for _ in range(repeat):
+        data = setup()
+        start = time.perf_counter()
+        function(data)
+        timings.append(time.perf_counter() - start)
+    mean = sum(timings) / len(timings)
+    result = {
+        "benchmark": name,
+        "pages": round(len(text) / PAGE_SIZE),
+        "chars": len(text),
+        "repeat": repeat,
+        "mean": mean,
+        "min": min(timings),
+        "max": max(timings),
+        "chars_per_second": len(text) / mean if mean > 0 else None,
+        "pages_per_second": len(text) / PAGE_SIZE / mean if mean > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    for p in PERCENTILES:
+        result[f"p{p}"] = TestUtils.percentile(timings, p)
+    print(f"{name:>20} {result['pages']:>5} pages: p50 {result['p50']:.4f}s, p90 {result['p90']:.4f}s, "
+          f"{result['pages_per_second']:.1f} pages/s, peak RSS {result['peak_rss_mb']} MB", file=sys.stderr)
+    return result
+
+
+def analyze(text, nlp, config):
+    """Full analysis with empty paragraph cache"""
+    NlpService.paragraph_cache.clear()
+    return NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+
+
+def benchmark_text(text, nlp, spellcheck_dictionary, config, repeat, work_dir):
+    """Run all benchmarks on single text"""
+    results = []
+    results.append(run_benchmark(
+        "full_analysis", text, repeat,
+        lambda: NlpService.paragraph_cache.clear(),
+        lambda _: NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+    ))
+    # CHANGE ONE CHAR IN MIDDLE OF TEXT, SAME AS TYPING IN EDITOR
+    middle = len(text) // 2
+    changed_text = text[:middle] + "x" + text[middle:]
+    results.append(run_benchmark(
+        "partial_analysis", text, repeat,
+        lambda: analyze(text, nlp, config),
+        lambda doc: NlpService.partial_analysis(changed_text, doc, nlp, config)
+    ))
+    morphodita = nlp.get_pipe(MORPHODITA_PIPE_NAME)
+    results.append(run_benchmark(
+        "morphodita", text, repeat,
+        lambda: prepare_docs(nlp, text, 1),
+        lambda docs: list(morphodita.pipe(docs))
+    ))
+
+    def prepare_custom_data():
+        doc = analyze(text, nlp, config)
+        keys = doc._.stats.paragraph_keys
+        return doc, keys, [NlpService.paragraph_cache.get(k)[1] for k in keys]
+
+    results.append(run_benchmark(
+        "fill_custom_data", text, repeat,
+        prepare_custom_data,
+        lambda data: NlpService._fill_custom_data(text, data[0], DocumentStats(data[1], data[2], config))
+    ))
+    doc = analyze(text, nlp, config)
+    if spellcheck_dictionary is not None:
+        results.append(run_benchmark(
+            "spellcheck", text, repeat,
+            lambda: SpellcheckService.spell_cache.clear(),
+            lambda _: SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+        ))
+    results.append(run_benchmark(
+        "evaluate_close_words", text, repeat,
+        lambda: None,
+        lambda _: NlpService.evaluate_close_words(doc, config)
+    ))
+    results.append(run_benchmark(
+        "word_frequencies", text, repeat,
+        lambda: None,
+        lambda _: NlpService.compute_word_frequencies(doc, config)
+    ))
+    docx_path = os.path.join(work_dir, "bench.docx")
+    html = "".join(f"<p>{paragraph}</p>" for paragraph in text.split("\n"))
+    results.append(run_benchmark(
+        "export_docx", text, repeat,
+        lambda: None,
+        lambda _: ExportService.export_rich_file(docx_path, html)
+    ))
+    results.append(run_benchmark(
+        "import_docx", text, repeat,
+        lambda: None,
+        lambda _: ImportService.import_document(docx_path)
+    ))
+    return results
+
+
+def compare(results, baseline_path):
+    """Print relative change of median latency against results loaded from baseline file"""
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = {(r["benchmark"], r["pages"]): r for r in json.load(file)["results"]}
+    for result in results:
+        base = baseline.get((result["benchmark"], result["pages"]))
+        if base is not None and base["p50"] > 0:
+            change = (result["p50"] - base["p50"]) / base["p50"] * 100
+            print(f"{result['benchmark']:>20} {result['pages']:>5} pages: p50 {change:+.1f}%", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file", default="test_files/sample.txt", help="Text file used as source of sentences")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 500], help="Sizes of documents")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs of every benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Path of JSON file with results. Results are written to stdout if not given")
+    parser.add_argument("--baseline", help="JSON file with results of previous run used for comparison")
+    args = parser.parse_args()
+    nlp = NlpService.initialize()
+    spellcheck_dictionary = SpellcheckService.initialize()["spellcheck"]
+    ImportService.ensure_pandoc_available()
+    with open(args.file, 'r', encoding='utf-8') as file:
+        source_text = file.read()
+    config = Config()
+    all_results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for pages in args.pages:
+            all_results.extend(benchmark_text(TestUtils.create_corpus(source_text, pages, args.seed), nlp,
+                                              spellcheck_dictionary, config, args.repeat, tmp_dir))
+    report = {
+        "version": VERSION,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": all_results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+    if args.baseline:
+        compare(all_results, args.baseline)
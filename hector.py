@@ -1,5 +1,7 @@
 import argparse
 import ctypes
+import multiprocessing
+import os
 import platform
 import sys
 import tkinter as tk
@@ -8,25 +10,173 @@ from tkinter import messagebox, ttk
 from pygments.styles.dracula import foreground
 from ttkthemes import ThemedTk
 
+from src.backend.analysis_server import AnalysisServer
+from src.backend.profiler import Profiler
 from src.backend.run_context import RunContext
+from src.backend.startup_loader import StartupLoader
+from src.backend.service.batch_analysis_service import BatchAnalysisService
+from src.backend.service.config_service import ConfigService
+from src.backend.service.download_service import DownloadService, DownloadError
 from src.backend.service.import_service import ImportService
 from src.backend.service.nlp_service import NlpService
 from src.backend.service.spellcheck_service import SpellcheckService
 from src.const.colors import ACCENT_COLOR, PRIMARY_COLOR, ACCENT_2_COLOR, PANEL_TEXT_COLOR, TEXT_EDITOR_FRAME_BG, \
     TEXT_EDITOR_BG, EDITOR_TEXT_COLOR
-from src.const.values import VERSION
+from src.const.paths import CONFIG_FILE_PATH, DATA_DIRECTORY
+from src.const.values import VERSION, BATCH_REPORT_FORMAT_JSON, BATCH_REPORT_FORMAT_CSV, ANALYSIS_SERVER_HOST, \
+    ANALYSIS_SERVER_PORT, ANALYSIS_SERVER_QUEUE_SIZE, STARTUP_RESOURCE_NLP, STARTUP_RESOURCE_DICTIONARIES, \
+    STARTUP_RESOURCE_PANDOC, STARTUP_RESOURCE_UPDATES, STARTUP_POLL_INTERVAL
 from src.gui.navigator import Navigator
 from src.gui.window.main_window import MainWindow
 from src.gui.window.project_selector_window import ProjectSelectorWindow
-from src.gui.window.splash_window import SplashWindow
 from src.utils import Utils
 
 
+# ERRORS OF RESOURCES, WITHOUT WHICH APPLICATION CAN NOT RUN
+STARTUP_ERRORS = {
+    STARTUP_RESOURCE_NLP: "Nepodarilo sa stiahnuť jazykový model. Overte prosím, že máte internetové pripojenie!",
+    STARTUP_RESOURCE_DICTIONARIES: "Nepodarilo sa stiahnuť slovníky. Overte prosím, že máte internetové pripojenie!",
+    STARTUP_RESOURCE_PANDOC: "Nepodarilo sa stiahnuť modul pandoc. Overte prosím, že máte internetové pripojenie!",
+}
+
+
 def handle_error(text):
     messagebox.showerror('Chyba spúštania!', text)
 
 
+def create_startup_loader(ctx: RunContext, args):
+    """Create loader of resources, that are loaded in background while GUI is already shown"""
+
+    def load_nlp():
+        nlp = NlpService.initialize()
+        if not nlp:
+            raise RuntimeError("Unable to initialize NLP model")
+        ctx.nlp = nlp
+
+    def load_dictionaries():
+        dictionaries = SpellcheckService.initialize(github_token=args.github_token, github_user=args.github_user)
+        if dictionaries["spellcheck"] is None:
+            raise RuntimeError("Unable to initialize dictionaries")
+        ctx.spellcheck_dictionary = dictionaries["spellcheck"]
+        ctx.thesaurus = dictionaries["thesaurus"]
+
+    def check_updates():
+        build_info = Utils.get_build_info()
+        channel = build_info['channel'].lower()
+        if channel == "beta" or channel == "stable":
+            ctx.has_available_update = Utils.check_updates(VERSION, channel == "beta", github_token=args.github_token,
+                                                           github_user=args.github_user)
+        else:
+            ctx.has_available_update = False
+
+    loader = StartupLoader()
+    loader.add(STARTUP_RESOURCE_NLP, load_nlp)
+    loader.add(STARTUP_RESOURCE_DICTIONARIES, load_dictionaries)
+    loader.add(STARTUP_RESOURCE_PANDOC, ImportService.ensure_pandoc_available)
+    loader.add(STARTUP_RESOURCE_UPDATES, check_updates)
+    return loader
+
+
+def check_startup(root, loader: StartupLoader):
+    """Periodically check background loading. Application is closed, if any required resource failed to load"""
+    for name in loader.failed():
+        if name in STARTUP_ERRORS:
+            handle_error(STARTUP_ERRORS[name])
+            root.destroy()
+            return
+    if not loader.is_finished():
+        root.after(STARTUP_POLL_INTERVAL, check_startup, root, loader)
+
+
+def open_main_window(root):
+    """Open main window immediately. Analysis in editor is queued until NLP model is loaded"""
+    MainWindow(root)
+
+
+def run_batch_analysis(args):
+    """Run headless analysis of documents given on command line. Returns exit code"""
+    config = ConfigService.load(args.config)
+    try:
+        sources = BatchAnalysisService.collect_sources(args.paths, config)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    # MODELS AND DICTIONARIES ARE DOWNLOADED BY MAIN PROCESS, SO WORKERS DO NOT DOWNLOAD THEM CONCURRENTLY
+    print("sťahujem a inicializujem jazykový model...", file=sys.stderr)
+    nlp = NlpService.initialize()
+    if not nlp:
+        print("Nepodarilo sa stiahnuť jazykový model. Overte prosím, že máte internetové pripojenie!", file=sys.stderr)
+        return 1
+    print("sťahujem a inicializujem slovník...", file=sys.stderr)
+    spellcheck_dictionary = SpellcheckService.initialize(github_token=args.github_token,
+                                                         github_user=args.github_user)["spellcheck"]
+    # noinspection PyBroadException
+    try:
+        ImportService.ensure_pandoc_available()
+    except Exception:
+        print("Nepodarilo sa stiahnuť modul pandoc. Overte prosím, že máte internetové pripojenie!", file=sys.stderr)
+        return 1
+    failed = []
+
+    def log_failures(reports):
+        for report in reports:
+            if report.error is not None:
+                failed.append(report)
+                print(f"{report.name}: {report.error}", file=sys.stderr)
+            yield report
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        reports = BatchAnalysisService.analyze_sources(sources, nlp, spellcheck_dictionary, args.workers)
+        BatchAnalysisService.write_reports(log_failures(reports), output, args.format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    SpellcheckService.save_cache()
+    return 1 if len(failed) > 0 else 0
+
+
+def run_create_mirror(args):
+    """Download models and dictionaries to mirror directory. Returns exit code"""
+    downloads = NlpService.get_downloads() + SpellcheckService.get_downloads(github_token=args.github_token)
+    try:
+        DownloadService.create_mirror(downloads, args.directory)
+    except (OSError, DownloadError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Jazykové modely a slovníky boli stiahnuté do {args.directory}", file=sys.stderr)
+    return 0
+
+
+def run_analysis_server(args):
+    """Run local analysis server until it is interrupted. Returns exit code"""
+    # MODELS AND DICTIONARIES ARE DOWNLOADED BY MAIN PROCESS, SO WORKERS DO NOT DOWNLOAD THEM CONCURRENTLY
+    print("sťahujem jazykový model a slovníky...", file=sys.stderr)
+    if not NlpService.initialize():
+        print("Nepodarilo sa stiahnuť jazykový model. Overte prosím, že máte internetové pripojenie!", file=sys.stderr)
+        return 1
+    if not SpellcheckService.initialize(github_token=args.github_token, github_user=args.github_user)["spellcheck"]:
+        print("Nepodarilo sa stiahnuť slovníky. Overte prosím, že máte internetové pripojenie!", file=sys.stderr)
+        return 1
+    workers = args.workers if args.workers is not None else max(1, (os.cpu_count() or 1) - 1)
+    server = AnalysisServer(ConfigService.load(args.config), args.host, args.port, workers, args.queue_size)
+    print("inicializujem paralelné spracovanie textu...", file=sys.stderr)
+    if not server.start():
+        print("Nepodarilo sa inicializovať spracovanie textu!", file=sys.stderr)
+        return 1
+    print(f"Hector analyzuje texty na http://{server.host}:{server.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
 if __name__ == "__main__":
+    # NLP POOL PROCESSES ARE SPAWNED FROM THIS SCRIPT. NEEDED FOR FROZEN EXECUTABLES
+    multiprocessing.freeze_support()
     if platform.system() == 'Windows':
         ctypes.windll.shcore.SetProcessDpiAwareness(True)
 
@@ -34,8 +184,41 @@ if __name__ == "__main__":
 
     parser.add_argument("--github_token", help="Run with this github token for all github calls")
     parser.add_argument("--github_user", help="Run with this github token for all github calls")
+    parser.add_argument("--mirror", help="Directory created by mirror command. Models and dictionaries are copied "
+                                         "from it instead of downloading")
+    parser.add_argument("--profile", action="store_true",
+                        help="Measure stages of every analysis and write them to data/analysis_profile.log")
+    subparsers = parser.add_subparsers(dest="command")
+    analyze_parser = subparsers.add_parser("analyze", help="Analyze documents, projects or directories without GUI")
+    analyze_parser.add_argument("paths", nargs="+",
+                                help="Documents (.txt, .docx, .odt, .rtf), projects (.hproj) or directories")
+    analyze_parser.add_argument("--config", default=CONFIG_FILE_PATH, help="Path of config file used for analysis")
+    analyze_parser.add_argument("--workers", type=int, default=1, help="Number of documents analyzed in parallel")
+    analyze_parser.add_argument("--format", choices=[BATCH_REPORT_FORMAT_JSON, BATCH_REPORT_FORMAT_CSV],
+                                default=BATCH_REPORT_FORMAT_JSON, help="Format of report")
+    analyze_parser.add_argument("--output", help="Path of report file. Report is written to stdout if not given")
+
+    serve_parser = subparsers.add_parser("serve", help="Run local HTTP/JSON analysis server")
+    serve_parser.add_argument("--host", default=ANALYSIS_SERVER_HOST, help="Address server listens on")
+    serve_parser.add_argument("--port", type=int, default=ANALYSIS_SERVER_PORT, help="Port server listens on")
+    serve_parser.add_argument("--workers", type=int, help="Number of worker processes")
+    serve_parser.add_argument("--queue-size", type=int, default=ANALYSIS_SERVER_QUEUE_SIZE,
+                              help="Number of requests waiting for free worker. Other requests are rejected")
+    serve_parser.add_argument("--config", default=CONFIG_FILE_PATH,
+                              help="Path of config file used for requests without config")
+
+    mirror_parser = subparsers.add_parser("mirror", help="Download models and dictionaries for offline installs")
+    mirror_parser.add_argument("directory", help="Directory files are downloaded to")
 
     args = parser.parse_args()
+    Profiler.enabled = args.profile
+    DownloadService.mirror_dir = args.mirror
+    if args.command == "analyze":
+        sys.exit(run_batch_analysis(args))
+    if args.command == "serve":
+        sys.exit(run_analysis_server(args))
+    if args.command == "mirror":
+        sys.exit(run_create_mirror(args))
     root = ThemedTk(theme="clam")
     root.title("Hector")
     style = ttk.Style(root)
@@ -93,52 +276,17 @@ if __name__ == "__main__":
         ('!selected', TEXT_EDITOR_FRAME_BG)])
     photo = tk.PhotoImage(file=Utils.resource_path('images/hector-icon.png'))
     root.wm_iconphoto(True, photo)
-    splash = SplashWindow(root)
-    splash.update_status("sťahujem a inicializujem jazykový model...")
-    nlp = NlpService.initialize()
-    if not nlp:
-        splash.close()
-        handle_error("Nepodarilo sa stiahnuť jazykový model. Overte prosím, že máte internetové pripojenie!")
-        sys.exit(1)
-    splash.update_status("sťahujem a inicializujem slovník...")
-    dictionaries = SpellcheckService.initialize(github_token=args.github_token, github_user=args.github_user)
-    if not nlp:
-        splash.close()
-        handle_error("Nepodarilo sa stiahnuť slovníky. Overte prosím, že máte internetové pripojenie!")
-        sys.exit(1)
-    splash.update_status("sťahujem pandoc...")
-    # noinspection PyBroadException
-    try:
-        ImportService.ensure_pandoc_available()
-    except Exception:
-        splash.close()
-        handle_error("Nepodarilo sa stiahnuť modul pandoc. Overte prosím, že máte internetové pripojenie!")
-        sys.exit(1)
-
-    if not nlp:
-        splash.close()
-        handle_error("Nepodarilo sa stiahnuť jazykový model. Overte prosím, že máte internetové pripojenie!")
-        sys.exit(1)
-    splash.update_status("kontrolujem aktualizácie...")
-    has_available_update = False
-    build_info = Utils.get_build_info()
-    if build_info['channel'].lower() == "beta":
-        has_available_update = Utils.check_updates(VERSION, True,
-                                                   github_token=args.github_token, github_user=args.github_user)
-    if build_info['channel'].lower() == "stable":
-        has_available_update = Utils.check_updates(VERSION, False,
-                                                   github_token=args.github_token, github_user=args.github_user)
-    splash.update_status("inicializujem textový processor...")
     ctx = RunContext()
-    ctx.nlp = nlp
-    ctx.spellcheck_dictionary = dictionaries["spellcheck"]
-    ctx.thesaurus = dictionaries["thesaurus"]
-    ctx.has_available_update = has_available_update
+    # DATA DIRECTORY IS SHARED BY ALL RESOURCES, SO IT MUST EXIST BEFORE THEY ARE LOADED CONCURRENTLY
+    os.makedirs(DATA_DIRECTORY, exist_ok=True)
+    ctx.startup = create_startup_loader(ctx, args)
+    ctx.startup.start()
+    # POOL PROCESSES ARE STARTED BY FIRST LONG TEXT, AFTER MAIN PROCESS HAS DOWNLOADED THE MODEL
+    ctx.nlp_pool = NlpService.create_pool()
     navigator = Navigator()
     navigator.root = root
-    navigator.windows[Navigator.MAIN_WINDOW] = lambda r: MainWindow(r)
+    navigator.windows[Navigator.MAIN_WINDOW] = open_main_window
     navigator.windows[Navigator.PROJECT_SELECTOR_WINDOW] = lambda r: ProjectSelectorWindow(r)
-    splash.close()
     # OPEN WINDOW IN MAXIMIZED STATE
     # FOR WINDOWS AND MAC OS SET STATE ZOOMED
     # FOR LINUX SET ATTRIBUTE ZOOMED
@@ -147,4 +295,10 @@ if __name__ == "__main__":
     else:
         root.attributes('-zoomed', True)
     navigator.navigate(Navigator.PROJECT_SELECTOR_WINDOW)
+    root.after(STARTUP_POLL_INTERVAL, check_startup, root, ctx.startup)
     root.mainloop()
+    # CACHE IS NOT SAVED IF DICTIONARIES WERE NOT LOADED, SO SAVED RESULTS ARE NOT OVERWRITTEN BY EMPTY CACHE
+    if ctx.startup.is_ready(STARTUP_RESOURCE_DICTIONARIES):
+        SpellcheckService.save_cache()
+    if ctx.nlp_pool is not None:
+        ctx.nlp_pool.shutdown()
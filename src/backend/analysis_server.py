@@ -0,0 +1,238 @@
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from src.backend.service.analysis_service import AnalysisService
+from src.backend.service.batch_analysis_service import BatchAnalysisService
+from src.backend.service.nlp_service import NlpService
+from src.backend.service.spellcheck_service import SpellcheckService
+from src.const.values import ANALYSIS_SERVER_QUEUE_SIZE, ANALYSIS_SERVER_MAX_REQUEST_SIZE, NLP_BATCH_SIZE
+from src.domain.batch_analysis import BatchSource, BatchReport
+from src.domain.config import Config
+
+# NLP INSTANCE AND SPELLCHECK DICTIONARY OF SERVER WORKER PROCESS
+_worker_nlp = None
+_worker_spellcheck_dictionary = None
+
+
+def _initialize_server_worker():
+    """Load NLP pipeline and dictionaries once per server worker process"""
+    global _worker_nlp, _worker_spellcheck_dictionary
+    _worker_nlp = NlpService.initialize()
+    _worker_spellcheck_dictionary = SpellcheckService.initialize()["spellcheck"]
+
+
+def _ping_server_worker():
+    """Dummy task used to force pool to start and warm up all processes"""
+    return _worker_nlp is not None
+
+
+def _handle_in_worker(endpoint: str, text: str, config: Config):
+    """Run endpoint in server worker process"""
+    return AnalysisServer.endpoints[endpoint](text, config, _worker_nlp, _worker_spellcheck_dictionary)
+
+
+class ServerBusyError(Exception):
+    """Raised when all workers are busy and request queue is full"""
+
+
+class AnalysisServer:
+    """
+        Local HTTP server that analyzes texts sent as JSON. NLP pipelines and dictionaries are loaded once in pool of
+        worker processes and stay warm between requests. Requests are handled concurrently by workers. Number of waiting
+        requests is limited, requests over limit are rejected, so clients can retry later.
+    """
+
+    def __init__(self, config: Config, host: str, port: int, workers: int, queue_size=ANALYSIS_SERVER_QUEUE_SIZE):
+        """
+        Constructor for analysis server
+        :param config Config used for requests that do not contain their own config
+        :param host Host name or address server listens on
+        :param port Port server listens on. Zero selects free port
+        :param workers Number of worker processes
+        :param queue_size Maximal number of requests waiting for free worker
+        """
+        self.config = config
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.pool = None
+        # GUARDS REPLACEMENT OF BROKEN POOL, SO IT IS REPLACED ONLY ONCE WHEN SEVERAL REQUESTS FAIL AT ONCE
+        self._pool_lock = threading.Lock()
+        self.http_server = None
+        # REQUESTS THAT ARE RUNNING OR WAITING FOR WORKER
+        self.slots = threading.BoundedSemaphore(self.workers + queue_size)
+
+    def start(self):
+        """Start worker processes and bind server. Returns False if workers failed to initialize"""
+        self.pool = self._create_pool()
+        warmup = [self.pool.submit(_ping_server_worker) for _ in range(self.workers)]
+        if not all(f.result() for f in warmup):
+            self.pool.shutdown(wait=False)
+            return False
+        self.http_server = ThreadingHTTPServer((self.host, self.port), AnalysisRequestHandler)
+        self.http_server.daemon_threads = True
+        self.http_server.analysis_server = self
+        self.port = self.http_server.server_address[1]
+        return True
+
+    def serve_forever(self):
+        """Handle requests until server is stopped"""
+        self.http_server.serve_forever()
+
+    def stop(self):
+        """Stop server and worker processes"""
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+            self.http_server = None
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def handle(self, endpoint: str, data: dict):
+        """Run endpoint in worker process. Raises ServerBusyError if queue is full"""
+        if not self.slots.acquire(blocking=False):
+            raise ServerBusyError()
+        try:
+            config = Config(data["config"]) if data.get("config") is not None else self.config
+            pool = self.pool
+            try:
+                return pool.submit(_handle_in_worker, endpoint, data["text"], config).result()
+            except BrokenProcessPool:
+                # WORKER PROCESS CRASHED AND POOL CAN NOT BE USED ANYMORE. NEXT REQUESTS USE NEW POOL
+                self._replace_broken_pool(pool)
+                raise
+        finally:
+            self.slots.release()
+
+    def _create_pool(self):
+        # SPAWN IS USED ON ALL PLATFORMS, SAME AS NLP POOL
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_initialize_server_worker)
+
+    def _replace_broken_pool(self, broken_pool: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self.pool is broken_pool:
+                broken_pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = self._create_pool()
+
+    @staticmethod
+    def analyze(text: str, config: Config, nlp, spellcheck_dictionary):
+        """Full analysis, same as analysis of single document by batch analysis"""
+        report = BatchAnalysisService.fill_report(BatchReport(BatchSource("", None, config)), text, config, nlp,
+                                                  spellcheck_dictionary)
+        data = report.to_dict()
+        for key in ["name", "path", "project_path", "error", "duration"]:
+            del data[key]
+        return data
+
+    @staticmethod
+    def spellcheck(text: str, config: Config, nlp, spellcheck_dictionary):
+        """Grammar errors found by spellcheck"""
+        doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+        SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+        return {"grammar_errors": BatchAnalysisService.grammar_errors_to_list(doc)}
+
+    @staticmethod
+    def readability(text: str, config: Config, nlp, spellcheck_dictionary):
+        """Readability and basic statistics of text"""
+        doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+        return {
+            "readability": NlpService.compute_readability(doc),
+            "characters": doc._.total_chars,
+            "words": doc._.total_words,
+            "unique_words": doc._.total_unique_words,
+            "pages": doc._.total_pages
+        }
+
+    @staticmethod
+    def word_frequencies(text: str, config: Config, nlp, spellcheck_dictionary):
+        """Frequent words with char offsets of their occourences"""
+        doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+        return {"word_frequencies": [
+            {"word": word.text, "count": len(word), "offsets": list(word.char_offsets)}
+            for word in NlpService.compute_word_frequencies(doc, config)
+        ]}
+
+    @staticmethod
+    def close_words(text: str, config: Config, nlp, spellcheck_dictionary):
+        """Close words with their repetition groups"""
+        doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config)
+        return {"close_words": {
+            word: {
+                "total": data["total"],
+                "repetition_groups": [[{"text": token.text, "start": token.idx, "end": token.idx + len(token.text)}
+                                       for token in group] for group in data["repetition_groups"]]
+            }
+            for word, data in AnalysisService.compute_close_words(doc, config).items()
+        }}
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """
+        Handler of analysis server requests. Endpoints accept POST requests with JSON object containing text and
+        optional config. GET /health can be used to check, that server is running.
+    """
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "workers": self.server.analysis_server.workers})
+        else:
+            self._send_json(404, {"error": "Unknown endpoint"})
+
+    def do_POST(self):
+        endpoint = self.path.strip("/")
+        if endpoint not in AnalysisServer.endpoints:
+            self._send_json(404, {"error": "Unknown endpoint"})
+            return
+        if self.headers.get("Content-Length") is None:
+            self._send_json(411, {"error": "Content-Length is required"})
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length"})
+            return
+        if length > ANALYSIS_SERVER_MAX_REQUEST_SIZE:
+            self._send_json(413, {"error": "Request is too large"})
+            return
+        try:
+            data = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(data, dict) or not isinstance(data.get("text"), str):
+                raise ValueError("Request must be JSON object with text")
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            self._send_json(200, self.server.analysis_server.handle(endpoint, data))
+        except ServerBusyError:
+            self._send_json(503, {"error": "Server is busy"}, {"Retry-After": "1"})
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _send_json(self, status: int, data: dict, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ENDPOINTS BY PATH
+AnalysisServer.endpoints = {
+    "analyze": AnalysisServer.analyze,
+    "spellcheck": AnalysisServer.spellcheck,
+    "readability": AnalysisServer.readability,
+    "word-frequencies": AnalysisServer.word_frequencies,
+    "close-words": AnalysisServer.close_words,
+}
@@ -0,0 +1,86 @@
+import threading
+import traceback
+
+from src.domain.analysis import AnalysisRequest, AnalysisResult
+
+
+class AnalysisWorker:
+    """
+        Background thread that executes text analysis outside of GUI thread.
+        Worker holds only newest pending request. When new request is submitted before worker picks up previous one,
+        previous request is dropped. Results are never passed to GUI directly, GUI needs to poll them using poll method.
+    """
+
+    def __init__(self, analyze):
+        """
+        Constructor for analysis worker
+        :param analyze Callable that accepts AnalysisRequest and returns AnalysisResult
+        """
+        self.analyze = analyze
+        self._condition = threading.Condition()
+        self._pending_request = None
+        self._result = None
+        self._running = False
+        self._busy = False
+        self._thread = None
+
+    def start(self):
+        """Start worker thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="hector-analysis-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop worker thread. Request that is currently processed is finished, but its result is thrown away"""
+        with self._condition:
+            self._running = False
+            self._pending_request = None
+            self._condition.notify_all()
+
+    def submit(self, request: AnalysisRequest):
+        """Submit new request. Pending request with lower revision is dropped"""
+        with self._condition:
+            if self._pending_request is None or self._pending_request.revision <= request.revision:
+                self._pending_request = request
+            self._condition.notify_all()
+
+    def poll(self):
+        """Return newest finished result, or None if there is no new result"""
+        with self._condition:
+            result = self._result
+            self._result = None
+            return result
+
+    def is_busy(self):
+        """Check if worker has any pending or running request"""
+        with self._condition:
+            return self._pending_request is not None or self._busy
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending_request is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                request = self._pending_request
+                self._pending_request = None
+                self._busy = True
+            result = None
+            # noinspection PyBroadException
+            try:
+                result = self.analyze(request)
+            except Exception:
+                traceback.print_exc()
+            with self._condition:
+                self._busy = False
+                if result is not None and self._running:
+                    self._store_result(result)
+
+    def _store_result(self, result: AnalysisResult):
+        # KEEP ONLY NEWEST RESULT. OLDER RESULTS ARE STALE ANYWAY
+        if self._result is None or self._result.revision <= result.revision:
+            self._result = result
@@ -0,0 +1,249 @@
+import bisect
+import functools
+import itertools
+import re
+from collections import Counter
+
+from src.domain.config import Config
+from src.domain.unique_word import UniqueWord
+
+WORD_PATTERN = re.compile("\\w+")
+SENTENCE_LENGTH_NORMAL = 0
+SENTENCE_LENGTH_MID = 1
+SENTENCE_LENGTH_LONG = 2
+
+
+def is_word(token):
+    """Check if token is word"""
+    return WORD_PATTERN.match(token.lower_) is not None
+
+
+class ParagraphStats:
+    """
+        Statistics of single analyzed paragraph. All token and word indexes are relative to start of paragraph.
+        Stats do not depend on config, so they are computed only once and cached together with paragraph.
+    """
+
+    def __init__(self, paragraph_doc):
+        # NUMBER OF TOKENS IN PARAGRAPH
+        self.token_count = len(paragraph_doc)
+        # NUMBER OF CHARS IN PARAGRAPH
+        self.char_count = len(paragraph_doc.text)
+        # RELATIVE TOKEN INDEXES OF WORDS
+        self.word_tokens = []
+        # RELATIVE CHAR OFFSETS AND LENGTHS OF WORDS
+        self.word_offsets = []
+        self.word_lengths = []
+        # LOWERCASE WORDS
+        self.words = []
+        # LOWERCASE LEMMAS OF WORDS
+        self.lemmas = []
+        # LENGTHS OF WORDS IN SENTENCE. KEY IS RELATIVE INDEX OF FIRST TOKEN OF SENTENCE
+        self.sentence_word_lengths = {}
+        for token in paragraph_doc:
+            if is_word(token):
+                self.word_tokens.append(token.i)
+                self.word_offsets.append(token.idx)
+                self.word_lengths.append(len(token.text))
+                self.words.append(token.lower_)
+                self.lemmas.append(token.lemma_.lower())
+        if self.token_count > 0:
+            for sentence in paragraph_doc.sents:
+                self.sentence_word_lengths[sentence.start] = [len(t.text) for t in sentence if is_word(t)]
+        # RELATIVE WORD INDEX OF TOKEN
+        self.word_index_by_token = {token_index: i for i, token_index in enumerate(self.word_tokens)}
+        self.word_counts = Counter(self.words)
+        self.lemma_counts = Counter(self.lemmas)
+        # RELATIVE WORD INDEXES OF OCCOURENCES OF EACH WORD AND LEMMA
+        self.word_positions = {}
+        self.lemma_positions = {}
+        for i, (word, lemma) in enumerate(zip(self.words, self.lemmas)):
+            self.word_positions.setdefault(word, []).append(i)
+            self.lemma_positions.setdefault(lemma, []).append(i)
+
+
+class DocumentStats:
+    """
+        Statistics of whole document assembled from paragraph statistics.
+        Word and lemma counts and index of paragraphs that contain each word are taken from previous version of
+        document and only contributions of removed and added paragraphs are applied.
+        Global indexes are computed as paragraph base + relative index, only when occourences of word are accessed.
+    """
+
+    def __init__(self, paragraph_keys: list, paragraph_stats: list, config: Config, previous=None):
+        # KEYS OF PARAGRAPHS IN PARAGRAPH CACHE. KEY IS BASED ON PARAGRAPH TEXT
+        self.paragraph_keys = paragraph_keys
+        # STATS OF EACH PARAGRAPH
+        self.paragraph_stats = paragraph_stats
+        self.config = config
+        # INDEX OF FIRST TOKEN AND FIRST WORD OF EACH PARAGRAPH
+        self.token_bases = list(itertools.accumulate((s.token_count for s in paragraph_stats), initial=0))
+        self.word_bases = list(itertools.accumulate((len(s.word_tokens) for s in paragraph_stats), initial=0))
+        self.char_bases = list(itertools.accumulate((s.char_count for s in paragraph_stats), initial=0))
+        if previous is None:
+            self.word_counts = Counter()
+            self.lemma_counts = Counter()
+            # KEYS OF PARAGRAPHS THAT CONTAIN WORD OR LEMMA
+            self.word_paragraphs = {}
+            self.lemma_paragraphs = {}
+            previous_keys = Counter()
+            previous_stats = {}
+        else:
+            self.word_counts = previous.word_counts.copy()
+            self.lemma_counts = previous.lemma_counts.copy()
+            # SETS OF PARAGRAPH KEYS ARE SHARED WITH PREVIOUS DOCUMENT UNTIL THEY ARE CHANGED
+            self.word_paragraphs = previous.word_paragraphs.copy()
+            self.lemma_paragraphs = previous.lemma_paragraphs.copy()
+            previous_keys = Counter(previous.paragraph_keys)
+            previous_stats = dict(zip(previous.paragraph_keys, previous.paragraph_stats))
+        current_keys = Counter(paragraph_keys)
+        current_stats = dict(zip(paragraph_keys, paragraph_stats))
+        copied_words = set()
+        copied_lemmas = set()
+        for key, count in (previous_keys - current_keys).items():
+            stats = previous_stats[key]
+            DocumentStats._apply_delta(self.word_counts, stats.word_counts, -count)
+            DocumentStats._apply_delta(self.lemma_counts, stats.lemma_counts, -count)
+            if key not in current_keys:
+                DocumentStats._update_index(self.word_paragraphs, copied_words, key, stats.word_counts, False)
+                DocumentStats._update_index(self.lemma_paragraphs, copied_lemmas, key, stats.lemma_counts, False)
+        for key, count in (current_keys - previous_keys).items():
+            stats = current_stats[key]
+            DocumentStats._apply_delta(self.word_counts, stats.word_counts, count)
+            DocumentStats._apply_delta(self.lemma_counts, stats.lemma_counts, count)
+            if key not in previous_keys:
+                DocumentStats._update_index(self.word_paragraphs, copied_words, key, stats.word_counts, True)
+                DocumentStats._update_index(self.lemma_paragraphs, copied_lemmas, key, stats.lemma_counts, True)
+        DocumentStats._prune_index(self.word_paragraphs, copied_words)
+        DocumentStats._prune_index(self.lemma_paragraphs, copied_lemmas)
+        # LAZILY MATERIALIZED TOKEN LISTS
+        self._words = None
+        self._paragraphs = None
+        self._unique_words = None
+        self._lemmas = None
+        self._paragraph_indexes = None
+
+    @property
+    def total_words(self):
+        return self.word_bases[-1]
+
+    @property
+    def total_unique_words(self):
+        return len(self.word_counts)
+
+    def paragraph_index(self, token_index: int):
+        """Get index of paragraph that contains token"""
+        return bisect.bisect_right(self.token_bases, token_index) - 1
+
+    def word_index(self, token_index: int):
+        """Get global word index of token, or None if token is not word"""
+        p = self.paragraph_index(token_index)
+        relative_word_index = self.paragraph_stats[p].word_index_by_token.get(token_index - self.token_bases[p], None)
+        if relative_word_index is None:
+            return None
+        return self.word_bases[p] + relative_word_index
+
+    def sentence_length(self, sentence_start: int):
+        """Classify length of sentence starting on token according to config"""
+        p = self.paragraph_index(sentence_start)
+        word_lengths = self.paragraph_stats[p].sentence_word_lengths.get(sentence_start - self.token_bases[p], None)
+        if word_lengths is None:
+            return SENTENCE_LENGTH_NORMAL
+        settings = self.config.analysis_settings
+        words = sum(1 for length in word_lengths if length >= settings.long_sentence_min_word_length)
+        if words > settings.long_sentence_words_high:
+            return SENTENCE_LENGTH_LONG
+        if words > settings.long_sentence_words_mid:
+            return SENTENCE_LENGTH_MID
+        return SENTENCE_LENGTH_NORMAL
+
+    def paragraph(self, doc, p: int):
+        """Get span of paragraph"""
+        return doc[self.token_bases[p]:self.token_bases[p + 1]]
+
+    def words(self, doc):
+        """Get all word tokens of document"""
+        if self._words is None:
+            self._words = [doc[base + token_index]
+                           for base, stats in zip(self.token_bases, self.paragraph_stats)
+                           for token_index in stats.word_tokens]
+        return self._words
+
+    def paragraphs(self, doc):
+        """Get spans of all paragraphs of document"""
+        if self._paragraphs is None:
+            self._paragraphs = [self.paragraph(doc, p) for p in range(len(self.paragraph_stats))]
+        return self._paragraphs
+
+    def unique_words(self, doc):
+        """Get unique words with index of their occourences"""
+        if self._unique_words is None:
+            self._unique_words = self._group_words(doc, self.word_paragraphs, self.word_counts,
+                                                   lambda stats: stats.word_positions)
+        return self._unique_words
+
+    def lemmas(self, doc):
+        """Get unique lemmas with index of their occourences"""
+        if self._lemmas is None:
+            self._lemmas = self._group_words(doc, self.lemma_paragraphs, self.lemma_counts,
+                                             lambda stats: stats.lemma_positions)
+        return self._lemmas
+
+    def _group_words(self, doc, index, counts, positions_of):
+        """Create unique words from occourence index. Occourences of word are resolved when they are accessed"""
+        resolve = functools.partial(self._resolve_occourences, index, positions_of)
+        return {key: UniqueWord(key, doc, count, resolve) for key, count in counts.items()}
+
+    def _resolve_occourences(self, index, positions_of, unique_word: UniqueWord):
+        """Append occourences of word from paragraphs that contain it. Only integer offsets are stored"""
+        paragraph_indexes = self._get_paragraph_indexes()
+        for p in sorted(p for key in index[unique_word.text] for p in paragraph_indexes[key]):
+            stats = self.paragraph_stats[p]
+            token_base = self.token_bases[p]
+            char_base = self.char_bases[p]
+            word_base = self.word_bases[p]
+            for relative_word_index in positions_of(stats)[unique_word.text]:
+                unique_word.append(token_base + stats.word_tokens[relative_word_index],
+                                   char_base + stats.word_offsets[relative_word_index],
+                                   stats.word_lengths[relative_word_index],
+                                   word_base + relative_word_index)
+
+    def _get_paragraph_indexes(self):
+        """Get indexes of paragraphs with each key. Same paragraph may be in text multiple times"""
+        if self._paragraph_indexes is None:
+            paragraph_indexes = {}
+            for p, key in enumerate(self.paragraph_keys):
+                paragraph_indexes.setdefault(key, []).append(p)
+            self._paragraph_indexes = paragraph_indexes
+        return self._paragraph_indexes
+
+    @staticmethod
+    def _update_index(index: dict, copied: set, paragraph_key, words, add: bool):
+        """
+        Add or remove paragraph from occourence index of words. Sets shared with previous document are copied before
+        they are changed, so index of previous document stays valid
+        """
+        for word in words:
+            if word not in copied:
+                index[word] = set(index.get(word, ()))
+                copied.add(word)
+            if add:
+                index[word].add(paragraph_key)
+            else:
+                index[word].discard(paragraph_key)
+
+    @staticmethod
+    def _prune_index(index: dict, changed: set):
+        """Remove words, that are not in any paragraph anymore"""
+        for word in changed:
+            if len(index[word]) == 0:
+                del index[word]
+
+    @staticmethod
+    def _apply_delta(counts: Counter, delta: Counter, multiplier: int):
+        for key, count in delta.items():
+            new_count = counts.get(key, 0) + multiplier * count
+            if new_count > 0:
+                counts[key] = new_count
+            else:
+                counts.pop(key, None)
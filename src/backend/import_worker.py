@@ -0,0 +1,90 @@
+import queue
+import threading
+import traceback
+
+from src.backend.service.import_service import ImportService
+from src.const.values import IMPORT_ANALYSIS_BATCH_SIZE
+
+
+class ImportWorker:
+    """
+        Background threads that import document and analyze it at the same time. Import thread streams paragraphs of
+        document and passes them in batches to analysis thread, so analysis starts before import finishes and imported
+        paragraphs are already analyzed when text is opened. GUI polls progress of import using is_finished.
+    """
+
+    def __init__(self, file_path, analyze_paragraphs):
+        """
+        Constructor for import worker
+        :param file_path Path of imported document
+        :param analyze_paragraphs Callable that accepts list of paragraphs. Executed in analysis thread
+        """
+        self.file_path = file_path
+        self.analyze_paragraphs = analyze_paragraphs
+        # NUMBER OF CHARS IMPORTED SO FAR
+        self.imported_chars = 0
+        # IMPORTED TEXT. AVAILABLE AFTER IMPORT IS FINISHED
+        self.text = None
+        # ERROR THAT STOPPED IMPORT, IF ANY
+        self.error = None
+        # BATCHES OF PARAGRAPHS WAITING FOR ANALYSIS. NONE MARKS END OF DOCUMENT
+        self._batches = queue.Queue()
+        self._import_thread = None
+        self._analysis_thread = None
+
+    def start(self):
+        """Start import and analysis threads"""
+        self._import_thread = threading.Thread(target=self._import, name="hector-import-worker", daemon=True)
+        self._analysis_thread = threading.Thread(target=self._analyze, name="hector-import-analysis", daemon=True)
+        self._import_thread.start()
+        self._analysis_thread.start()
+
+    def is_finished(self):
+        """Check if import is finished. Imported paragraphs may still be analyzed"""
+        return self._import_thread is not None and not self._import_thread.is_alive()
+
+    def wait_for_analysis(self, timeout=None):
+        """Wait until import is finished and all imported paragraphs are analyzed"""
+        if self._import_thread is not None:
+            self._import_thread.join(timeout)
+            self._analysis_thread.join(timeout)
+
+    def _import(self):
+        batch = []
+        batch_length = 0
+
+        def on_paragraph(paragraph):
+            nonlocal batch, batch_length
+            batch.append(paragraph)
+            batch_length += len(paragraph)
+            self.imported_chars += len(paragraph)
+            if batch_length >= IMPORT_ANALYSIS_BATCH_SIZE:
+                self._batches.put(batch)
+                batch = []
+                batch_length = 0
+
+        # noinspection PyBroadException
+        try:
+            self.text = ImportService.import_document(self.file_path, on_paragraph)
+            if len(batch) > 0:
+                self._batches.put(batch)
+        except Exception as e:
+            traceback.print_exc()
+            self.error = e
+        finally:
+            self._batches.put(None)
+
+    def _analyze(self):
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            if self.error is not None:
+                # TEXT OF FAILED IMPORT IS NEVER OPENED, SO REMAINING BATCHES ARE NOT ANALYZED
+                continue
+            # noinspection PyBroadException
+            try:
+                self.analyze_paragraphs(batch)
+            except Exception:
+                # ANALYSIS DURING IMPORT IS ONLY OPTIMIZATION. EDITOR ANALYZES TEXT AGAIN AFTER IT IS OPENED
+                traceback.print_exc()
@@ -1,4 +1,7 @@
-import spacy
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
 from spacy.language import Language
 import ufal.morphodita as morphodita
 from spacy.tokens import Token, Doc
@@ -166,6 +169,13 @@ voice_map = {
     'P': 'Pass'  # Passive
 }
 
+# PROCESS WIDE CONVERSION CACHES SHARED BY ALL COMPONENT INSTANCES
+# PDT TAGSET IS FINITE, SO TAG CACHE STAYS SMALL. TAG -> (POS, MORPH ATTRIBUTES, MORPH HASH)
+TAG_CACHE = {}
+# FULL LEMMA -> (RAW LEMMA, LEMMA COMMENTS). LEMMAS GROW WITH VOCABULARY, SO LEAST RECENTLY USED LEMMAS ARE EVICTED
+LEMMA_CACHE = OrderedDict()
+LEMMA_CACHE_SIZE = 200000
+
 
 # IMPORTANT: COMPONENT REQUERES TO HAVE SET SENTENES, BUT DEPENDENCY ANALYZER NEEDS MORPHO ATTRIBUTES
 # ALREADY SET. SUGGESTED USAGE IS TO USE RULE BASE SENTER TO ROUGHLY SET SENTENCE BOUNDARIES, PERFORM MORHO ANALYSIS
@@ -178,9 +188,14 @@ class MorphoditaTaggerMorphologizerLemmatizer:
         # INITIALIZE COMPONENT FIELDS
         self.tagger = morphodita.Tagger.load(tagger_path)
         self.nlp = nlp
+        # BUFFERS ARE REUSED FOR ALL SENTENCES. LOCK PROTECTS THEM IF PIPELINE IS CALLED FROM MORE THREADS
         self.forms = morphodita.Forms()
         self.lemmas = morphodita.TaggedLemmas()
+        self.buffers_lock = threading.Lock()
         self.morpho = self.tagger.getMorpho()
+        # CACHED MORPH HASHES ARE VALID ONLY IF MORPHS ARE REGISTERED IN VOCAB
+        for _, morph_attrs, _ in TAG_CACHE.values():
+            nlp.vocab.morphology.add(morph_attrs)
         # REGISTER CUSTOM EXTENSTIONS
         if not Token.has_extension("full_lemma"):
             Token.set_extension("full_lemma", default='')
@@ -226,33 +241,78 @@ class MorphoditaTaggerMorphologizerLemmatizer:
         return morph_attrs
 
     def __call__(self, doc: Doc) -> Doc:
+        with self.buffers_lock:
+            self._tag_doc(doc)
+        return doc
+
+    def pipe(self, stream: Iterable[Doc], batch_size: int = 128) -> Iterable[Doc]:
+        # LOCK IS TAKEN ONCE FOR WHOLE BATCH
+        batch = []
+        for doc in stream:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield from self._tag_batch(batch)
+                batch = []
+        if len(batch) > 0:
+            yield from self._tag_batch(batch)
+
+    def _tag_batch(self, docs):
+        with self.buffers_lock:
+            for doc in docs:
+                self._tag_doc(doc)
+        return docs
+
+    def _tag_doc(self, doc: Doc):
+        forms = self.forms
+        lemmas = self.lemmas
         # FOR EVERY SENTENCE
         for sent in doc.sents:
-            forms = morphodita.Forms()
-            # WE NEED TO RETAIN TOKEN INDEXES
-            sentence_tokens = [token for token in sent]
+            forms.clear()
             for token in sent:
                 forms.push_back(token.text)
-            lemmas = morphodita.TaggedLemmas()
             # TAG SENTENCE
             self.tagger.tag(forms, lemmas)
-            # PROCESS TOKEN LEMMA PAIRS
-            for token, tagged_lemma in zip(sentence_tokens, lemmas):
+            # PROCESS TOKEN LEMMA PAIRS. TOKENS OF SENTENCE ARE CONSECUTIVE, SO WE ACCESS THEM BY INDEX
+            for i in range(len(sent)):
+                token = doc[sent.start + i]
+                tagged_lemma = lemmas[i]
                 lemma = tagged_lemma.lemma
                 tag = tagged_lemma.tag
                 token._.full_lemma = lemma
                 token._.pdt_morph = tag
-                token.lemma_ = self.morpho.rawLemma(lemma)
-                token._.lemma_comments = (lemma.replace(token.lemma_, "")
-                                          .replace("_", " ")
-                                          .replace("^", "")
-                                          .replace("`", "")
-                                          .strip())
-                morph_attrs = self.convert_pdt_tag_to_spacy(tag)
-                token.pos_ = morph_attrs.get('POS', 'X')
-                morph_attrs.pop('POS', None)
-                token.morph = spacy.tokens.MorphAnalysis(doc.vocab, morph_attrs)
-        return doc
+                raw_lemma, lemma_comments = self._convert_lemma(lemma)
+                token.lemma_ = raw_lemma
+                token._.lemma_comments = lemma_comments
+                pos, morph = self._convert_tag(doc, tag)
+                token.pos_ = pos
+                token.set_morph(morph)
+
+    def _convert_lemma(self, lemma):
+        converted = LEMMA_CACHE.get(lemma, None)
+        if converted is not None:
+            LEMMA_CACHE.move_to_end(lemma)
+        else:
+            raw_lemma = self.morpho.rawLemma(lemma)
+            lemma_comments = (lemma.replace(raw_lemma, "")
+                              .replace("_", " ")
+                              .replace("^", "")
+                              .replace("`", "")
+                              .strip())
+            converted = (raw_lemma, lemma_comments)
+            LEMMA_CACHE[lemma] = converted
+            if len(LEMMA_CACHE) > LEMMA_CACHE_SIZE:
+                LEMMA_CACHE.popitem(last=False)
+        return converted
+
+    def _convert_tag(self, doc: Doc, tag):
+        converted = TAG_CACHE.get(tag, None)
+        if converted is None:
+            morph_attrs = self.convert_pdt_tag_to_spacy(tag)
+            pos = morph_attrs.get('POS', 'X')
+            morph_attrs.pop('POS', None)
+            converted = (pos, morph_attrs, doc.vocab.morphology.add(morph_attrs))
+            TAG_CACHE[tag] = converted
+        return converted[0], converted[2]
 
 
 @Language.factory(MORPHODITA_COMPONENT_FACTORY_NAME, default_config={"tagger_path": None})
@@ -0,0 +1,58 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ParagraphCache:
+    """
+        LRU cache of analyzed paragraphs. Paragraphs are identified by hash of their text and version of NLP pipeline,
+        so any paragraph that was analyzed once in this session, does not need to go through pipeline again.
+        Cached values are shared, so they must never be modified. Use Doc.from_docs to create copy of cached document.
+    """
+
+    def __init__(self, max_size: int, pipeline_version: str):
+        """
+        Constructor for paragraph cache
+        :param max_size Maximal number of cached paragraphs
+        :param pipeline_version Version of NLP pipeline. Paragraphs analyzed by other pipeline are never returned
+        """
+        self.max_size = max_size
+        self.pipeline_version = pipeline_version
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, text: str):
+        """Compute cache key for paragraph text"""
+        return hashlib.blake2b(f"{self.pipeline_version}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key):
+        """Return cached value for paragraph key or None"""
+        with self._lock:
+            value = self._values.get(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self._values.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store analyzed paragraph. Least recently used paragraphs are removed when cache is full"""
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached paragraphs"""
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
@@ -0,0 +1,162 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from src.const.paths import PROFILE_LOG_FILE_PATH, PROFILE_CAPTURES_DIR
+from src.const.values import PROFILE_HISTORY_SIZE, PROFILE_LOG_MAX_BYTES, PROFILE_LOG_BACKUP_COUNT
+from src.domain.analysis_profile import AnalysisProfile, StageTiming
+
+# PYINSTRUMENT IS OPTIONAL. WITHOUT IT ONLY CPROFILE CAPTURES ARE AVAILABLE
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+CAPTURE_CPROFILE = "cprofile"
+CAPTURE_PYINSTRUMENT = "pyinstrument"
+
+
+class Profiler:
+    """
+        Opt-in instrumentation of analysis pipeline. When enabled, every analysis run records wall time, processed
+        tokens and allocated memory blocks of its stages. Profile of running analysis is bound to current thread, so
+        services record their stages without passing profile around. When profiler is disabled, stages cost only
+        one attribute lookup. Finished profiles are kept for debug panel and appended to rolling log file.
+    """
+
+    @staticmethod
+    def begin(revision: int):
+        """Start profile of analysis run in current thread. Returns None if profiler is disabled"""
+        if not Profiler.enabled:
+            return None
+        profile = AnalysisProfile(revision)
+        Profiler._local.profile = profile
+        Profiler._local.capture = None
+        capture_format = Profiler.requested_capture
+        if capture_format is not None:
+            Profiler.requested_capture = None
+            Profiler._local.capture = Profiler._start_capture(capture_format)
+        return profile
+
+    @staticmethod
+    def end():
+        """Stop profile of current thread and return it"""
+        profile = Profiler.current()
+        Profiler._local.profile = None
+        capture = getattr(Profiler._local, "capture", None)
+        Profiler._local.capture = None
+        if profile is not None and capture is not None:
+            profile.capture_path = Profiler._stop_capture(capture, profile)
+        return profile
+
+    @staticmethod
+    def current():
+        """Profile of analysis running in current thread or None"""
+        return getattr(Profiler._local, "profile", None)
+
+    @staticmethod
+    @contextmanager
+    def stage(name: str, tokens=None, profile: AnalysisProfile = None):
+        """
+        Measure block of code as stage of profile. Profile of current thread is used, if profile is not given.
+        Does nothing if there is no profile
+        """
+        if profile is None:
+            profile = Profiler.current()
+        if profile is None:
+            yield None
+            return
+        timing = StageTiming(name, 0, tokens)
+        # STAGES ARE STORED IN ORDER OF THEIR START, SO NESTED STAGES FOLLOW THEIR PARENT
+        profile.stages.append(timing)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.duration = time.perf_counter() - start
+            timing.allocated_blocks = sys.getallocatedblocks() - blocks
+
+    @staticmethod
+    def record(name: str, duration: float, tokens=None, profile: AnalysisProfile = None):
+        """Add stage measured by other means"""
+        if profile is None:
+            profile = Profiler.current()
+        if profile is not None:
+            profile.stages.append(StageTiming(name, duration, tokens))
+
+    @staticmethod
+    def finish(profile: AnalysisProfile):
+        """Store finished profile to history and log file"""
+        if profile is None:
+            return
+        with Profiler._lock:
+            Profiler.history.appendleft(profile)
+            # noinspection PyBroadException
+            try:
+                Profiler._get_logger().info(json.dumps(profile.to_dict()))
+            except Exception as e:
+                print(e)
+
+    @staticmethod
+    def request_capture(capture_format=CAPTURE_CPROFILE):
+        """Capture whole next analysis run by cProfile or pyinstrument"""
+        if capture_format == CAPTURE_PYINSTRUMENT and pyinstrument is None:
+            raise ValueError("pyinstrument is not installed")
+        Profiler.requested_capture = capture_format
+
+    @staticmethod
+    def _start_capture(capture_format):
+        if capture_format == CAPTURE_PYINSTRUMENT:
+            capture = pyinstrument.Profiler(async_mode="disabled")
+            capture.start()
+        else:
+            capture = cProfile.Profile()
+            capture.enable()
+        return capture
+
+    @staticmethod
+    def _stop_capture(capture, profile: AnalysisProfile):
+        os.makedirs(PROFILE_CAPTURES_DIR, exist_ok=True)
+        file_name = f"analysis-{profile.started_at.strftime('%Y%m%d-%H%M%S')}-{profile.revision}"
+        if pyinstrument is not None and isinstance(capture, pyinstrument.Profiler):
+            capture.stop()
+            path = os.path.join(PROFILE_CAPTURES_DIR, f"{file_name}.html")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(capture.output_html())
+        else:
+            capture.disable()
+            path = os.path.join(PROFILE_CAPTURES_DIR, f"{file_name}.prof")
+            capture.dump_stats(path)
+        return path
+
+    @staticmethod
+    def _get_logger():
+        if Profiler._logger is None:
+            os.makedirs(os.path.dirname(PROFILE_LOG_FILE_PATH), exist_ok=True)
+            handler = RotatingFileHandler(PROFILE_LOG_FILE_PATH, maxBytes=PROFILE_LOG_MAX_BYTES,
+                                          backupCount=PROFILE_LOG_BACKUP_COUNT, encoding='utf-8')
+            logger = logging.getLogger("hector.profile")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            Profiler._logger = logger
+        return Profiler._logger
+
+
+# PROFILER IS DISABLED BY DEFAULT
+Profiler.enabled = False
+# FORMAT OF CAPTURE REQUESTED FOR NEXT ANALYSIS RUN
+Profiler.requested_capture = None
+# FINISHED PROFILES, NEWEST FIRST
+Profiler.history = deque(maxlen=PROFILE_HISTORY_SIZE)
+Profiler._local = threading.local()
+Profiler._lock = threading.Lock()
+Profiler._logger = None
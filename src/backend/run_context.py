@@ -10,10 +10,14 @@ class RunContext(object):
             self = cls.instance
             # SPACY NLP INSTANCE
             self.nlp = None
+            # POOL OF PROCESSES WITH SPACY NLP INSTANCES. PROCESSES ARE STARTED BY FIRST LONG TEXT
+            self.nlp_pool = None
             # THESAURUS INSTANCE
             self.thesaurus = None
             # HUNSPELL DICTIONARY INSTANCE
             self.spellcheck_dictionary = None
+            # LOADER OF RESOURCES, THAT ARE LOADED IN BACKGROUND. NONE IF ALL RESOURCES ARE LOADED BEFORE USE
+            self.startup = None
             # UPDATE CHECK RESULT
             self.has_available_update = None
             # CURRENT PROJECT
@@ -0,0 +1,71 @@
+from src.backend.profiler import Profiler
+from src.backend.service.nlp_service import NlpService
+from src.backend.service.spellcheck_service import SpellcheckService
+from src.const.values import NLP_BATCH_SIZE
+from src.domain.analysis import AnalysisRequest, AnalysisResult
+from src.domain.config import Config
+
+
+class AnalysisService:
+    """Service that runs whole analysis of text. Does not touch GUI, so it is safe to run it in background thread"""
+
+    @staticmethod
+    def analyze(request: AnalysisRequest, nlp, spellcheck_dictionary, nlp_pool=None) -> AnalysisResult:
+        """Run NLP analysis, spellcheck, close words evaluation and typography checks for given request"""
+        Profiler.begin(request.revision)
+        try:
+            result = AnalysisService._analyze(request, nlp, spellcheck_dictionary, nlp_pool)
+        finally:
+            profile = Profiler.end()
+        result.profile = profile
+        return result
+
+    @staticmethod
+    def _analyze(request: AnalysisRequest, nlp, spellcheck_dictionary, nlp_pool=None) -> AnalysisResult:
+        text = request.text
+        config = request.config
+        previous_doc = request.previous_doc
+        full_analysis = True
+        if (not request.force_full_analysis and previous_doc is not None
+                and AnalysisService.can_use_partial_analysis(text, previous_doc.text, config)):
+            # PARTIAL NLP
+            with Profiler.stage("nlp"):
+                doc = NlpService.partial_analysis(text, previous_doc, nlp, config)
+            full_analysis = False
+        else:
+            # FULL NLP
+            with Profiler.stage("nlp"):
+                doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config, nlp_pool, previous_doc)
+        spellcheck_timings = {}
+        if config.analysis_settings.enable_spellcheck and spellcheck_dictionary is not None:
+            with Profiler.stage("spellcheck", len(doc)):
+                spellcheck_timings = SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+            for rule_id, duration in spellcheck_timings.items():
+                Profiler.record(f"spellcheck.{rule_id}", duration)
+        close_words = {}
+        if config.analysis_settings.enable_close_words:
+            with Profiler.stage("close_words", doc._.total_words):
+                close_words = AnalysisService.compute_close_words(doc, config)
+        with Profiler.stage("typography"):
+            typography_issues = NlpService.find_typography_issues(doc)
+        return AnalysisResult(request.revision, text, doc, config, full_analysis, close_words, spellcheck_timings,
+                              typography_issues)
+
+    @staticmethod
+    def can_use_partial_analysis(text: str, previous_text: str, config: Config):
+        """Partial analysis is used only for small changes in longer texts"""
+        return (config.analysis_settings.enable_partial_nlp and len(text) > 100
+                and abs(len(previous_text) - len(text)) < 20)
+
+    @staticmethod
+    def compute_close_words(doc, config: Config):
+        """Evaluate close words and split their occourences into repetition groups"""
+        close_words = {}
+        raw_close_words = NlpService.evaluate_close_words(doc, config)
+        for word in raw_close_words:
+            word_partitions = NlpService.partition_close_words(
+                raw_close_words[word],
+                config.analysis_settings.close_words_min_distance_between_words
+            )
+            close_words[word] = {"total": len(raw_close_words[word]), "repetition_groups": word_partitions}
+        return close_words
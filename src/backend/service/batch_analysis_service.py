@@ -0,0 +1,185 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.backend.profiler import Profiler
+from src.backend.service.analysis_service import AnalysisService
+from src.backend.service.config_service import ConfigService
+from src.backend.service.import_service import ImportService
+from src.backend.service.nlp_service import NlpService
+from src.backend.service.project_service import ProjectService
+from src.backend.service.spellcheck_service import SpellcheckService
+from src.const.values import BATCH_ANALYSIS_EXTENSIONS, PROJECT_FILE_EXTENSION, BATCH_REPORT_FORMAT_CSV
+from src.domain.analysis import AnalysisRequest
+from src.domain.batch_analysis import BatchSource, BatchReport
+from src.domain.config import Config
+from src.domain.project import ProjectItemType
+
+# NLP INSTANCE AND SPELLCHECK DICTIONARY OF BATCH WORKER PROCESS
+_worker_nlp = None
+_worker_spellcheck_dictionary = None
+
+
+def _initialize_batch_worker():
+    """Load NLP pipeline and dictionaries once per batch worker process"""
+    global _worker_nlp, _worker_spellcheck_dictionary
+    _worker_nlp = NlpService.initialize()
+    _worker_spellcheck_dictionary = SpellcheckService.initialize()["spellcheck"]
+
+
+def _analyze_in_worker(source: BatchSource):
+    """Analyze single document in batch worker process"""
+    return BatchAnalysisService.analyze_source(source, _worker_nlp, _worker_spellcheck_dictionary)
+
+
+class BatchAnalysisService:
+    """Service for headless analysis of multiple documents and projects. Does not touch GUI"""
+
+    @staticmethod
+    def collect_sources(paths, config: Config):
+        """
+        Collect documents from given paths. Paths can point to documents, projects or directories.
+        Directories are searched recursively. Documents of projects use config selected by project.
+        """
+        sources = []
+        for path in paths:
+            if os.path.isdir(path):
+                for dir_path, dir_names, file_names in os.walk(path):
+                    dir_names.sort()
+                    for file_name in sorted(file_names):
+                        file_path = os.path.join(dir_path, file_name)
+                        if BatchAnalysisService.is_supported(file_path):
+                            sources.extend(BatchAnalysisService._collect_file(file_path, config))
+            elif os.path.isfile(path) and BatchAnalysisService.is_supported(path):
+                sources.extend(BatchAnalysisService._collect_file(path, config))
+            else:
+                raise ValueError(f"Unsupported path: {path}")
+        return sources
+
+    @staticmethod
+    def is_supported(path):
+        """Check if file can be analyzed by batch analysis"""
+        extension = os.path.splitext(path)[1].lower()
+        return extension in BATCH_ANALYSIS_EXTENSIONS or extension == PROJECT_FILE_EXTENSION
+
+    @staticmethod
+    def _collect_file(path, config: Config):
+        if os.path.splitext(path)[1].lower() != PROJECT_FILE_EXTENSION:
+            return [BatchSource(os.path.basename(path), path, config)]
+        project = ProjectService.load(path)
+        sources = []
+        items = [(item, item.name) for item in reversed(project.items)]
+        # DEPTH FIRST, SO DOCUMENTS ARE IN SAME ORDER AS IN PROJECT TREE
+        while len(items) > 0:
+            item, name = items.pop()
+            if item.type == ProjectItemType.DIRECTORY:
+                items.extend((subitem, f"{name}/{subitem.name}") for subitem in reversed(item.subitems))
+            elif item.type == ProjectItemType.HTEXT:
+                sources.append(BatchSource(f"{project.name}/{name}",
+                                           ProjectService.get_item_file_path(project, item),
+                                           ConfigService.select_config(config, project, item),
+                                           path))
+        return sources
+
+    @staticmethod
+    def load_text(source: BatchSource):
+        """Load text of document"""
+        if source.project_path is not None:
+            htext_file = ProjectService.read_htext_file(source.path)
+            if htext_file is None:
+                raise FileNotFoundError(source.path)
+            return htext_file.raw_text
+        return ImportService.import_document(source.path)
+
+    @staticmethod
+    def analyze_source(source: BatchSource, nlp, spellcheck_dictionary) -> BatchReport:
+        """Analyze single document. Errors are stored in report, so one broken document does not stop batch"""
+        report = BatchReport(source)
+        start = time.perf_counter()
+        # noinspection PyBroadException
+        try:
+            text = BatchAnalysisService.load_text(source)
+            BatchAnalysisService.fill_report(report, text, source.config, nlp, spellcheck_dictionary)
+        except Exception as e:
+            report.error = f"{type(e).__name__}: {e}"
+        report.duration = round(time.perf_counter() - start, 3)
+        return report
+
+    @staticmethod
+    def fill_report(report: BatchReport, text: str, config: Config, nlp, spellcheck_dictionary):
+        """Run analysis of text and store its results to report"""
+        request = AnalysisRequest(0, text, None, config, force_full_analysis=True)
+        result = AnalysisService.analyze(request, nlp, spellcheck_dictionary)
+        Profiler.finish(result.profile)
+        doc = result.doc
+        report.characters = doc._.total_chars
+        report.words = doc._.total_words
+        report.unique_words = doc._.total_unique_words
+        report.pages = doc._.total_pages
+        report.readability = NlpService.compute_readability(doc)
+        if config.analysis_settings.enable_long_sentences:
+            for sentence in doc.sents:
+                if sentence._.is_long_sentence:
+                    report.long_sentences += 1
+                elif sentence._.is_mid_sentence:
+                    report.mid_sentences += 1
+        if config.analysis_settings.enable_spellcheck and spellcheck_dictionary is not None:
+            report.grammar_errors = BatchAnalysisService.grammar_errors_to_list(doc)
+        report.typography_issues = [
+            {"text": issue.text, "type": issue.issue_type, "start": issue.start, "end": issue.end}
+            for issue in result.typography_issues if NlpService.is_typography_issue_enabled(issue, config)
+        ]
+        report.close_words = {word: data["total"] for word, data in result.close_words.items()}
+        return report
+
+    @staticmethod
+    def grammar_errors_to_list(doc):
+        """Export grammar errors found by spellcheck as list of dictionaries"""
+        return [
+            {"text": word.text, "type": word._.grammar_error_type, "start": word.idx, "end": word.idx + len(word.text)}
+            for word in doc._.words if word._.has_grammar_error
+        ]
+
+    @staticmethod
+    def analyze_sources(sources, nlp, spellcheck_dictionary, workers=1):
+        """
+        Analyze documents and yield their reports as soon as they are ready.
+        With more than one worker, documents are analyzed in pool of processes, each with its own NLP pipeline,
+        and reports are yielded in order of completion.
+        """
+        if workers <= 1 or len(sources) <= 1:
+            for source in sources:
+                yield BatchAnalysisService.analyze_source(source, nlp, spellcheck_dictionary)
+            return
+        # SPAWN IS USED ON ALL PLATFORMS, SAME AS NLP POOL
+        with ProcessPoolExecutor(max_workers=min(workers, len(sources)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_initialize_batch_worker) as pool:
+            futures = [pool.submit(_analyze_in_worker, source) for source in sources]
+            for future in as_completed(futures):
+                yield future.result()
+
+    @staticmethod
+    def write_reports(reports, output, report_format):
+        """
+        Write reports to output stream. Every report is written and flushed as soon as it is available.
+        JSON reports are written as JSON lines, one document per line.
+        CSV reports contain one row per document with counts of found errors.
+        """
+        writer = None
+        if report_format == BATCH_REPORT_FORMAT_CSV:
+            writer = csv.writer(output)
+            writer.writerow(BatchReport.CSV_COLUMNS)
+        count = 0
+        for report in reports:
+            if writer is not None:
+                writer.writerow(report.to_csv_row())
+            else:
+                output.write(json.dumps(report.to_dict(), ensure_ascii=False))
+                output.write("\n")
+            output.flush()
+            count += 1
+        return count
@@ -0,0 +1,248 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.const.values import DOWNLOAD_WORKERS, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_ATTEMPTS, DOWNLOAD_TIMEOUT, \
+    DOWNLOAD_PART_SUFFIX, DOWNLOAD_VALIDATOR_SUFFIX, MIRROR_CHECKSUMS_FILE_NAME
+from src.domain.download import Download
+
+
+class DownloadError(Exception):
+    """Raised when file can not be downloaded, or downloaded file is not valid"""
+
+
+class DownloadService:
+    """
+        Service for downloading models and dictionaries. Files are streamed to disk in chunks and several files are
+        downloaded concurrently. Interrupted downloads are resumed. File appears on its path only after it is verified,
+        so incomplete file is never used. If mirror directory is set, files are copied from it instead of downloading.
+    """
+
+    @staticmethod
+    def download_all(downloads, workers=DOWNLOAD_WORKERS):
+        """Download files concurrently. Raises error of first failed download, after all downloads are finished"""
+        if len(downloads) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(workers, len(downloads)),
+                                thread_name_prefix="hector-download") as executor:
+            futures = [executor.submit(DownloadService.download, download) for download in downloads]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if len(errors) > 0:
+            raise errors[0]
+
+    @staticmethod
+    def download(download: Download):
+        """Download single file. Raises DownloadError if file can not be downloaded or its checksum does not match"""
+        checksum = DownloadService._get_checksum(download)
+        if os.path.isfile(download.path):
+            # FILE WAS DOWNLOADED BEFORE, BUT IT WAS NOT PROCESSED. E.G. EXTRACTION OF ARCHIVE WAS INTERRUPTED
+            if checksum is None or DownloadService.compute_checksum(download.path) == checksum:
+                return
+            # CORRUPTED FILE, OR FILE OF ANOTHER VERSION IS DOWNLOADED AGAIN
+            os.remove(download.path)
+        part_path = download.path + DOWNLOAD_PART_SUFFIX
+        mirror_path = DownloadService._get_mirror_path(download.file_name)
+        if mirror_path is not None:
+            shutil.copyfile(mirror_path, part_path)
+        else:
+            error = None
+            for _ in range(DOWNLOAD_ATTEMPTS):
+                try:
+                    DownloadService._fetch(download, part_path)
+                    error = None
+                    break
+                except (requests.RequestException, DownloadError) as e:
+                    error = e
+            if error is not None:
+                raise DownloadError(f"Unable to download {download.url}: {error}")
+        if checksum is not None and DownloadService.compute_checksum(part_path) != checksum:
+            DownloadService._remove_part(part_path)
+            raise DownloadError(f"Checksum of {download.file_name} does not match")
+        os.replace(part_path, download.path)
+        DownloadService._remove_part(part_path)
+
+    @staticmethod
+    def _get_checksum(download: Download):
+        """
+        Get expected checksum of file. Pinned checksum is preferred, then checksum from mirror directory, so offline
+        installs do not need network, and then published checksums file. Returns None if checksum is not known
+        """
+        checksum = download.sha256 or DownloadService._get_mirror_checksum(download.file_name)
+        if checksum is None and download.checksums_url is not None:
+            checksum = DownloadService._fetch_checksum(download)
+        return checksum.lower() if checksum is not None else None
+
+    @staticmethod
+    def _fetch_checksum(download: Download):
+        """Get checksum of file from published checksums file. Raises DownloadError if checksum is not published"""
+        error = None
+        for _ in range(DOWNLOAD_ATTEMPTS):
+            try:
+                response = requests.get(download.checksums_url, headers=download.headers, timeout=DOWNLOAD_TIMEOUT)
+                response.raise_for_status()
+                checksums = DownloadService._parse_checksums(response.text.splitlines())
+                if download.file_name not in checksums:
+                    raise DownloadError(f"Checksum of {download.file_name} is not published")
+                return checksums[download.file_name]
+            except requests.RequestException as e:
+                error = e
+        raise DownloadError(f"Unable to download {download.checksums_url}: {error}")
+
+    @staticmethod
+    def _fetch(download: Download, part_path: str):
+        """
+        Download file to part file. Data already present in part file are not downloaded again, but only if file on
+        server did not change since part file was started. Otherwise, whole file is downloaded again
+        """
+        # COMPRESSED RESPONSE WOULD NOT MATCH RANGES AND CONTENT LENGTH OF FILE
+        headers = {**download.headers, "Accept-Encoding": "identity"}
+        validator_path = part_path + DOWNLOAD_VALIDATOR_SUFFIX
+        offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        validator = DownloadService._load_validator(validator_path) if offset > 0 else None
+        if validator is not None:
+            # SERVER SENDS REST OF FILE ONLY IF VALIDATOR STILL MATCHES, OTHERWISE IT SENDS WHOLE NEW FILE
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        else:
+            # WITHOUT VALIDATOR WE CAN NOT TELL WHETHER PART FILE BELONGS TO CURRENT VERSION OF FILE
+            offset = 0
+        with requests.get(download.url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 416:
+                # PART FILE DOES NOT MATCH FILE ON SERVER ANYMORE. NEXT ATTEMPT STARTS FROM BEGINNING
+                DownloadService._remove_part(part_path)
+                raise DownloadError("Partial download can not be resumed")
+            response.raise_for_status()
+            if response.status_code != 206:
+                # FILE CHANGED ON SERVER, OR SERVER DOES NOT SUPPORT RANGES. SERVER SENDS WHOLE FILE
+                offset = 0
+                DownloadService._save_validator(validator_path, response.headers)
+            elif not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                DownloadService._remove_part(part_path)
+                raise DownloadError("Server sent unexpected range")
+            expected_size = None
+            if "Content-Length" in response.headers:
+                expected_size = offset + int(response.headers["Content-Length"])
+            with open(part_path, 'ab' if offset > 0 else 'wb') as file:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    file.write(chunk)
+        if expected_size is not None and os.path.getsize(part_path) != expected_size:
+            raise DownloadError("Download is incomplete")
+
+    @staticmethod
+    def _load_validator(validator_path: str):
+        if not os.path.isfile(validator_path):
+            return None
+        with open(validator_path, 'r', encoding='utf-8') as file:
+            return file.read().strip() or None
+
+    @staticmethod
+    def _save_validator(validator_path: str, response_headers):
+        """Save ETag or Last-Modified of downloaded file, so its download can be resumed later"""
+        etag = response_headers.get("ETag")
+        # WEAK ETAG CAN NOT BE USED IN IF-RANGE HEADER
+        validator = etag if etag is not None and not etag.startswith("W/") else response_headers.get("Last-Modified")
+        if validator is None:
+            if os.path.isfile(validator_path):
+                os.remove(validator_path)
+            return
+        with open(validator_path, 'w', encoding='utf-8') as file:
+            file.write(validator)
+
+    @staticmethod
+    def _remove_part(part_path: str):
+        """Remove part file together with its validator"""
+        for path in [part_path, part_path + DOWNLOAD_VALIDATOR_SUFFIX]:
+            if os.path.isfile(path):
+                os.remove(path)
+
+    @staticmethod
+    def extract(archive_path: str, target_dir: str, directory_name: str):
+        """
+        Extract directory from zip or tar archive to target directory and remove archive. Archive is extracted to
+        temporary directory first, so extracted directory appears in target directory only if extraction succeeds
+        """
+        tmp_dir = tempfile.mkdtemp(prefix=".", dir=target_dir)
+        try:
+            if zipfile.is_zipfile(archive_path):
+                with zipfile.ZipFile(archive_path, 'r') as zip_file:
+                    zip_file.extractall(tmp_dir)
+            else:
+                with tarfile.open(archive_path) as tar_file:
+                    tar_file.extractall(tmp_dir)
+            os.replace(os.path.join(tmp_dir, directory_name), os.path.join(target_dir, directory_name))
+        except Exception:
+            # BROKEN ARCHIVE IS REMOVED, SO IT IS DOWNLOADED AGAIN NEXT TIME
+            os.remove(archive_path)
+            raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.remove(archive_path)
+
+    @staticmethod
+    def create_mirror(downloads, mirror_dir: str):
+        """Download files to mirror directory and write their checksums, so it can be used for offline installs"""
+        os.makedirs(mirror_dir, exist_ok=True)
+        DownloadService.download_all([
+            Download(d.url, os.path.join(mirror_dir, d.file_name), d.sha256, d.headers, d.checksums_url)
+            for d in downloads
+        ])
+        checksums = DownloadService._load_mirror_checksums(mirror_dir)
+        for download in downloads:
+            checksums[download.file_name] = DownloadService.compute_checksum(
+                os.path.join(mirror_dir, download.file_name)
+            )
+        with open(os.path.join(mirror_dir, MIRROR_CHECKSUMS_FILE_NAME), 'w', encoding='utf-8') as file:
+            for file_name, checksum in sorted(checksums.items()):
+                file.write(f"{checksum}  {file_name}\n")
+
+    @staticmethod
+    def compute_checksum(path: str):
+        """Get SHA-256 checksum of file"""
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    @staticmethod
+    def _get_mirror_path(file_name: str):
+        if DownloadService.mirror_dir is None:
+            return None
+        path = os.path.join(DownloadService.mirror_dir, file_name)
+        return path if os.path.isfile(path) else None
+
+    @staticmethod
+    def _get_mirror_checksum(file_name: str):
+        if DownloadService.mirror_dir is None:
+            return None
+        return DownloadService._load_mirror_checksums(DownloadService.mirror_dir).get(file_name)
+
+    @staticmethod
+    def _load_mirror_checksums(mirror_dir: str):
+        """Load checksums file of mirror. Returns dictionary of file name to checksum"""
+        path = os.path.join(mirror_dir, MIRROR_CHECKSUMS_FILE_NAME)
+        if not os.path.isfile(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as file:
+            return DownloadService._parse_checksums(file)
+
+    @staticmethod
+    def _parse_checksums(lines):
+        """Parse lines in format of sha256sum output. Returns dictionary of file name to checksum"""
+        checksums = {}
+        for line in lines:
+            parts = line.strip().split(maxsplit=1)
+            if len(parts) == 2:
+                # BINARY MODE OF sha256sum MARKS FILE NAME WITH ASTERISK
+                checksums[parts[1].lstrip("*")] = parts[0].lower()
+        return checksums
+
+
+# DIRECTORY WITH PREVIOUSLY DOWNLOADED FILES USED INSTEAD OF NETWORK. NONE MEANS FILES ARE DOWNLOADED
+DownloadService.mirror_dir = None
@@ -5,6 +5,7 @@ import zipfile
 import xml.etree.ElementTree as ET
 import shutil
 
+from src.backend.service.import_service import ImportService
 from src.utils import Utils
 
 
@@ -78,6 +79,7 @@ class ExportService:
             raise ValueError(f"Unsupported output format: {ext}. Supported formats: {allowed_formats}")
 
         # Convert HTML to target format and save to file_path.
+        ImportService.ensure_pandoc_available()
         pypandoc.convert_text(
             html,
             to=ext,
@@ -1,6 +1,10 @@
+import io
 import os
+import platform
 import re
-import sys
+import subprocess
+import tempfile
+import threading
 
 import pypandoc
 
@@ -18,38 +22,104 @@ class ImportService:
         return corrected_text
 
     @staticmethod
-    def import_document(file_path):
-        """Import document to hector"""
+    def import_document(file_path, on_paragraph=None):
+        """
+        Import document to hector. Document is streamed line by line, so whole text is kept in memory only once.
+        :param file_path Path of imported document
+        :param on_paragraph Optional callable called with every paragraph as soon as it is imported
+        """
+        buffer = io.StringIO()
+        for paragraph in ImportService.iter_document_paragraphs(file_path):
+            buffer.write(paragraph)
+            if on_paragraph is not None:
+                on_paragraph(paragraph)
+        if not file_path.endswith(".txt") and buffer.tell() > 0:
+            # LINES OF CONVERTED DOCUMENT ARE JOINED BY LINE END, SO TEXT DOES NOT END WITH ONE
+            buffer.truncate(buffer.tell() - 1)
+        return buffer.getvalue()
+
+    @staticmethod
+    def iter_document_paragraphs(file_path):
+        """
+        Iterate paragraphs of document. Paragraphs keep their trailing newlines, same as paragraphs produced by
+        NlpService.split_to_paragraphs, so analysis of imported paragraphs can be reused for whole text
+        """
         if file_path.endswith(".txt"):
             with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        extra_args = (
+                yield from ImportService._group_paragraphs(file)
+        else:
+            yield from ImportService._group_paragraphs(ImportService._iter_pandoc_lines(file_path))
+
+    @staticmethod
+    def _group_paragraphs(lines):
+        """Group lines to paragraphs. New paragraph starts with every line that does not start with whitespace"""
+        paragraph = []
+        for line in lines:
+            if len(paragraph) > 0 and not line[0].isspace():
+                yield "".join(paragraph)
+                paragraph = []
+            paragraph.append(line)
+        if len(paragraph) > 0:
+            yield "".join(paragraph)
+
+    @staticmethod
+    def _iter_pandoc_lines(file_path):
+        """
+        Convert document to plain text using pandoc and iterate its non-empty lines with LF line ends.
+        Output of pandoc is read while pandoc is still running. Raises RuntimeError if conversion fails
+        """
+        ImportService.ensure_pandoc_available()
+        args = [
+            pypandoc.get_pandoc_path(),
+            file_path,
+            '--to=plain',
             '--wrap=none',
             f'--lua-filter={Utils.resource_path(os.path.join("data_files", "fix_odt_blockquotes.lua"))}'
-        )
-        text = pypandoc.convert_file(file_path, 'plain', extra_args=extra_args)
-        return ImportService.normalize_text(os.linesep.join([s for s in text.splitlines() if s]))
+        ]
+        # DO NOT SHOW CONSOLE WINDOW OF PANDOC ON WINDOWS
+        creation_flags = 0x08000000 if platform.system() == "Windows" else 0
+        # STDERR GOES TO FILE, SO PANDOC CAN NOT BLOCK ON FULL PIPE WHILE WE READ ITS OUTPUT
+        with tempfile.TemporaryFile() as stderr, subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr,
+                                                                  creationflags=creation_flags) as process:
+            finished = False
+            try:
+                # UNIVERSAL NEWLINES MODE TRANSLATES CRLF LINE ENDS
+                for line in io.TextIOWrapper(process.stdout, encoding='utf-8'):
+                    # SPLITLINES ALSO SPLITS ON OTHER LINE BOUNDARIES, E.G. FORM FEED
+                    for part in line.splitlines():
+                        if part:
+                            yield part + "\n"
+                finished = True
+            finally:
+                if not finished:
+                    # CONSUMER STOPPED READING BEFORE PANDOC FINISHED
+                    process.kill()
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"Pandoc died with exitcode \"{process.returncode}\" during conversion: "
+                    f"{stderr.read().decode('utf-8', errors='replace')}"
+                )
 
     @staticmethod
     def ensure_pandoc_available():
-        """Download pandoc if not already installed"""
-
-    try:
-        # Check whether it is already installed
-        pypandoc.get_pandoc_version()
-    except OSError:
-        # Pandoc not installed. Let's download it silently.
-        with open(os.devnull, 'w') as devnull:
-            sys.stdout = devnull
-            pypandoc.download_pandoc()
-            sys.stdout = sys.__stdout__
-
-        # Hack to delete the downloaded file from the folder,
-        # otherwise it could get accidently committed to the repo
-        # by other scripts in the repo.
-        pf = sys.platform
-        if pf.startswith('linux'):
-            pf = 'linux'
-        url = pypandoc.pandoc_download._get_pandoc_urls()[0][pf]
-        filename = url.split('/')[-1]
-        os.remove(filename)
+        """
+        Download pandoc if not already installed. Result is cached, so only first call checks pandoc installation.
+        Raises OSError if pandoc can not be downloaded
+        """
+        with ImportService._pandoc_lock:
+            if ImportService._pandoc_available:
+                return
+            try:
+                # CHECK WHETHER PANDOC IS ALREADY INSTALLED
+                pypandoc.get_pandoc_version()
+            except OSError:
+                # PANDOC IS NOT INSTALLED. INSTALLER IS DELETED, SO IT IS NOT LEFT IN WORKING DIRECTORY
+                pypandoc.download_pandoc(delete_installer=True)
+                pypandoc.get_pandoc_version()
+            ImportService._pandoc_available = True
+
+
+# PANDOC IS CHECKED ON FIRST USE, NOT ON IMPORT, BECAUSE CHECK STARTS SUBPROCESS AND MAY DOWNLOAD PANDOC
+ImportService._pandoc_available = False
+ImportService._pandoc_lock = threading.Lock()
@@ -1,29 +1,67 @@
+import multiprocessing
 import os
 import re
 import shutil
-import tarfile
-import urllib
-import zipfile
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
 import spacy
 from spacy.lang.char_classes import LIST_ELLIPSES, LIST_ICONS, ALPHA_LOWER, ALPHA_UPPER, CONCAT_QUOTES, ALPHA
 from spacy.tokenizer import Tokenizer
 from spacy.tokens import Doc, Span, Token
 from spacy.util import compile_infix_regex
+from spacy.vocab import Vocab
 
+from src.backend.document_stats import DocumentStats, ParagraphStats, is_word, SENTENCE_LENGTH_MID, \
+    SENTENCE_LENGTH_LONG, SENTENCE_LENGTH_NORMAL
 from src.backend.morphodita_tagger_morphologizer_lemmatizer import MORPHODITA_COMPONENT_FACTORY_NAME, \
     MORPHODITA_RESET_SENTENCES_COMPONENT
+from src.backend.paragraph_cache import ParagraphCache
+from src.backend.service.download_service import DownloadService
+from src.backend.profiler import Profiler
+from src.backend.typography_scanner import TypographyScanner
 from src.const.paths import DATA_DIRECTORY, SPACY_MODELS_DIR, SK_SPACY_MODEL_DIR, CURRENT_SK_SPACY_MODEL_DIR, \
-    MORPHODITA_MODELS_DIR, SK_MORPHODITA_MODEL_DIR, SK_MORPHODITA_TAGGER
+    MORPHODITA_MODELS_DIR, SK_MORPHODITA_MODEL_DIR, SK_MORPHODITA_TAGGER, NLP_SNAPSHOTS_DIR
 from src.const.patterns import PATTERN_MULTIPLE_SPACES, PATTERN_COMPUTER_QUOTE_MARKS, PATTERN_DANGLING_QUOTE_MARKS, \
     PATTERN_INCORRECT_LOWER_QUOTE_MARKS, PATTERN_INCORRECT_UPPER_QUOTE_MARKS, PATTERN_MULTIPLE_PUNCTUACTION, \
     PATTERN_TRAILING_SPACES
 from src.const.values import SPACY_MODEL_NAME_WITH_VERSION, SPACY_MODEL_LINK, MORPHODITA_MODEL_LINK, \
-    MORPHODITA_MODEL_NAME, SPACY_MODEL_NAME, READABILITY_MAX_VALUE
+    MORPHODITA_MODEL_NAME, SPACY_MODEL_NAME, READABILITY_MAX_VALUE, NLP_PARALLEL_MIN_TEXT_LENGTH, \
+    NLP_PARALLEL_CHUNKS_PER_PROCESS, NLP_BATCH_SIZE, NLP_PARAGRAPH_CACHE_SIZE, VERSION, TYPOGRAPHY_CACHE_SIZE, \
+    MODEL_CHECKSUMS_LINK, NLP_POOL_MAX_PROCESSES
+from src.const.typography_issue_types import TYPOGRAPHY_MULTIPLE_SPACES, TYPOGRAPHY_MULTIPLE_PUNCTUATION, \
+    TYPOGRAPHY_TRAILING_SPACES
 from src.domain.config import Config
-from src.domain.unique_word import UniqueWord
+from src.domain.download import Download
+from src.domain.typography_issue import TypographyIssue
 from src.utils import Utils
 
+# PARAGRAPH BOUNDARY. TEXT IS SPLIT ONLY AFTER RUN OF NEWLINES FOLLOWED BY NON SPACE CHARACTER,
+# SO TOKENIZATION OF CHUNKS IS SAME AS TOKENIZATION OF WHOLE TEXT
+PARAGRAPH_BOUNDARY_PATTERN = re.compile(r"\n+(?=\S)")
+# PIPELINE AND ITS VOCAB ARE NOT THREAD SAFE. IMPORTED DOCUMENT IS ANALYZED WHILE EDITOR ANALYSIS MAY BE RUNNING
+PIPELINE_LOCK = threading.Lock()
+# NLP INSTANCE OF POOL WORKER PROCESS
+_pool_nlp = None
+
+
+def _initialize_pool_worker():
+    """Load NLP pipeline once per pool worker process"""
+    global _pool_nlp
+    _pool_nlp = NlpService.initialize()
+
+
+def _ping_pool_worker():
+    """Dummy task used to force pool to start and warm up all processes"""
+    return _pool_nlp is not None
+
+
+def _analyze_paragraphs(paragraphs, batch_size):
+    """Run NLP pipeline on group of paragraphs in pool worker process and return serialized documents"""
+    # TENSOR IS NOT USED AFTER PIPELINE FINISHES, SO WE DO NOT SEND IT BACK
+    return [doc.to_bytes(exclude=["tensor"]) for doc in _pool_nlp.pipe(paragraphs, batch_size=batch_size)]
+
 
 class NlpService:
     """Service for Nlp related tasks"""
@@ -43,85 +81,30 @@ class NlpService:
                 os.mkdir(SK_SPACY_MODEL_DIR)
             else:
                 old_model_exists = True
+            model_archive, tagger_archive = NlpService.get_downloads()
+            downloads = []
             if not os.path.isdir(CURRENT_SK_SPACY_MODEL_DIR):
                 # IF WE ARE UPGRADING SPACY MODEL, WE NEED TO REMOVE OLD MODELS
                 if old_model_exists:
                     shutil.rmtree(SK_SPACY_MODEL_DIR)
                     os.mkdir(SK_SPACY_MODEL_DIR)
-                archive_file_name = os.path.join(SPACY_MODELS_DIR, f'{SPACY_MODEL_NAME_WITH_VERSION}.tar.gz')
-                with urllib.request.urlopen(SPACY_MODEL_LINK) as response, open(archive_file_name, 'wb') as out_file:
-                    shutil.copyfileobj(response, out_file)
-                with tarfile.open(archive_file_name) as tar_file:
-                    tar_file.extractall(SK_SPACY_MODEL_DIR)
-                os.remove(archive_file_name)
+                downloads.append(model_archive)
             if not os.path.isdir(MORPHODITA_MODELS_DIR):
                 os.mkdir(MORPHODITA_MODELS_DIR)
             if not os.path.isdir(SK_MORPHODITA_MODEL_DIR):
-                archive_file_name = os.path.join(MORPHODITA_MODELS_DIR, f'{MORPHODITA_MODEL_NAME}.zip')
-                with urllib.request.urlopen(MORPHODITA_MODEL_LINK) as response, open(archive_file_name,
-                                                                                     'wb') as out_file:
-                    shutil.copyfileobj(response, out_file)
-                with zipfile.ZipFile(archive_file_name, 'r') as zip_file:
-                    zip_file.extractall(MORPHODITA_MODELS_DIR)
-                os.remove(archive_file_name)
-            nlp = spacy.load(os.path.join(
-                SK_SPACY_MODEL_DIR,
-                SPACY_MODEL_NAME_WITH_VERSION,
-                SPACY_MODEL_NAME,
-                SPACY_MODEL_NAME_WITH_VERSION)
-            )
-            # CUSTOM TOKENIZER THAT TREATS HYPTHENATED WORDS AS SINGLE TOKEN
-            infixes = (
-                    LIST_ELLIPSES
-                    + LIST_ICONS
-                    + [
-                        r"(?<=[0-9])[+\-\*^](?=[0-9-])",
-                        r"(?<=[{al}{q}])\.(?=[{au}{q}])".format(
-                            al=ALPHA_LOWER, au=ALPHA_UPPER, q=CONCAT_QUOTES
-                        ),
-                        r"(?<=[{a}]),(?=[{a}])".format(a=ALPHA),
-                        # OVERRIDE: r"(?<=[{a}])(?:{h})(?=[{a}])".format(a=ALPHA, h=HYPHENS),
-                        r"(?<=[{a}0-9])[:<>=/](?=[{a}])".format(a=ALPHA),
-                    ]
-            )
-            infix_re = compile_infix_regex(infixes)
-            nlp.tokenizer = HectorTokenizer(Tokenizer(nlp.vocab, prefix_search=nlp.tokenizer.prefix_search,
-                                                      suffix_search=nlp.tokenizer.suffix_search,
-                                                      infix_finditer=infix_re.finditer,
-                                                      token_match=nlp.tokenizer.token_match,
-                                                      rules=nlp.Defaults.tokenizer_exceptions))
-            # ADD SENTENCIZER SO MORPHODITA CAN WORK ON AT LEAST SOME SENTENCES
-            nlp.add_pipe('sentencizer', after='trainable_lemmatizer')
-            # ADD CUSTOM COMPONENT FOR MORPHODITA
-            nlp.add_pipe(
-                MORPHODITA_COMPONENT_FACTORY_NAME,
-                name='morphodita_tagger_morphologizer_lemmatizer',
-                after='sentencizer',
-                config={"tagger_path": SK_MORPHODITA_TAGGER}
-            )
-            # ADD CUSTOM COMPONENT THAT RESETS SENTENCE BOUNDARIES SO DEPENDENCY ANALYZER WILL WORK
-            nlp.add_pipe(MORPHODITA_RESET_SENTENCES_COMPONENT, after='morphodita_tagger_morphologizer_lemmatizer')
-            # REMOVE UNUSED PIPES REPLACED BY MORPHODITA
-            nlp.remove_pipe('tagger')
-            nlp.remove_pipe('morphologizer')
-            nlp.remove_pipe('trainable_lemmatizer')
-            print(nlp.pipe_names)
-            # REGISTER SPACY EXTENSIONS
-            Token.set_extension("is_word", default=False, force=True)
-            Token.set_extension("word_index", default=None, force=True)
-            Token.set_extension("grammar_error_type", default=None, force=True)
-            Token.set_extension("has_grammar_error", default=False, force=True)
-            Token.set_extension("paragraph", default=None, force=True)
-            Doc.set_extension("words", default=[], force=True)
-            Doc.set_extension("paragraphs", default=[], force=True)
-            Doc.set_extension("unique_words", default={}, force=True)
-            Doc.set_extension("lemmas", default=[], force=True)
-            Doc.set_extension("total_chars", default=0, force=False)
-            Doc.set_extension("total_words", default=0, force=True)
-            Doc.set_extension("total_unique_words", default=0, force=True)
-            Doc.set_extension("total_pages", default=0, force=True)
-            Span.set_extension("is_mid_sentence", default=False, force=True)
-            Span.set_extension("is_long_sentence", default=False, force=True)
+                downloads.append(tagger_archive)
+            # BOTH MODELS ARE DOWNLOADED CONCURRENTLY
+            DownloadService.download_all(downloads)
+            if model_archive in downloads:
+                DownloadService.extract(model_archive.path, SK_SPACY_MODEL_DIR, SPACY_MODEL_NAME_WITH_VERSION)
+            if tagger_archive in downloads:
+                DownloadService.extract(tagger_archive.path, MORPHODITA_MODELS_DIR, MORPHODITA_MODEL_NAME)
+            # ASSEMBLED PIPELINE IS LOADED FROM SNAPSHOT. IT IS ASSEMBLED FROM MODEL ONLY ON FIRST RUN OF THIS VERSION
+            nlp = NlpService._load_snapshot(NlpService.snapshot_path)
+            if nlp is None:
+                nlp = NlpService._build_pipeline()
+                NlpService._save_snapshot(nlp, NlpService.snapshot_path)
+            NlpService.register_extensions()
             return nlp
         except Exception as e:
             print(e)
@@ -129,124 +112,313 @@ class NlpService:
             return None
 
     @staticmethod
-    def full_analysis(text, nlp: spacy, batch_size, config: Config):
-        """Execute full NLP analysis"""
-        doc = Doc.from_docs(list(nlp.pipe([text], batch_size=batch_size)), nlp)
-        NlpService._fill_custom_data(text, doc, config)
-        return doc
+    def register_extensions():
+        """Register spacy extensions used by Hector. Can be called repeatedly"""
+        Token.set_extension("is_word", getter=is_word, force=True)
+        Token.set_extension("word_index", getter=NlpService._get_word_index, force=True)
+        Token.set_extension("grammar_error_type", default=None, force=True)
+        Token.set_extension("has_grammar_error", default=False, force=True)
+        Token.set_extension("paragraph", getter=NlpService._get_paragraph, force=True)
+        Doc.set_extension("stats", default=None, force=True)
+        Doc.set_extension("words", getter=lambda d: d._.stats.words(d) if d._.stats else [], force=True)
+        Doc.set_extension("paragraphs", getter=lambda d: d._.stats.paragraphs(d) if d._.stats else [],
+                          force=True)
+        Doc.set_extension("unique_words", getter=lambda d: d._.stats.unique_words(d) if d._.stats else {},
+                          force=True)
+        Doc.set_extension("lemmas", getter=lambda d: d._.stats.lemmas(d) if d._.stats else {}, force=True)
+        Doc.set_extension("total_chars", default=0, force=True)
+        Doc.set_extension("total_words", getter=lambda d: d._.stats.total_words if d._.stats else 0,
+                          force=True)
+        Doc.set_extension("total_unique_words",
+                          getter=lambda d: d._.stats.total_unique_words if d._.stats else 0, force=True)
+        Doc.set_extension("total_pages", default=0, force=True)
+        Span.set_extension("is_mid_sentence",
+                           getter=lambda s: NlpService._get_sentence_length(s) == SENTENCE_LENGTH_MID,
+                           force=True)
+        Span.set_extension("is_long_sentence",
+                           getter=lambda s: NlpService._get_sentence_length(s) == SENTENCE_LENGTH_LONG,
+                           force=True)
 
     @staticmethod
-    def partial_analysis(text, original_doc: Doc, nlp: spacy, config: Config, carret_position):
-        """Run NLP analysis on part of text based on paragraph around carret position"""
-        # GET TOKEN ON CARRET POSITION
-        span = original_doc.char_span(carret_position, carret_position, alignment_mode='expand')
-        if span is not None:
-            changed_paragraph = span.sent.root._.paragraph
-        else:
-            # IF TOKEN ON CARRENT POSITION IS NOT AVAILABLE, CARRET IS AT END OF DOCUMENT
-            # WE TAKE LAST PARAGRAPH
-            changed_paragraph = original_doc[len(original_doc) - 1]._.paragraph
-        # WE FIND FIRST AND LAST TOKEN OF MODIFIED PARAGRAPH
-        first_token = changed_paragraph[0]
-        last_token = changed_paragraph[len(changed_paragraph) - 1]
-        start = changed_paragraph.start_char
-        end = changed_paragraph.end_char
-        # IF WE ARE NOT AT START OF DOCUMENT, WE EXPAND SELECTION TO PREVIOUS PARAGRAPH
-        if first_token.i > 0:
-            nbor = first_token.nbor(-1)
-            start = nbor._.paragraph.start_char
-            first_token = nbor._.paragraph[0]
-            # IF WE ARE NOT AT END OF DOCUMENT, WE EXPAND SELECTION TO NEXT PARAGRAPH
-        if last_token.i < len(original_doc) - 1:
-            nbor = last_token.nbor(1)
-            end = nbor._.paragraph.end_char
-            last_token = nbor._.paragraph[len(nbor._.paragraph) - 1]
-        # RUN NLP ON SELECTED TEXT
-        changed_portion_of_text = text[start:(end + len(text) - len(original_doc.text))]
-        partial_document = nlp(changed_portion_of_text)
-        # MERGE DOCUMENTS:
-        # 1. FROM START OF DOCUMENT TO START OF SELECTION
-        # 2. SELECTION - WITH FRESH NLP RESULTS
-        # 3. FROM END OF SELECTION TO END OF DOCUMENT
-        documents = []
-        if first_token.i > 0:
-            documents.append(original_doc[:first_token.i].as_doc())
-        documents.append(partial_document)
-        if last_token.i < len(original_doc) - 1:
-            documents.append(original_doc[last_token.i + 1:].as_doc())
-        doc = Doc.from_docs(documents, ensure_whitespace=False)
-        # RECOMPUTE CUSTOM DATA ON MERGED DOCUMENT.
-        NlpService._fill_custom_data(text, doc, config)
+    def create_empty_doc():
+        """Create empty document that can be used before NLP pipeline is loaded"""
+        NlpService.register_extensions()
+        return Doc(Vocab())
+
+    @staticmethod
+    def get_downloads():
+        """Archives of spacy model and MorphoDiTa tagger"""
+        return [
+            Download(SPACY_MODEL_LINK, os.path.join(SPACY_MODELS_DIR, f'{SPACY_MODEL_NAME_WITH_VERSION}.tar.gz'),
+                     checksums_url=MODEL_CHECKSUMS_LINK),
+            Download(MORPHODITA_MODEL_LINK, os.path.join(MORPHODITA_MODELS_DIR, f'{MORPHODITA_MODEL_NAME}.zip'),
+                     checksums_url=MODEL_CHECKSUMS_LINK)
+        ]
+
+    @staticmethod
+    def _build_pipeline():
+        """Load spacy model and assemble Hector pipeline from it"""
+        nlp = spacy.load(os.path.join(
+            SK_SPACY_MODEL_DIR,
+            SPACY_MODEL_NAME_WITH_VERSION,
+            SPACY_MODEL_NAME,
+            SPACY_MODEL_NAME_WITH_VERSION)
+        )
+        # CUSTOM TOKENIZER THAT TREATS HYPTHENATED WORDS AS SINGLE TOKEN
+        infixes = (
+                LIST_ELLIPSES
+                + LIST_ICONS
+                + [
+                    r"(?<=[0-9])[+\-\*^](?=[0-9-])",
+                    r"(?<=[{al}{q}])\.(?=[{au}{q}])".format(
+                        al=ALPHA_LOWER, au=ALPHA_UPPER, q=CONCAT_QUOTES
+                    ),
+                    r"(?<=[{a}]),(?=[{a}])".format(a=ALPHA),
+                    # OVERRIDE: r"(?<=[{a}])(?:{h})(?=[{a}])".format(a=ALPHA, h=HYPHENS),
+                    r"(?<=[{a}0-9])[:<>=/](?=[{a}])".format(a=ALPHA),
+                ]
+        )
+        infix_re = compile_infix_regex(infixes)
+        nlp.tokenizer = HectorTokenizer(Tokenizer(nlp.vocab, prefix_search=nlp.tokenizer.prefix_search,
+                                                  suffix_search=nlp.tokenizer.suffix_search,
+                                                  infix_finditer=infix_re.finditer,
+                                                  token_match=nlp.tokenizer.token_match,
+                                                  rules=nlp.Defaults.tokenizer_exceptions))
+        # ADD SENTENCIZER SO MORPHODITA CAN WORK ON AT LEAST SOME SENTENCES
+        nlp.add_pipe('sentencizer', after='trainable_lemmatizer')
+        # ADD CUSTOM COMPONENT FOR MORPHODITA
+        nlp.add_pipe(
+            MORPHODITA_COMPONENT_FACTORY_NAME,
+            name='morphodita_tagger_morphologizer_lemmatizer',
+            after='sentencizer',
+            config={"tagger_path": SK_MORPHODITA_TAGGER}
+        )
+        # ADD CUSTOM COMPONENT THAT RESETS SENTENCE BOUNDARIES SO DEPENDENCY ANALYZER WILL WORK
+        nlp.add_pipe(MORPHODITA_RESET_SENTENCES_COMPONENT, after='morphodita_tagger_morphologizer_lemmatizer')
+        # REMOVE UNUSED PIPES REPLACED BY MORPHODITA
+        nlp.remove_pipe('tagger')
+        nlp.remove_pipe('morphologizer')
+        nlp.remove_pipe('trainable_lemmatizer')
+        return nlp
+
+    @staticmethod
+    def _load_snapshot(path: str):
+        """Load assembled pipeline saved by _save_snapshot. Returns None if there is no usable snapshot"""
+        if not os.path.isdir(path):
+            return None
+        # noinspection PyBroadException
+        try:
+            # SAVED TAGGER PATH IS OVERRIDDEN, SO SNAPSHOT DOES NOT DEPEND ON LOCATION OF DATA DIRECTORY
+            nlp = spacy.load(path, config={
+                "components": {MORPHODITA_COMPONENT_FACTORY_NAME: {"tagger_path": SK_MORPHODITA_TAGGER}}
+            })
+        except Exception as e:
+            print(e)
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        # CUSTOM INFIXES ARE PART OF SERIALIZED TOKENIZER, ONLY SPACE NORMALIZATION NEEDS TO BE ADDED
+        nlp.tokenizer = HectorTokenizer(nlp.tokenizer)
+        return nlp
+
+    @staticmethod
+    def _save_snapshot(nlp, path: str):
+        """Save assembled pipeline, so next start can load it directly. Snapshots of other versions are removed"""
+        snapshots_dir = os.path.dirname(path)
+        # noinspection PyBroadException
+        try:
+            os.makedirs(snapshots_dir, exist_ok=True)
+            for entry in os.listdir(snapshots_dir):
+                # ENTRIES STARTING WITH DOT ARE SNAPSHOTS BEING WRITTEN BY OTHER PROCESSES
+                if entry != os.path.basename(path) and not entry.startswith("."):
+                    shutil.rmtree(os.path.join(snapshots_dir, entry), ignore_errors=True)
+            # SNAPSHOT IS WRITTEN TO TEMPORARY DIRECTORY AND MOVED, SO OTHER PROCESSES NEVER SEE INCOMPLETE SNAPSHOT
+            tmp_dir = tempfile.mkdtemp(prefix=".", dir=snapshots_dir)
+            nlp.to_disk(tmp_dir)
+            try:
+                os.rename(tmp_dir, path)
+            except OSError:
+                # OTHER PROCESS ALREADY SAVED SAME SNAPSHOT
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception as e:
+            print(e)
+
+    @staticmethod
+    def create_pool(processes=None):
+        """
+        Create pool of processes for analysis of long texts. Processes are not started until first long text is
+        analyzed. Returns None if there are not enough usable cores
+        """
+        if processes is None:
+            # KEEP ONE CORE FOR GUI. EVERY PROCESS LOADS WHOLE MODEL, SO NUMBER OF PROCESSES IS CAPPED
+            processes = min((os.cpu_count() or 1) - 1, NLP_POOL_MAX_PROCESSES)
+        if processes < 2:
+            return None
+        return NlpPool(processes)
+
+    @staticmethod
+    def full_analysis(text, nlp: spacy, batch_size, config: Config, pool: "NlpPool" = None,
+                      previous_doc: Doc = None):
+        """
+        Execute full NLP analysis. Only paragraphs that are not in paragraph cache go through NLP pipeline.
+        If previous document is provided, document statistics are updated only by changed paragraphs
+        """
+        with Profiler.stage("nlp.paragraph_cache"):
+            paragraphs = NlpService.split_to_paragraphs(text)
+            keys = [NlpService.paragraph_cache.key(paragraph) for paragraph in paragraphs]
+            entries = [NlpService.paragraph_cache.get(key) for key in keys]
+        # SAME PARAGRAPH MAY BE IN TEXT MULTIPLE TIMES, WE ANALYZE IT ONLY ONCE
+        missing = dict((k, p) for k, p, e in zip(keys, paragraphs, entries) if e is None)
+        if len(missing) > 0:
+            analyzed = NlpService._analyze_missing(missing, nlp, batch_size, pool)
+            entries = [e if e is not None else analyzed[k] for k, e in zip(keys, entries)]
+        # MERGED DOCUMENT IS A COPY, SO CACHED PARAGRAPHS ARE NOT MODIFIED BY LATER ANALYSIS
+        with Profiler.stage("nlp.merge") as timing:
+            doc = Doc.from_docs([e[0] for e in entries], ensure_whitespace=False)
+            if timing is not None:
+                timing.tokens = len(doc)
+        with Profiler.stage("nlp.fill_custom_data", len(doc)):
+            previous_stats = previous_doc._.stats if previous_doc is not None else None
+            stats = DocumentStats(keys, [e[1] for e in entries], config, previous_stats)
+            NlpService._fill_custom_data(text, doc, stats)
         return doc
 
     @staticmethod
-    def _fill_custom_data(original_text: str, doc: Doc, config: Config):
-        """Fill custom extensions"""
-        word_pattern = re.compile("\\w+")
-        words = []
-        word_index = 0
+    def prefetch_paragraphs(paragraphs, nlp: spacy, batch_size, pool: "NlpPool" = None):
+        """
+        Analyze paragraphs that are not in paragraph cache and store them in cache, so later analysis of text that
+        contains them does not need to run NLP pipeline again. Used to analyze document while it is imported
+        """
+        missing = {}
+        for paragraph in paragraphs:
+            key = NlpService.paragraph_cache.key(paragraph)
+            if key not in missing and NlpService.paragraph_cache.get(key) is None:
+                missing[key] = paragraph
+        if len(missing) > 0:
+            NlpService._analyze_missing(missing, nlp, batch_size, pool)
+
+    @staticmethod
+    def _analyze_missing(paragraphs, nlp: spacy, batch_size, pool: "NlpPool" = None):
+        """Run NLP pipeline on dictionary of cache key to paragraph, store results in paragraph cache and return them"""
+        analyzed = {}
+        with PIPELINE_LOCK, Profiler.stage("nlp.pipe") as timing:
+            paragraph_docs = NlpService._pipe(list(paragraphs.values()), nlp, batch_size, pool)
+            if timing is not None:
+                timing.tokens = sum(len(d) for d in paragraph_docs)
+        with Profiler.stage("nlp.paragraph_stats"):
+            for key, paragraph_doc in zip(paragraphs, paragraph_docs):
+                analyzed[key] = (paragraph_doc, ParagraphStats(paragraph_doc))
+                NlpService.paragraph_cache.put(key, analyzed[key])
+        return analyzed
+
+    @staticmethod
+    def partial_analysis(text, original_doc: Doc, nlp: spacy, config: Config):
+        """
+        Run NLP analysis after small change of text.
+        Paragraphs of original document are already cached, so only changed paragraphs are analyzed again.
+        Changed paragraphs are found by comparing paragraphs, so position of change is not needed. Small change
+        never reaches length needed for parallel analysis, so pool is not used
+        """
+        return NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, config, previous_doc=original_doc)
+
+    @staticmethod
+    def split_to_paragraphs(text):
+        """Split text to paragraphs. Every paragraph keeps its trailing newlines, so paragraphs join back to text"""
         paragraphs = []
-        cur_paragraph_start = 0
-        unique_lemmas = {}
-        unique_words = {}
-        for token in doc:
-            if token.is_space and token.text.count('\n') > 0:
-                paragraph = doc[cur_paragraph_start:token.i]
-                cur_paragraph_start = token.i
-                NlpService._append_paragraph(paragraph, paragraphs)
-            token._.is_word = re.match(word_pattern, token.lower_) is not None
-            if token._.is_word:
-                NlpService._append_word(token, word_index, unique_lemmas, unique_words, words)
-                word_index += 1
-        if len(doc) > cur_paragraph_start:
-            paragraph = doc[cur_paragraph_start:]
-            NlpService._append_paragraph(paragraph, paragraphs)
-        doc._.paragraphs = paragraphs
-        doc._.words = words
-        doc._.unique_words = unique_words
-        doc._.lemmas = unique_lemmas
+        paragraph_start = 0
+        for boundary in PARAGRAPH_BOUNDARY_PATTERN.finditer(text):
+            paragraphs.append(text[paragraph_start:boundary.end()])
+            paragraph_start = boundary.end()
+        if paragraph_start < len(text) or len(paragraphs) == 0:
+            paragraphs.append(text[paragraph_start:])
+        return paragraphs
+
+    @staticmethod
+    def split_to_chunks(paragraphs, chunk_count):
+        """Group consecutive paragraphs into at most chunk_count chunks of similar length"""
+        if chunk_count <= 1:
+            return [paragraphs]
+        target_length = sum(len(p) for p in paragraphs) / chunk_count
+        chunks = []
+        chunk = []
+        chunk_length = 0
+        for paragraph in paragraphs:
+            chunk.append(paragraph)
+            chunk_length += len(paragraph)
+            if chunk_length >= target_length and len(chunks) < chunk_count - 1:
+                chunks.append(chunk)
+                chunk = []
+                chunk_length = 0
+        if len(chunk) > 0:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _pipe(paragraphs, nlp: spacy, batch_size, pool: "NlpPool" = None):
+        """Run NLP pipeline on paragraphs. Long texts are analyzed in pool if it is provided"""
+        total_length = sum(len(p) for p in paragraphs)
+        if pool is not None and len(paragraphs) > 1 and total_length >= NLP_PARALLEL_MIN_TEXT_LENGTH:
+            # FIRST LONG TEXT STARTS POOL. UNTIL POOL IS WARM, TEXTS ARE ANALYZED IN MAIN PROCESS
+            executor = pool.get_executor()
+            if executor is not None:
+                docs = NlpService._pipe_in_pool(paragraphs, nlp, batch_size, executor, pool.processes)
+                if docs is not None:
+                    return docs
+        if Profiler.current() is not None:
+            return NlpService._pipe_profiled(paragraphs, nlp, batch_size)
+        return list(nlp.pipe(paragraphs, batch_size=batch_size))
+
+    @staticmethod
+    def _pipe_profiled(paragraphs, nlp: spacy, batch_size):
+        """
+        Run NLP pipeline one component after another, so time of every component can be measured.
+        Results are same as results of nlp.pipe, but all documents are kept in memory between components
+        """
+        with Profiler.stage("nlp.pipe.tokenizer") as timing:
+            docs = [nlp.make_doc(paragraph) for paragraph in paragraphs]
+            timing.tokens = sum(len(d) for d in docs)
+        for name, component in nlp.pipeline:
+            with Profiler.stage(f"nlp.pipe.{name}", timing.tokens):
+                if hasattr(component, "pipe"):
+                    docs = list(component.pipe(docs, batch_size=batch_size))
+                else:
+                    docs = [component(doc) for doc in docs]
+        return docs
+
+    @staticmethod
+    def _pipe_in_pool(paragraphs, nlp: spacy, batch_size, pool: ProcessPoolExecutor, processes: int):
+        """Analyze chunks of paragraphs in pool. Returns None if pool failed, so caller can fall back to main process"""
+        chunks = NlpService.split_to_chunks(paragraphs, processes * NLP_PARALLEL_CHUNKS_PER_PROCESS)
+        # noinspection PyBroadException
+        try:
+            serialized_chunks = list(pool.map(_analyze_paragraphs, chunks, [batch_size] * len(chunks)))
+        except Exception as e:
+            print(e)
+            return None
+        # STRINGS ARE STORED IN SERIALIZED DOC, SO THEY ARE ADDED TO MAIN VOCAB
+        return [Doc(nlp.vocab).from_bytes(data) for chunk in serialized_chunks for data in chunk]
+
+    @staticmethod
+    def _fill_custom_data(original_text: str, doc: Doc, stats: DocumentStats):
+        """Fill custom extensions. Words, paragraphs and sentence flags are computed from stats when accessed"""
+        doc._.stats = stats
         doc._.total_chars = len(original_text.replace('\n', ''))
-        doc._.total_words = len(words)
-        doc._.total_unique_words = len(unique_words)
         doc._.total_pages = round(doc._.total_chars / 1800, 2)
-        NlpService._evaluate_sentence_length(config, doc)
         return doc
 
     @staticmethod
-    def _append_word(token, word_index, unique_lemmas, unique_words, words):
-        """Append word to list of document words"""
-        token._.word_index = word_index
-        words.append(token)
-        lemma = token.lemma_.lower()
-        unique_word = unique_words.get(token.lower_, None)
-        unique_lemma = unique_lemmas.get(lemma, None)
-        if unique_word is None:
-            unique_word = UniqueWord(token.lower_)
-            unique_words[token.lower_] = unique_word
-        if unique_lemma is None:
-            unique_lemma = UniqueWord(lemma)
-            unique_lemmas[lemma] = unique_lemma
-        unique_word.occourences.append(token)
-        unique_lemma.occourences.append(token)
-
-    @staticmethod
-    def _append_paragraph(paragraph, paragraphs):
-        """Append paragraph and set backreference to in on all subsequent tokens"""
-        paragraphs.append(paragraph)
-        for t in paragraph:
-            t._.paragraph = paragraph
-
-    @staticmethod
-    def _evaluate_sentence_length(config, doc):
-        """Evaluate length of sentence and set extension flags"""
-        for sentence in doc.sents:
-            words = [word for word in sentence if
-                     word._.is_word and len(word.text) >= config.analysis_settings.long_sentence_min_word_length]
-            if len(words) > config.analysis_settings.long_sentence_words_mid:
-                if len(words) > config.analysis_settings.long_sentence_words_high:
-                    sentence._.is_long_sentence = True
-                else:
-                    sentence._.is_mid_sentence = True
+    def _get_word_index(token: Token):
+        stats = token.doc._.stats
+        return stats.word_index(token.i) if stats is not None else None
+
+    @staticmethod
+    def _get_paragraph(token: Token):
+        stats = token.doc._.stats
+        return stats.paragraph(token.doc, stats.paragraph_index(token.i)) if stats is not None else None
+
+    @staticmethod
+    def _get_sentence_length(span: Span):
+        stats = span.doc._.stats
+        return stats.sentence_length(span.start) if stats is not None else SENTENCE_LENGTH_NORMAL
 
     @staticmethod
     def compute_readability(doc: Doc):
@@ -272,8 +444,8 @@ class NlpService:
             x = doc._.lemmas
         words = {k: v for (k, v) in x.items() if
                  len(k) >= config.analysis_settings.repeated_words_min_word_length and len(
-                     v.occourences) >= config.analysis_settings.repeated_words_min_word_frequency}
-        return sorted(words.values(), key=lambda _x: len(_x.occourences), reverse=True)
+                     v) >= config.analysis_settings.repeated_words_min_word_frequency}
+        return sorted(words.values(), key=lambda _x: len(_x), reverse=True)
 
     @staticmethod
     def evaluate_close_words(doc: Doc, config: Config):
@@ -286,34 +458,51 @@ class NlpService:
                      len(k) >= config.analysis_settings.close_words_min_word_length}
         for key, unique_word in words_nlp.items():
             # IF WORD DOES NOT OCCOUR ENOUGH TIMES WE DONT NEED TO CHECK IF ITS OCCOURENCES ARE CLOSE
-            if len(unique_word.occourences) < config.analysis_settings.close_words_min_frequency + 1:
+            if len(unique_word) < config.analysis_settings.close_words_min_frequency + 1:
                 continue
-            for idx, word_occource in enumerate(unique_word.occourences):
-                repetitions = []
-                for possible_repetition in unique_word.occourences[idx + 1:len(unique_word.occourences) + 1]:
-                    word_distance = possible_repetition._.word_index - word_occource._.word_index
-                    if word_distance <= config.analysis_settings.close_words_min_distance_between_words:
-                        repetitions.append(word_occource)
-                        repetitions.append(possible_repetition)
-                    else:
-                        break
-                if len(repetitions) > config.analysis_settings.close_words_min_frequency:
-                    if key not in close_words:
-                        close_words[key] = set()
-                    close_words[key].update(repetitions)
+            close_occourences = NlpService.find_close_occourences(
+                unique_word.word_indexes,
+                config.analysis_settings.close_words_min_distance_between_words,
+                config.analysis_settings.close_words_min_frequency
+            )
+            if len(close_occourences) > 0:
+                close_words[key] = {unique_word.token(i) for i in close_occourences}
         return dict(sorted(close_words.items(), key=lambda item: len(item[1]), reverse=True))
 
+    @staticmethod
+    def find_close_occourences(word_indexes, max_distance, min_frequency):
+        """
+        Find positions of occourences, that are close to each other. Runs in linear time using sliding window.
+        Occourence starts a repetition if there are k following occourences within max distance and 2 * k is more
+        than min frequency. Then occourence and all k following occourences are close.
+        """
+        close_occourences = []
+        window_end = 0
+        # INDEX OF LAST OCCOURENCE COVERED BY SOME REPETITION
+        covered_until = -1
+        for i, word_index in enumerate(word_indexes):
+            # WINDOW END IS FIRST OCCOURENCE THAT IS TOO FAR. IT NEVER MOVES BACK
+            window_end = max(window_end, i + 1)
+            while window_end < len(word_indexes) and word_indexes[window_end] - word_index <= max_distance:
+                window_end += 1
+            if 2 * (window_end - i - 1) > min_frequency:
+                covered_until = window_end - 1
+            if covered_until >= i:
+                close_occourences.append(i)
+        return close_occourences
+
     @staticmethod
     def partition_close_words(close_words, max_distance):
         """Create repetition groups from close words"""
-        if close_words is None:
+        if not close_words:
             return []
         repetition_groups = []
-        cw = (list(close_words))
-        cw.sort(key=lambda x: x._.word_index)
+        # TOKEN ORDER IS SAME AS WORD ORDER
+        cw = sorted(close_words, key=lambda x: x.i)
+        word_indexes = [token._.word_index for token in cw]
         current_group = [cw[0]]
         for i in range(1, len(cw)):
-            if cw[i]._.word_index - cw[i - 1]._.word_index > max_distance:
+            if word_indexes[i] - word_indexes[i - 1] > max_distance:
                 repetition_groups.append(current_group)
                 current_group = []
             current_group.append(cw[i])
@@ -359,6 +548,97 @@ class NlpService:
         """Find unneeded trailing spaces"""
         return re.finditer(PATTERN_TRAILING_SPACES, doc.text, re.MULTILINE)
 
+    @staticmethod
+    def find_typography_issues(doc: Doc):
+        """Find all typography issues in single pass. Only paragraphs that were not scanned before are scanned"""
+        paragraph_starts = doc._.stats.char_bases[:-1] if doc._.stats is not None else None
+        return NlpService.typography_scanner.scan(doc.text, paragraph_starts)
+
+    @staticmethod
+    def is_typography_issue_enabled(issue: TypographyIssue, config: Config):
+        """Check if issue should be reported according to config"""
+        settings = config.analysis_settings
+        if issue.issue_type == TYPOGRAPHY_MULTIPLE_SPACES:
+            return settings.enable_multiple_spaces
+        if issue.issue_type == TYPOGRAPHY_MULTIPLE_PUNCTUATION:
+            # COMBINATION OF QUESTION MARK AND EXCLAMATION MARK IS ALLOWED
+            return settings.enable_multiple_punctuation and issue.text not in ["?!"]
+        if issue.issue_type == TYPOGRAPHY_TRAILING_SPACES:
+            return settings.enable_trailing_spaces
+        return settings.enable_quote_corrections
+
+
+class NlpPool:
+    """
+        Pool of processes with NLP pipelines used for parallel analysis of long texts. Every process loads whole model,
+        so processes are started only when first long text is analyzed and users who edit short texts do not pay for
+        them. Pool is warmed up in background, texts analyzed in the meantime fall back to main process.
+    """
+
+    def __init__(self, processes: int):
+        """
+        Constructor for NLP pool
+        :param processes Number of worker processes
+        """
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._executor = None
+        self._warmup_thread = None
+        self._ready = threading.Event()
+        self._closed = False
+
+    def get_executor(self):
+        """Get executor of warm pool. First call starts pool in background. Returns None until pool is warm"""
+        if self._ready.is_set():
+            return self._executor
+        self.start()
+        return None
+
+    def start(self, wait=False):
+        """Start and warm up pool processes, if they are not started yet. Returns True if pool is warm"""
+        with self._lock:
+            if self._warmup_thread is None and not self._closed:
+                self._warmup_thread = threading.Thread(target=self._warm_up, name="hector-nlp-pool", daemon=True)
+                self._warmup_thread.start()
+            thread = self._warmup_thread
+        if wait and thread is not None:
+            thread.join()
+        return self._ready.is_set()
+
+    def shutdown(self):
+        """Stop pool processes. Pool can not be started again"""
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+            self._executor = None
+            self._ready.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _warm_up(self):
+        # noinspection PyBroadException
+        try:
+            with self._lock:
+                if self._closed:
+                    return
+                # SPAWN IS USED ON ALL PLATFORMS, SO WE DO NOT FORK GUI AND RUNNING THREADS
+                executor = ProcessPoolExecutor(max_workers=self.processes,
+                                               mp_context=multiprocessing.get_context("spawn"),
+                                               initializer=_initialize_pool_worker)
+                self._executor = executor
+            # START ALL PROCESSES NOW, SO ANALYSIS IN POOL DOES NOT WAIT FOR MODEL LOADING
+            warmup = [executor.submit(_ping_pool_worker) for _ in range(self.processes)]
+            if all(f.result() for f in warmup):
+                with self._lock:
+                    # POOL MAY HAVE BEEN SHUT DOWN DURING WARM UP
+                    if self._executor is executor:
+                        self._ready.set()
+            else:
+                self.shutdown()
+        except Exception as e:
+            print(e)
+            self.shutdown()
+
 
 class HectorTokenizer:
     """Custom tokenizer that noprmalizes unicode spaces"""
@@ -369,4 +649,30 @@ class HectorTokenizer:
         doc = self.tokenizer(Utils.normalize_spaces(string))
         return doc
 
+    # SERIALIZATION IS DELEGATED TO WRAPPED TOKENIZER, SO WHOLE PIPELINE CAN BE SAVED
+
+    def to_disk(self, path, **kwargs):
+        self.tokenizer.to_disk(path, **kwargs)
+
+    def from_disk(self, path, **kwargs):
+        self.tokenizer.from_disk(path, **kwargs)
+        return self
+
+    def to_bytes(self, **kwargs):
+        return self.tokenizer.to_bytes(**kwargs)
+
+    def from_bytes(self, bytes_data, **kwargs):
+        self.tokenizer.from_bytes(bytes_data, **kwargs)
+        return self
+
 
+NlpService.paragraph_cache = ParagraphCache(
+    NLP_PARAGRAPH_CACHE_SIZE,
+    f"{SPACY_MODEL_NAME_WITH_VERSION}/{MORPHODITA_MODEL_NAME}/{VERSION}"
+)
+NlpService.typography_scanner = TypographyScanner(TYPOGRAPHY_CACHE_SIZE)
+# SNAPSHOT OF ASSEMBLED PIPELINE. SPACY VERSION IS PART OF KEY, BECAUSE SERIALIZATION FORMAT MAY CHANGE BETWEEN VERSIONS
+NlpService.snapshot_path = os.path.join(
+    NLP_SNAPSHOTS_DIR,
+    f"{SPACY_MODEL_NAME_WITH_VERSION}-{MORPHODITA_MODEL_NAME}-{VERSION}-spacy-{spacy.__version__}"
+)
@@ -101,7 +101,16 @@ class ProjectService:
     @staticmethod
     def load_file_contents(p: Project, item: ProjectItem):
         """Save contents of a HTEXT file"""
-        path = os.path.join(os.path.dirname(p.path), "data", item.path)
+        return ProjectService.read_htext_file(ProjectService.get_item_file_path(p, item))
+
+    @staticmethod
+    def get_item_file_path(p: Project, item: ProjectItem):
+        """Get path of file or directory that belongs to project item"""
+        return os.path.join(os.path.dirname(p.path), "data", item.path)
+
+    @staticmethod
+    def read_htext_file(path):
+        """Read HTEXT file from given path. Returns None if file does not exist"""
         if os.path.exists(path):
             content = pathlib.Path(path).read_text(encoding='utf-8')
             if len(content) > 0:
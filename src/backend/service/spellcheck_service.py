@@ -2,6 +2,8 @@ import json
 import os
 import shutil
 import string
+import threading
+import time
 
 from hunspell import Hunspell
 from pythes import PyThes
@@ -12,14 +14,36 @@ from src.const.grammar_error_types import GRAMMAR_ERROR_TYPE_MISSPELLED_WORD, NO
     GRAMMAR_ERROR_TYPE_WRONG_I_SUFFIX, GRAMMAR_ERROR_TYPE_WRONG_ISI_SUFFIX, GRAMMAR_ERROR_SVOJ_MOJ_TVOJ_PLUR, \
     GRAMMAR_ERROR_SVOJ_MOJ_TVOJ_SING, GRAMMAR_ERROR_Z_INSTEAD_OF_S, GRAMMAR_ERROR_S_INSTEAD_OF_Z, \
     GRAMMAR_ERROR_TOMU_INSTEAD_OF_TO
+from src.backend.service.download_service import DownloadService, DownloadError
+from src.backend.spellcheck_cache import SpellcheckCache
 from src.const.paths import DICTIONARY_DIR, DICTIONARY_DIR_BACKUP, SK_DICTIONARY_DIR, SK_SPELL_DICTIONARY_DIR, \
-    THESAURUS, SK_SPELL_AFF, SK_SPELL_DIC
+    THESAURUS, SK_SPELL_AFF, SK_SPELL_DIC, SPELLCHECK_CACHE_FILE_PATH
 from src.const.spellcheck_dep_patterns import TYPE_PEKNY_PATTERNS, SVOJ_MOJ_TVOJ_PATTERNS, ZZO_INSTEAD_OF_SSO_PATTERNS, \
     SSO_INSTEAD_OF_ZZO_PATTERNS, CHAPEM_TO_TOMU_PATTERNS
+from src.const.values import SPELLCHECK_CACHE_SIZE, SK_THESAURUS_LINK, SK_SPELL_AFF_LINK, SK_SPELL_DIC_LINK
+from src.domain.download import Download
 from src.utils import Utils
 
-with open(Utils.resource_path(os.path.join('data_files', 'misstagged_words.json')), 'r', encoding='utf-8') as file:
-    EXCEPTIONS = json.load(file)
+# HUNSPELL IS NOT THREAD SAFE. ANALYSIS RUNS IN BACKGROUND THREAD WHILE GUI ASKS FOR SUGGESTIONS
+DICTIONARY_LOCK = threading.Lock()
+# RULES OF DEPENDENCY MATCHER. ALL RULES ARE MATCHED IN SINGLE RUN.
+# MATCHES ARE EVALUATED IN THIS ORDER, SO LATER RULES MAY OVERRIDE ERRORS FOUND BY EARLIER RULES
+TYPE_PEKNY_RULE = "TYPE_PEKNY_PATTERNS"
+CHAPEM_TO_TOMU_RULE = "CHAPEM_TO_TOMU_PATTERNS"
+ZZO_INSTEAD_OF_SSO_RULE = "ZZO_INSTEAD_OF_SSO_PATTERNS"
+SSO_INSTEAD_OF_ZZO_RULE = "SSO_INSTEAD_OF_ZZO_PATTERNS"
+SVOJ_MOJ_TVOJ_RULE = "SVOJ_MOJ_TVOJ_PATTERNS"
+DEPENDENCY_RULES = {
+    TYPE_PEKNY_RULE: TYPE_PEKNY_PATTERNS,
+    CHAPEM_TO_TOMU_RULE: CHAPEM_TO_TOMU_PATTERNS,
+    ZZO_INSTEAD_OF_SSO_RULE: ZZO_INSTEAD_OF_SSO_PATTERNS,
+    SSO_INSTEAD_OF_ZZO_RULE: SSO_INSTEAD_OF_ZZO_PATTERNS,
+    SVOJ_MOJ_TVOJ_RULE: SVOJ_MOJ_TVOJ_PATTERNS,
+}
+BASIC_SPELLING_TIMING = "basic_spelling"
+DEPENDENCY_MATCHER_TIMING = "dependency_matcher"
+# COMPILED MATCHERS. KEY IS ID OF VOCAB, VALUE IS (VOCAB, MATCHER)
+MATCHERS_LOCK = threading.Lock()
 
 
 class SpellcheckService:
@@ -31,12 +55,17 @@ class SpellcheckService:
         if os.path.isdir(DICTIONARY_DIR):
             SpellcheckService._remove_dictionaries_backup()
             os.rename(DICTIONARY_DIR, DICTIONARY_DIR_BACKUP)
+        # CACHED RESULTS OF OLD DICTIONARY ARE NOT VALID ANYMORE
+        SpellcheckService.clear_cache()
         dictionaries = SpellcheckService.initialize(github_token, github_user)
         if dictionaries["spellcheck"] is not None and dictionaries["thesaurus"] is not None:
             if os.path.isdir(DICTIONARY_DIR_BACKUP):
                 shutil.rmtree(DICTIONARY_DIR_BACKUP)
             return dictionaries
         else:
+            # REMOVE PARTIAL DOWNLOADS OF NEW DICTIONARIES
+            if os.path.isdir(DICTIONARY_DIR):
+                shutil.rmtree(DICTIONARY_DIR)
             os.rename(DICTIONARY_DIR_BACKUP, DICTIONARY_DIR)
             SpellcheckService._remove_dictionaries_backup()
             return None
@@ -47,93 +76,162 @@ class SpellcheckService:
         if os.path.isdir(DICTIONARY_DIR_BACKUP):
             shutil.rmtree(DICTIONARY_DIR_BACKUP)
 
+    @staticmethod
+    def get_downloads(github_token=None):
+        """Files of thesaurus and hunspell dictionary"""
+        headers = {}
+        if github_token is not None:
+            headers['Authorization'] = f'Bearer {github_token}'
+        return [
+            Download(SK_THESAURUS_LINK, THESAURUS, headers=headers),
+            Download(SK_SPELL_AFF_LINK, SK_SPELL_AFF, headers=headers),
+            Download(SK_SPELL_DIC_LINK, SK_SPELL_DIC, headers=headers)
+        ]
+
     @staticmethod
     def initialize(github_token=None, github_user=None):
         """Initialize dictionaries. Download ionitial dictinaries, if not present"""
         # noinspection PyBroadException
         try:
-            print(DICTIONARY_DIR)
-            if not os.path.isdir(DICTIONARY_DIR):
-                os.mkdir(DICTIONARY_DIR)
-            headers = {}
-            if github_token is not None:
-                headers['Authorization'] = f'Bearer {github_token}'
-            if not os.path.isdir(SK_DICTIONARY_DIR):
-                os.mkdir(SK_DICTIONARY_DIR)
-                Utils.download_file(
-                    "https://raw.githubusercontent.com/LibreOffice/dictionaries/refs/heads/master/sk_SK/th_sk_SK_v2.dat",
-                    THESAURUS,
-                    headers
-                )
-            if not os.path.isdir(SK_SPELL_DICTIONARY_DIR):
-                os.mkdir(SK_SPELL_DICTIONARY_DIR)
-                Utils.download_file(
-                    "https://raw.githubusercontent.com/sk-spell/hunspell-sk/refs/heads/master/sk_SK.aff",
-                    SK_SPELL_AFF,
-                    headers
-                )
-                Utils.download_file(
-                    "https://github.com/sk-spell/hunspell-sk/raw/refs/heads/master/sk_SK.dic",
-                    SK_SPELL_DIC,
-                    headers
-                )
+            os.makedirs(SK_DICTIONARY_DIR, exist_ok=True)
+            os.makedirs(SK_SPELL_DICTIONARY_DIR, exist_ok=True)
+            # ONLY MISSING FILES ARE DOWNLOADED, ALL OF THEM CONCURRENTLY
+            DownloadService.download_all(SpellcheckService.get_downloads(github_token))
+            spellcheck_dictionary = Hunspell('sk_SK', hunspell_data_dir=SK_SPELL_DICTIONARY_DIR)
+            SpellcheckService.spell_cache.set_version(SpellcheckService._dictionary_version())
+            SpellcheckService.load_cache()
+            SpellcheckService.get_misstagged_words()
             return {
-                "spellcheck": Hunspell('sk_SK', hunspell_data_dir=SK_SPELL_DICTIONARY_DIR),
+                "spellcheck": spellcheck_dictionary,
                 "thesaurus": PyThes(THESAURUS)
             }
         except Exception as e:
             print(e)
             print("Unable to retrieve data. Please check your internet connection.")
-            if os.path.isdir(DICTIONARY_DIR):
+            # PARTIAL DOWNLOADS ARE KEPT, SO NEXT ATTEMPT RESUMES THEM. OTHER ERRORS MAY BE CAUSED BY BROKEN FILES
+            if not isinstance(e, DownloadError) and os.path.isdir(DICTIONARY_DIR):
                 shutil.rmtree(DICTIONARY_DIR)
             return {
                 "spellcheck": None,
                 "thesaurus": None
             }
 
+    @staticmethod
+    def _dictionary_version():
+        """Version of installed dictionary. Any change of dictionary files changes version"""
+        return "/".join(f"{os.path.getsize(path)}-{os.stat(path).st_mtime_ns}" for path in [SK_SPELL_AFF, SK_SPELL_DIC])
 
+    @staticmethod
+    def load_cache():
+        """Load spellcheck results saved in data directory"""
+        # noinspection PyBroadException
+        try:
+            SpellcheckService.spell_cache.load(SPELLCHECK_CACHE_FILE_PATH)
+        except Exception as e:
+            print(e)
+
+    @staticmethod
+    def save_cache():
+        """Save spellcheck results to data directory"""
+        # noinspection PyBroadException
+        try:
+            if os.path.isdir(os.path.dirname(SPELLCHECK_CACHE_FILE_PATH)):
+                SpellcheckService.spell_cache.save(SPELLCHECK_CACHE_FILE_PATH)
+        except Exception as e:
+            print(e)
+
+    @staticmethod
+    def clear_cache():
+        """Remove all cached spellcheck results, including saved ones"""
+        SpellcheckService.spell_cache.clear()
+        if os.path.isfile(SPELLCHECK_CACHE_FILE_PATH):
+            os.remove(SPELLCHECK_CACHE_FILE_PATH)
+
+    @staticmethod
+    def suggest(spellcheck_dictionary, word):
+        """Get hunspell suggestions for word"""
+        with DICTIONARY_LOCK:
+            return spellcheck_dictionary.suggest(word)
 
     @staticmethod
     def spellcheck(spellcheck_dictionary, doc):
-        """Perform spelcheck"""
+        """Perform spelcheck. Returns time in seconds spent by each check"""
+        timings = {}
+        start = time.perf_counter()
         SpellcheckService._check_basic_spelling(spellcheck_dictionary, doc)
-        SpellcheckService._check_nominative_plurar_adj(doc)
-        SpellcheckService._check_chapem_tomu_phrase(doc)
-        SpellcheckService._check_correct_adpositions(doc)
-        SpellcheckService._check_possesive_pronouns(doc)
+        timings[BASIC_SPELLING_TIMING] = time.perf_counter() - start
+        # DEPENDENCY TREE IS TRAVERSED ONLY ONCE FOR ALL RULES, MATCHES ARE THEN DISPATCHED BY RULE ID
+        start = time.perf_counter()
+        matches = {rule_id: [] for rule_id in DEPENDENCY_RULES}
+        for match_id, token_ids in SpellcheckService._get_dependency_matcher(doc.vocab)(doc):
+            matches[doc.vocab.strings[match_id]].append(token_ids)
+        timings[DEPENDENCY_MATCHER_TIMING] = time.perf_counter() - start
+        for rule_id, check in SpellcheckService.dependency_rule_checks.items():
+            start = time.perf_counter()
+            check(doc, matches[rule_id])
+            timings[rule_id] = time.perf_counter() - start
+        return timings
+
+    @staticmethod
+    def _get_dependency_matcher(vocab):
+        """Get matcher with all dependency rules. Matcher is compiled only once for loaded pipeline"""
+        with MATCHERS_LOCK:
+            cached = SpellcheckService.dependency_matcher
+            # ONLY ONE PIPELINE IS LOADED, SO MATCHER OF PREVIOUS VOCAB IS REPLACED AND RELEASED
+            if cached is None or cached[0] is not vocab:
+                matcher = DependencyMatcher(vocab)
+                for rule_id, patterns in DEPENDENCY_RULES.items():
+                    matcher.add(rule_id, patterns)
+                cached = (vocab, matcher)
+                SpellcheckService.dependency_matcher = cached
+            return cached[1]
+
+    @staticmethod
+    def get_misstagged_words():
+        """Words that are often misstagged by NLP model. List is loaded on first use"""
+        if SpellcheckService._misstagged_words is None:
+            with open(Utils.resource_path(os.path.join('data_files', 'misstagged_words.json')), 'r',
+                      encoding='utf-8') as file:
+                SpellcheckService._misstagged_words = set(json.load(file))
+        return SpellcheckService._misstagged_words
 
     @staticmethod
     def _check_basic_spelling(spellcheck_dictionary, doc):
         """Check basic spelling using hunspell"""
-        for word in doc._.unique_words.items():
-            # CACHE TO OPTIMIZE CALLS TO HUNSPELL
+        doc_text = doc.text
+        spell_cache = SpellcheckService.spell_cache
+        for unique_word in doc._.unique_words.values():
+            # UNIQUE WORDS ARE GROUPED BY LOWERCASE FORM
+            is_non_literal = unique_word.text in NON_LITERAL_WORDS
             # WE NEED TO ITERATE OVER ALL OCOURENCES, BECAUSE THAY CAN BE SPELLED DIFFERENTLY
-            # BUT WHEN WE ENCOUNTER SAME SEPLLING AGAIN, WE CAN REUSE RESULT
-            spell_cache = {}
-            for token in word[1].occourences:
-                spell_result = None
-                if token.text in spell_cache:
-                    spell_result = spell_cache[token.text]
-                else:
-                    spell_result = spellcheck_dictionary.spell(token.text)
+            # RESULTS ARE CACHED BY SPELLING, SO HUNSPELL IS CALLED ONLY FOR NEW SPELLINGS
+            for token_index, char_offset, length in zip(unique_word.token_indexes, unique_word.char_offsets,
+                                                        unique_word.lengths):
+                word_text = doc_text[char_offset:char_offset + length]
+                spell_result = spell_cache.get(word_text)
+                if spell_result is None:
+                    with DICTIONARY_LOCK:
+                        spell_result = spellcheck_dictionary.spell(word_text)
+                    spell_cache.put(word_text, spell_result)
                 if not spell_result:
                     # IF WORD IS NOT SPELLED CORRECTLY WE SET GRAMMAR ERROR FLAG AND TYPE OF ERROR
+                    token = doc[token_index]
                     token._.has_grammar_error = True
                     token._.grammar_error_type = GRAMMAR_ERROR_TYPE_MISSPELLED_WORD
-                if token.lower_ in NON_LITERAL_WORDS:
+                if is_non_literal:
                     # SOME WORDS NEEDS SPECIAl HANDLING
+                    token = doc[token_index]
                     token._.has_grammar_error = True
                     token._.grammar_error_type = GRAMMAR_ERROR_NON_LITERAL_WORD
 
     # SUPRESSED C901 Method too Complex. SOLVING THIS WOULD MAKE CODE HARDER TO READ
     @staticmethod
-    def _check_nominative_plurar_adj(doc):  # noqa: C901
+    def _check_nominative_plurar_adj(doc, matches):  # noqa: C901
         # SOME ADJECTIVES CASED BY TYPE PEKNY CAN HAVE BOTH Y AND I DEPENDING ON NOUN THERE ARE USED WITH
         # THIS ALSO EXTENDS ON SOME PRONOUNS
         # WE USE DEPENDENCY MATCHER TO ROUGHLY FIND POSSIBLE ERRORS
-        matcher = DependencyMatcher(doc.vocab)
-        matcher.add("TYPE_PEKNY_PATTERNS", TYPE_PEKNY_PATTERNS)
-        for match_id, (target, modifier) in matcher(doc):
+        exceptions = SpellcheckService.get_misstagged_words()
+        for target, modifier in matches:
             target_token = doc[target]
             modifier_token = doc[modifier]
             target_morph = doc[target].morph.to_dict()
@@ -144,7 +242,7 @@ class SpellcheckService:
             if target_token.pos_ in {"DET", "PRON"} and target_morph.get("Case") != "Nom":
                 # IF TARGET TOKEN IS DETERMINER OR PRONOUN IN NOMINATIVE CASE, SKIP
                 continue
-            if target_token.lower_ in EXCEPTIONS or modifier_token.lower_ in EXCEPTIONS:
+            if target_token.lower_ in exceptions or modifier_token.lower_ in exceptions:
                 # IF TARGET OR MODIFIER ARE IN LIST OF EXCEPTIONS, SKIP
                 continue
             if target_token.pos_ == "NOUN" and (target_morph.get("Gender") != "Masc" or
@@ -174,12 +272,10 @@ class SpellcheckService:
                     mod._.grammar_error_type = GRAMMAR_ERROR_TYPE_WRONG_ISI_SUFFIX
 
     @staticmethod
-    def _check_possesive_pronouns(doc):
+    def _check_possesive_pronouns(doc, matches):
         # CHECK IF POSSESIVE PRONOUNS ARE USED IN CORRECT FORM BASED ON CONTEXT
         # WE USE DEPENDENCY MATCHER TO FIND POSSIBLE ERRORS AND THEN PERFORM CHECKING
-        matcher = DependencyMatcher(doc.vocab)
-        matcher.add("SVOJ_MOJ_TVOJ_PATTERNS", SVOJ_MOJ_TVOJ_PATTERNS)
-        for match_id, (pronoun, noun) in matcher(doc):
+        for pronoun, noun in matches:
             pronoun_token = doc[pronoun]
             noun_token = doc[noun]
             # FIND CASE MARKING TOKEN, IF AVAILABLE
@@ -210,32 +306,40 @@ class SpellcheckService:
                     pronoun_token._.grammar_error_type = GRAMMAR_ERROR_SVOJ_MOJ_TVOJ_SING
 
     @staticmethod
-    def _check_correct_adpositions(doc):
-        # CHECK IF ADPOSIONS S/SO AND Z/ZO ARE NOT INTERCHANGED
-        # WE USE DEPENDENCY MATCHER TO PERFORM CHECK
-        matcher = DependencyMatcher(doc.vocab)
-        matcher.add("ZZO_INSTEAD_OF_SSO_PATTERNS", ZZO_INSTEAD_OF_SSO_PATTERNS)
-        for match_id, (preposition, noun) in matcher(doc):
+    def _check_z_instead_of_s(doc, matches):
+        # CHECK IF ADPOSIONS Z/ZO ARE NOT USED INSTEAD OF S/SO
+        for preposition, noun in matches:
             preposition_token = doc[preposition]
             preposition_token._.has_grammar_error = True
             preposition_token._.grammar_error_type = GRAMMAR_ERROR_Z_INSTEAD_OF_S
-        matcher = DependencyMatcher(doc.vocab)
-        matcher.add("SSO_INSTEAD_OF_ZZO_PATTERNS", SSO_INSTEAD_OF_ZZO_PATTERNS)
-        for match_id, (preposition, noun) in matcher(doc):
+
+    @staticmethod
+    def _check_s_instead_of_z(doc, matches):
+        # CHECK IF ADPOSIONS S/SO ARE NOT USED INSTEAD OF Z/ZO
+        for preposition, noun in matches:
             preposition_token = doc[preposition]
             preposition_token._.has_grammar_error = True
             preposition_token._.grammar_error_type = GRAMMAR_ERROR_S_INSTEAD_OF_Z
-        matcher = DependencyMatcher(doc.vocab)
-        return matcher
 
     @staticmethod
-    def _check_chapem_tomu_phrase(doc):
+    def _check_chapem_tomu_phrase(doc, matches):
         # CHECK IF PHRASE "CHAPEM TO" IS NOT IN INCORRECT FORM "CHAPEM TOMU"
         # WE USE DEPENDENCY MATCHER TO FIND POSSIBLE ERROR AND THEN PERFORM CHEKING
-        matcher = DependencyMatcher(doc.vocab)
-        matcher.add("CHAPEM_TO_TOMU_PATTERNS", CHAPEM_TO_TOMU_PATTERNS)
-        for match_id, (verb, pron) in matcher(doc):
+        for verb, pron in matches:
             pron_token = doc[pron]
             if pron_token.lower_ == "tomu":
                 pron_token._.has_grammar_error = True
                 pron_token._.grammar_error_type = GRAMMAR_ERROR_TOMU_INSTEAD_OF_TO
+
+
+SpellcheckService.spell_cache = SpellcheckCache(SPELLCHECK_CACHE_SIZE)
+SpellcheckService.dependency_matcher = None
+SpellcheckService.dependency_rule_checks = {
+    TYPE_PEKNY_RULE: SpellcheckService._check_nominative_plurar_adj,
+    CHAPEM_TO_TOMU_RULE: SpellcheckService._check_chapem_tomu_phrase,
+    ZZO_INSTEAD_OF_SSO_RULE: SpellcheckService._check_z_instead_of_s,
+    SSO_INSTEAD_OF_ZZO_RULE: SpellcheckService._check_s_instead_of_z,
+    SVOJ_MOJ_TVOJ_RULE: SpellcheckService._check_possesive_pronouns,
+}
+# WORDS OFTEN MISSTAGGED BY NLP MODEL. LOADED ON FIRST USE, SO IMPORT OF SERVICE DOES NOT READ ANY FILES
+SpellcheckService._misstagged_words = None
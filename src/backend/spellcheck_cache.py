@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class SpellcheckCache:
+    """
+        LRU cache of hunspell results keyed by surface form of word.
+        Results are valid only for dictionary version they were computed with. When version changes, cache is cleared.
+    """
+
+    def __init__(self, max_size: int, version: str = None):
+        """
+        Constructor for spellcheck cache
+        :param max_size Maximal number of cached words
+        :param version Version of dictionary
+        """
+        self.max_size = max_size
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, word: str):
+        """Return cached spelling result of word or None if word was not checked yet"""
+        with self._lock:
+            result = self._results.get(word, None)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(word)
+            self.hits += 1
+            return result
+
+    def put(self, word: str, result: bool):
+        """Store spelling result. Least recently used words are removed when cache is full"""
+        with self._lock:
+            self._results[word] = bool(result)
+            self._results.move_to_end(word)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def set_version(self, version: str):
+        """Set dictionary version. Cached results of other versions are removed"""
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def save(self, path: str):
+        """Save cache to file, so results survive application restart"""
+        with self._lock:
+            data = {"version": self.version, "results": dict(self._results)}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    def load(self, path: str):
+        """Load cache from file. Results saved for other dictionary version are ignored"""
+        if not os.path.isfile(path):
+            return
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get("version", None) != self.version:
+            return
+        with self._lock:
+            for word, result in data.get("results", {}).items():
+                self._results[word] = result
+                self._results.move_to_end(word)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._results)
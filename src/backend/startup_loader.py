@@ -0,0 +1,82 @@
+import threading
+import time
+import traceback
+
+
+class StartupLoader:
+    """
+        Loads independent resources of application (NLP model, dictionaries, pandoc...) concurrently in background
+        threads, so GUI can be shown immediately. Every resource is loaded by its own thread as soon as resources it
+        depends on are ready. Features that need resource either wait for it, or check whether it is ready.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        # NAME OF RESOURCE TO ITS LOAD FUNCTION AND NAMES OF RESOURCES IT DEPENDS ON
+        self._tasks = {}
+        # NAME OF FINISHED RESOURCE TO ERROR. NONE MEANS RESOURCE WAS LOADED SUCCESSFULLY
+        self._errors = {}
+        # NAME OF FINISHED RESOURCE TO TIME IN SECONDS SPENT BY LOADING
+        self.durations = {}
+
+    def add(self, name: str, load, depends_on=None):
+        """
+        Register resource. Must be called before start
+        :param name Name of resource
+        :param load Callable that loads resource. Raises exception if resource can not be loaded
+        :param depends_on Names of resources, that must be loaded before this resource
+        """
+        self._tasks[name] = (load, depends_on or [])
+
+    def start(self):
+        """Start loading of all registered resources"""
+        for name in self._tasks:
+            threading.Thread(target=self._load, args=(name,), name=f"hector-startup-{name}", daemon=True).start()
+
+    def is_ready(self, *names):
+        """Check if all given resources were loaded successfully. Resources, that are not registered, are ready"""
+        with self._condition:
+            return all(self._is_loaded(name) for name in names)
+
+    def wait(self, *names, timeout=None):
+        """
+        Wait until all given resources are finished. Returns True if all of them were loaded successfully, False if
+        any of them failed or timeout expired
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: all(self._is_finished(name) for name in names), timeout)
+            return all(self._is_loaded(name) for name in names)
+
+    def failed(self):
+        """Names of resources that failed to load"""
+        with self._condition:
+            return [name for name, error in self._errors.items() if error is not None]
+
+    def is_finished(self):
+        """Check if loading of all resources is finished"""
+        with self._condition:
+            return all(self._is_finished(name) for name in self._tasks)
+
+    def _is_finished(self, name):
+        return name not in self._tasks or name in self._errors
+
+    def _is_loaded(self, name):
+        return name not in self._tasks or (name in self._errors and self._errors[name] is None)
+
+    def _load(self, name):
+        load, depends_on = self._tasks[name]
+        error = None
+        start = time.perf_counter()
+        if not self.wait(*depends_on):
+            error = RuntimeError(f"Resources {', '.join(depends_on)} needed by {name} failed to load")
+        else:
+            # noinspection PyBroadException
+            try:
+                load()
+            except Exception as e:
+                traceback.print_exc()
+                error = e
+        with self._condition:
+            self.durations[name] = time.perf_counter() - start
+            self._errors[name] = error
+            self._condition.notify_all()
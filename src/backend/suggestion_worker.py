@@ -0,0 +1,129 @@
+import threading
+import traceback
+from collections import OrderedDict, deque
+
+
+class SuggestionWorker:
+    """
+        Background thread that computes hunspell suggestions outside of GUI thread.
+        Suggestions are kept in LRU cache keyed by word. GUI never waits for suggestions, it only asks for cached result
+        and if there is none, word is queued and GUI polls cache later.
+    """
+
+    def __init__(self, suggest, max_size: int):
+        """
+        Constructor for suggestion worker
+        :param suggest Callable that accepts word and returns list of suggestions
+        :param max_size Maximal number of words with cached suggestions
+        """
+        self.suggest = suggest
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._condition = threading.Condition()
+        self._suggestions = OrderedDict()
+        self._queue = deque()
+        self._queued = set()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start worker thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="hector-suggestion-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop worker thread. Queued words are dropped"""
+        with self._condition:
+            self._running = False
+            self._queue.clear()
+            self._queued.clear()
+            self._condition.notify_all()
+
+    def get(self, word: str):
+        """
+        Return cached suggestions of word. If there are none, word is queued with highest priority and None is returned
+        """
+        with self._condition:
+            suggestions = self._suggestions.get(word, None)
+            if suggestions is not None:
+                self._suggestions.move_to_end(word)
+                self.hits += 1
+                return suggestions
+            self.misses += 1
+            # WORD UNDER MOUSE IS MORE IMPORTANT THAN PREFETCHED WORDS
+            if word in self._queued:
+                self._queue.remove(word)
+            self._queued.add(word)
+            self._queue.appendleft(word)
+            self._condition.notify_all()
+            return None
+
+    def get_now(self, word: str):
+        """Return suggestions of word. If they are not cached, they are computed in calling thread"""
+        with self._condition:
+            suggestions = self._suggestions.get(word, None)
+            if suggestions is not None:
+                self._suggestions.move_to_end(word)
+                self.hits += 1
+                return suggestions
+            self.misses += 1
+        suggestions = list(self.suggest(word))
+        self._store(word, suggestions)
+        return suggestions
+
+    def prefetch(self, words):
+        """Queue words, that are not cached yet. Words are processed in given order"""
+        with self._condition:
+            for word in words:
+                if word not in self._suggestions and word not in self._queued:
+                    self._queued.add(word)
+                    self._queue.append(word)
+            self._condition.notify_all()
+
+    def is_cached(self, word: str):
+        """Check if suggestions of word are cached"""
+        with self._condition:
+            return word in self._suggestions
+
+    def clear(self):
+        """Remove all cached suggestions. Should be called when dictionary changes"""
+        with self._condition:
+            self._suggestions.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        with self._condition:
+            return len(self._suggestions)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                word = self._queue.popleft()
+                self._queued.discard(word)
+                if word in self._suggestions:
+                    continue
+            # noinspection PyBroadException
+            try:
+                suggestions = list(self.suggest(word))
+            except Exception:
+                traceback.print_exc()
+                # CACHE EMPTY RESULT, SO GUI DOES NOT WAIT FOREVER
+                suggestions = []
+            self._store(word, suggestions)
+
+    def _store(self, word: str, suggestions: list):
+        with self._condition:
+            self._suggestions[word] = suggestions
+            self._suggestions.move_to_end(word)
+            while len(self._suggestions) > self.max_size:
+                self._suggestions.popitem(last=False)
@@ -0,0 +1,112 @@
+import re
+
+from src.backend.paragraph_cache import ParagraphCache
+from src.const.patterns import PATTERN_TYPOGRAPHY_CANDIDATES
+from src.const.typography_issue_types import TYPOGRAPHY_MULTIPLE_SPACES, TYPOGRAPHY_TRAILING_SPACES, \
+    TYPOGRAPHY_MULTIPLE_PUNCTUATION, TYPOGRAPHY_COMPUTER_QUOTE_MARK, TYPOGRAPHY_DANGLING_QUOTE_MARK, \
+    TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK, TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK
+from src.domain.typography_issue import TypographyIssue
+
+TYPOGRAPHY_CANDIDATES_REGEX = re.compile(PATTERN_TYPOGRAPHY_CANDIDATES)
+COMPUTER_QUOTE_MARKS = '"‟'
+LOWER_QUOTE_MARK = '„'
+UPPER_QUOTE_MARK = '“'
+
+
+class TypographyScanner:
+    """
+        Finds all typography issues in single pass over text. One combined pattern finds candidates (runs of spaces,
+        runs of punctuation and quote marks) and candidates are classified by looking at their neighbouring chars.
+        Results are same as results of separate patterns from src.const.patterns.
+        Results of paragraphs are cached, so only changed paragraphs are scanned after partial analysis.
+    """
+
+    def __init__(self, cache_size: int):
+        """
+        Constructor for typography scanner
+        :param cache_size Maximal number of paragraphs with cached results
+        """
+        self.cache = ParagraphCache(cache_size, "typography")
+
+    def scan(self, text: str, paragraph_starts=None):
+        """
+        Find typography issues in text
+        :param text Scanned text
+        :param paragraph_starts Char offsets of paragraphs. If given, results are cached per paragraph
+        """
+        if not paragraph_starts:
+            issues, _ = TypographyScanner._scan_range(text, 0, len(text), False)
+            return issues
+        issues = []
+        consumed = False
+        paragraph_ends = list(paragraph_starts[1:]) + [len(text)]
+        for start, end in zip(paragraph_starts, paragraph_ends):
+            paragraph_issues, consumed = self._scan_paragraph(text, start, end, consumed)
+            issues.extend(paragraph_issues)
+        return issues
+
+    def _scan_paragraph(self, text: str, start: int, end: int, consumed: bool):
+        """Scan paragraph using cache. Result depends also on char before paragraph and on end of text"""
+        if start == 0:
+            before = "^"
+        elif text[start - 1].isspace():
+            before = "s"
+        else:
+            before = "S"
+        key = self.cache.key(f"{before}{int(consumed)}{int(end == len(text))}\0{text[start:end]}")
+        cached = self.cache.get(key)
+        if cached is None:
+            issues, consumed = TypographyScanner._scan_range(text, start, end, consumed)
+            relative_issues = tuple((i.issue_type, i.start - start, i.end - start, i.text) for i in issues)
+            self.cache.put(key, (relative_issues, consumed))
+            return issues, consumed
+        relative_issues, consumed = cached
+        return [TypographyIssue(issue_type, start + s, start + e, t) for issue_type, s, e, t in relative_issues], \
+            consumed
+
+    @staticmethod
+    def _scan_range(text: str, start: int, end: int, consumed: bool):
+        """
+        Find issues with candidates between start and end.
+        Consumed flag tells, that char before start was already used by dangling quote mark.
+        Returns found issues and consumed flag for next range.
+        """
+        issues = []
+        text_length = len(text)
+        # ENDS OF LAST MATCHES. PATTERNS OF QUOTE MARKS USE NEIGHBOURING CHARS, SO MATCHES OF SAME TYPE CAN NOT OVERLAP
+        dangling_end = start if consumed else -1
+        lower_end = -1
+        upper_end = -1
+        for match in TYPOGRAPHY_CANDIDATES_REGEX.finditer(text, start, end):
+            s, e = match.span()
+            group = match.lastgroup
+            if group == "spaces":
+                if e - s >= 2:
+                    issues.append(TypographyIssue(TYPOGRAPHY_MULTIPLE_SPACES, s, e, match.group()))
+                if e == text_length or text[e] == '\n':
+                    issues.append(TypographyIssue(TYPOGRAPHY_TRAILING_SPACES, s, e, match.group()))
+            elif group == "punctuation":
+                issues.append(TypographyIssue(TYPOGRAPHY_MULTIPLE_PUNCTUATION, s, e, match.group()))
+            else:
+                quote = match.group()
+                if quote in COMPUTER_QUOTE_MARKS:
+                    issues.append(TypographyIssue(TYPOGRAPHY_COMPUTER_QUOTE_MARK, s, e, quote))
+                # (\s|^)["„“‟](\s|$)
+                issue_start = None
+                if s > 0 and text[s - 1].isspace() and s - 1 >= dangling_end:
+                    issue_start = s - 1
+                elif s == 0:
+                    issue_start = s
+                if issue_start is not None and (e == text_length or text[e].isspace()):
+                    dangling_end = min(e + 1, text_length)
+                    issues.append(TypographyIssue(TYPOGRAPHY_DANGLING_QUOTE_MARK, issue_start, dangling_end,
+                                                  text[issue_start:dangling_end]))
+                # \S„
+                if quote == LOWER_QUOTE_MARK and s > 0 and not text[s - 1].isspace() and s - 1 >= lower_end:
+                    lower_end = e
+                    issues.append(TypographyIssue(TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK, s - 1, e, text[s - 1:e]))
+                # “\S
+                if quote == UPPER_QUOTE_MARK and e < text_length and not text[e].isspace() and s >= upper_end:
+                    upper_end = e + 1
+                    issues.append(TypographyIssue(TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK, s, e + 1, text[s:e + 1]))
+        return issues, dangling_end == end
@@ -25,6 +25,8 @@ FONT_AWESOME_DIRECTORY = os.path.join(FONTS_DIRECTORY, "fontawesome-free-6.6.0-d
 SPACY_MODELS_DIR = os.path.join(DATA_DIRECTORY, "spacy-models")
 SK_SPACY_MODEL_DIR = os.path.join(SPACY_MODELS_DIR, "sk")
 CURRENT_SK_SPACY_MODEL_DIR = os.path.join(SK_SPACY_MODEL_DIR, SPACY_MODEL_NAME_WITH_VERSION)
+# SNAPSHOTS OF ASSEMBLED NLP PIPELINE
+NLP_SNAPSHOTS_DIR = os.path.join(SPACY_MODELS_DIR, "snapshots")
 MORPHODITA_MODELS_DIR = os.path.join(DATA_DIRECTORY, "morphodita")
 SK_MORPHODITA_MODEL_DIR = os.path.join(MORPHODITA_MODELS_DIR, "slovak-morfflex-pdt-170914")
 SK_MORPHODITA_TAGGER = os.path.join(SK_MORPHODITA_MODEL_DIR, "slovak-morfflex-pdt-170914.tagger")
@@ -37,3 +39,6 @@ SK_SPELL_AFF=os.path.join(SK_SPELL_DICTIONARY_DIR, "sk_SK.aff")
 SK_SPELL_DIC=os.path.join(SK_SPELL_DICTIONARY_DIR, "sk_SK.dic")
 CONFIG_FILE_PATH = os.path.join(DATA_DIRECTORY, "config.json")
 METADATA_FILE_PATH = os.path.join(DATA_DIRECTORY, "metadata.json")
+SPELLCHECK_CACHE_FILE_PATH = os.path.join(DATA_DIRECTORY, "spellcheck_cache.json")
+PROFILE_LOG_FILE_PATH = os.path.join(DATA_DIRECTORY, "analysis_profile.log")
+PROFILE_CAPTURES_DIR = os.path.join(DATA_DIRECTORY, "profiles")
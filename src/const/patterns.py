@@ -6,3 +6,5 @@ PATTERN_DANGLING_QUOTE_MARKS = r'(\s|^)["„“‟](\s|$)'
 PATTERN_INCORRECT_LOWER_QUOTE_MARKS = r'\S[„]'
 PATTERN_INCORRECT_UPPER_QUOTE_MARKS = r'[“]\S'
 PATTERN_UPPER_QUOTE_MARKS_FROM_DIFFERENT_LANGUAGES = r'[‟]'
+# CANDIDATES OF ALL TYPOGRAPHY ISSUES. SINGLE SPACES ARE CANDIDATES ONLY AT END OF LINE
+PATTERN_TYPOGRAPHY_CANDIDATES = r'(?P<spaces> {2,}| +(?=\n|\Z))|(?P<punctuation>[!?.,:;]{2,})|(?P<quote>["„“‟])'
@@ -0,0 +1,7 @@
+TYPOGRAPHY_MULTIPLE_SPACES = 'MULTIPLE_SPACES'
+TYPOGRAPHY_TRAILING_SPACES = 'TRAILING_SPACES'
+TYPOGRAPHY_MULTIPLE_PUNCTUATION = 'MULTIPLE_PUNCTUATION'
+TYPOGRAPHY_COMPUTER_QUOTE_MARK = 'COMPUTER_QUOTE_MARK'
+TYPOGRAPHY_DANGLING_QUOTE_MARK = 'DANGLING_QUOTE_MARK'
+TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK = 'INCORRECT_LOWER_QUOTE_MARK'
+TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK = 'INCORRECT_UPPER_QUOTE_MARK'
@@ -9,9 +9,79 @@ SPACY_MODEL_LINK = (f"https://github.com/MartinHlavna/hector-spacy-model/release
                     f"v.{SPACY_MODEL_VERSION}/{SPACY_MODEL_NAME_WITH_VERSION}.tar.gz")
 MORPHODITA_MODEL_LINK = (f"https://lindat.mff.cuni.cz/repository/xmlui/bitstream/handle/11234/1-3278/"
                          f"{MORPHODITA_MODEL_NAME}.zip")
+# SHA-256 CHECKSUMS OF SPACY AND MORPHODITA MODEL ARCHIVES PUBLISHED WITH RELEASE OF MODEL
+MODEL_CHECKSUMS_LINK = (f"https://github.com/MartinHlavna/hector-spacy-model/releases/download/"
+                        f"v.{SPACY_MODEL_VERSION}/SHA256SUMS")
+SK_THESAURUS_LINK = "https://raw.githubusercontent.com/LibreOffice/dictionaries/refs/heads/master/sk_SK/th_sk_SK_v2.dat"
+SK_SPELL_AFF_LINK = "https://raw.githubusercontent.com/sk-spell/hunspell-sk/refs/heads/master/sk_SK.aff"
+SK_SPELL_DIC_LINK = "https://github.com/sk-spell/hunspell-sk/raw/refs/heads/master/sk_SK.dic"
 NLP_BATCH_SIZE = 8000
+# TEXTS SHORTER THAN THIS NUMBER OF CHARS ARE ALWAYS ANALYZED IN MAIN PROCESS
+NLP_PARALLEL_MIN_TEXT_LENGTH = 20000
+# MAXIMAL NUMBER OF NLP POOL PROCESSES. EVERY PROCESS HOLDS ITS OWN COPY OF MODELS IN MEMORY
+NLP_POOL_MAX_PROCESSES = 4
+# NUMBER OF CHUNKS PER POOL PROCESS. MORE CHUNKS GIVE BETTER LOAD BALANCING, BUT ADD MERGING OVERHEAD
+NLP_PARALLEL_CHUNKS_PER_PROCESS = 2
+# MAXIMAL NUMBER OF ANALYZED PARAGRAPHS KEPT IN MEMORY
+NLP_PARAGRAPH_CACHE_SIZE = 20000
+# MAXIMAL NUMBER OF PARAGRAPHS WITH CACHED TYPOGRAPHY ISSUES
+TYPOGRAPHY_CACHE_SIZE = 20000
+# MAXIMAL NUMBER OF WORDS WITH CACHED SPELLCHECK RESULT
+SPELLCHECK_CACHE_SIZE = 200000
+# MAXIMAL NUMBER OF WORDS WITH CACHED HUNSPELL SUGGESTIONS
+SUGGESTION_CACHE_SIZE = 5000
+# TEXTS LONGER THAN THIS NUMBER OF CHARS ARE HIGHLIGHTED STARTING FROM VISIBLE PART, REST IS HIGHLIGHTED WHEN IDLE
+LAZY_HIGHLIGHT_MIN_TEXT_LENGTH = 100000
+# NUMBER OF CHARS HIGHLIGHTED IN ONE IDLE CALLBACK
+LAZY_HIGHLIGHT_CHUNK_SIZE = 10000
+# NUMBER OF CHARS BEFORE AND AFTER VISIBLE PART THAT ARE HIGHLIGHTED IMMEDIATELY
+LAZY_HIGHLIGHT_MARGIN = 5000
+# EXTENSIONS OF DOCUMENTS ACCEPTED BY HEADLESS BATCH ANALYSIS
+BATCH_ANALYSIS_EXTENSIONS = [".txt", ".docx", ".odt", ".rtf"]
+# EXTENSION OF HECTOR PROJECT FILES
+PROJECT_FILE_EXTENSION = ".hproj"
+# FORMATS OF BATCH ANALYSIS REPORTS
+BATCH_REPORT_FORMAT_JSON = "json"
+BATCH_REPORT_FORMAT_CSV = "csv"
+# DEFAULT ADDRESS OF LOCAL ANALYSIS SERVER
+ANALYSIS_SERVER_HOST = "127.0.0.1"
+ANALYSIS_SERVER_PORT = 8765
+# MAXIMAL NUMBER OF REQUESTS WAITING FOR FREE WORKER OF ANALYSIS SERVER. OTHER REQUESTS ARE REJECTED
+ANALYSIS_SERVER_QUEUE_SIZE = 16
+# MAXIMAL SIZE OF REQUEST BODY IN BYTES
+ANALYSIS_SERVER_MAX_REQUEST_SIZE = 20 * 1024 * 1024
+# NUMBER OF ANALYSIS PROFILES KEPT IN MEMORY FOR DEBUG PANEL
+PROFILE_HISTORY_SIZE = 50
+# MAXIMAL SIZE OF PROFILE LOG FILE IN BYTES AND NUMBER OF ROTATED LOG FILES
+PROFILE_LOG_MAX_BYTES = 1024 * 1024
+PROFILE_LOG_BACKUP_COUNT = 3
+# RESOURCES LOADED IN BACKGROUND DURING STARTUP
+STARTUP_RESOURCE_NLP = "nlp"
+STARTUP_RESOURCE_DICTIONARIES = "dictionaries"
+STARTUP_RESOURCE_PANDOC = "pandoc"
+STARTUP_RESOURCE_UPDATES = "updates"
+# HOW OFTEN GUI CHECKS STATE OF STARTUP LOADING IN MILISECONDS
+STARTUP_POLL_INTERVAL = 100
+# NUMBER OF FILES DOWNLOADED CONCURRENTLY
+DOWNLOAD_WORKERS = 5
+# SIZE OF CHUNK WRITTEN TO DISK DURING DOWNLOAD IN BYTES
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# NUMBER OF ATTEMPTS TO DOWNLOAD FILE. EVERY ATTEMPT RESUMES PARTIAL DOWNLOAD OF PREVIOUS ONE
+DOWNLOAD_ATTEMPTS = 3
+# TIMEOUT OF CONNECTION AND OF WAITING FOR DATA IN SECONDS
+DOWNLOAD_TIMEOUT = 30
+# SUFFIX OF PARTIALLY DOWNLOADED FILES
+DOWNLOAD_PART_SUFFIX = ".part"
+# SUFFIX OF FILE WITH ETAG OR LAST-MODIFIED OF PARTIALLY DOWNLOADED FILE. PART FILE IS RESUMED ONLY IF IT STILL MATCHES
+DOWNLOAD_VALIDATOR_SUFFIX = ".validator"
+# NAME OF FILE WITH SHA-256 CHECKSUMS IN MIRROR DIRECTORY. SAME FORMAT AS OUTPUT OF sha256sum
+MIRROR_CHECKSUMS_FILE_NAME = "SHA256SUMS"
 VERSION = "1.2.0"
 GITHUB_REPO = "MartinHlavna/hector"
 CURRENT_PROJECT_VERSION = 1
 # A4 SIZE IN INCHES. WE LATER USE DPI TO SET EDITOR WIDTH
 A4_SIZE_INCHES = 8.27
+# NUMBER OF CHARS OF IMPORTED DOCUMENT PASSED TO ANALYSIS AT ONCE WHILE IMPORT IS STILL RUNNING
+IMPORT_ANALYSIS_BATCH_SIZE = 50000
+# HOW OFTEN GUI CHECKS PROGRESS OF DOCUMENT IMPORT IN MILISECONDS
+IMPORT_POLL_INTERVAL = 100
@@ -0,0 +1,42 @@
+from src.domain.config import Config
+
+
+class AnalysisRequest:
+    """Snapshot of editor state that is sent to background analysis"""
+
+    def __init__(self, revision: int, text: str, previous_doc, config: Config, force_full_analysis=False):
+        # REVISION OF REQUEST. HIGHER REVISION MEANS NEWER REQUEST
+        self.revision = revision
+        # TEXT SNAPSHOT TAKEN FROM EDITOR
+        self.text = text
+        # LAST APPLIED NLP DOCUMENT. USED AS BASE FOR PARTIAL ANALYSIS
+        self.previous_doc = previous_doc
+        # CONFIG SELECTED AT TIME OF REQUEST
+        self.config = config
+        # SKIP PARTIAL ANALYSIS
+        self.force_full_analysis = force_full_analysis
+
+
+class AnalysisResult:
+    """Result of background analysis, that is ready to be applied in GUI thread"""
+
+    def __init__(self, revision: int, text: str, doc, config: Config, full_analysis: bool, close_words=None,
+                 spellcheck_timings=None, typography_issues=None):
+        # REVISION OF REQUEST THAT PRODUCED THIS RESULT
+        self.revision = revision
+        # TEXT THAT WAS ANALYZED
+        self.text = text
+        # ANALYZED NLP DOCUMENT
+        self.doc = doc
+        # CONFIG USED FOR ANALYSIS
+        self.config = config
+        # TRUE IF DOCUMENT WAS ANALYZED FROM SCRATCH
+        self.full_analysis = full_analysis
+        # CLOSE WORDS WITH THEIR REPETITION GROUPS
+        self.close_words = close_words if close_words is not None else {}
+        # TIME IN SECONDS SPENT BY EACH SPELLCHECK RULE
+        self.spellcheck_timings = spellcheck_timings if spellcheck_timings is not None else {}
+        # TYPOGRAPHY ISSUES FOUND IN TEXT
+        self.typography_issues = typography_issues if typography_issues is not None else []
+        # MEASUREMENTS OF ANALYSIS STAGES. NONE IF PROFILER IS DISABLED
+        self.profile = None
@@ -0,0 +1,58 @@
+import datetime
+
+
+class StageTiming:
+    """Measurement of single stage of analysis"""
+
+    def __init__(self, name: str, duration: float, tokens=None, allocated_blocks=None):
+        # NAME OF STAGE. NESTED STAGES ARE PREFIXED BY NAME OF PARENT STAGE
+        self.name = name
+        # WALL TIME IN SECONDS
+        self.duration = duration
+        # NUMBER OF TOKENS PROCESSED BY STAGE, IF KNOWN
+        self.tokens = tokens
+        # NUMBER OF MEMORY BLOCKS ALLOCATED BY STAGE AND NOT FREED BEFORE ITS END
+        self.allocated_blocks = allocated_blocks
+
+    def to_dict(self):
+        """
+        Exports the current state of the object to a dictionary.
+
+        :return: Dictionary containing the current state of the object.
+        """
+        return {
+            "name": self.name,
+            "duration": self.duration,
+            "tokens": self.tokens,
+            "allocated_blocks": self.allocated_blocks
+        }
+
+
+class AnalysisProfile:
+    """Measurements of all stages of single analysis run"""
+
+    def __init__(self, revision: int):
+        # REVISION OF ANALYSIS REQUEST
+        self.revision = revision
+        self.started_at = datetime.datetime.now()
+        self.stages = []
+        # PATH OF CPROFILE OR PYINSTRUMENT CAPTURE OF THIS RUN, IF ANY
+        self.capture_path = None
+
+    def total(self):
+        """Sum of durations of top level stages"""
+        return sum(stage.duration for stage in self.stages if "." not in stage.name)
+
+    def to_dict(self):
+        """
+        Exports the current state of the object to a dictionary.
+
+        :return: Dictionary containing the current state of the object.
+        """
+        return {
+            "revision": self.revision,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "total": self.total(),
+            "stages": [stage.to_dict() for stage in self.stages],
+            "capture_path": self.capture_path
+        }
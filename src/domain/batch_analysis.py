@@ -0,0 +1,78 @@
+from src.domain.config import Config
+
+
+class BatchSource:
+    """Single document analyzed by headless batch analysis"""
+
+    def __init__(self, name: str, path: str, config: Config, project_path: str = None):
+        # NAME OF DOCUMENT DISPLAYED IN REPORT
+        self.name = name
+        # PATH OF DOCUMENT. FOR PROJECT ITEMS IT IS PATH OF HTEXT FILE
+        self.path = path
+        # CONFIG USED FOR ANALYSIS OF DOCUMENT
+        self.config = config
+        # PATH OF PROJECT THAT CONTAINS DOCUMENT, NONE FOR STANDALONE DOCUMENTS
+        self.project_path = project_path
+
+
+class BatchReport:
+    """Result of analysis of single document in headless batch analysis"""
+
+    # COLUMNS OF CSV REPORT
+    CSV_COLUMNS = ["name", "path", "project_path", "error", "characters", "words", "unique_words", "pages",
+                   "readability", "long_sentences", "mid_sentences", "grammar_errors", "typography_issues",
+                   "close_words", "duration"]
+
+    def __init__(self, source: BatchSource):
+        self.name = source.name
+        self.path = source.path
+        self.project_path = source.project_path
+        # MESSAGE OF ERROR THAT STOPPED ANALYSIS
+        self.error = None
+        self.characters = 0
+        self.words = 0
+        self.unique_words = 0
+        self.pages = 0
+        self.readability = 0
+        self.long_sentences = 0
+        self.mid_sentences = 0
+        # LIST OF DICTIONARIES WITH TEXT, TYPE AND POSITION OF ERROR
+        self.grammar_errors = []
+        # LIST OF DICTIONARIES WITH TEXT, TYPE AND POSITION OF ISSUE
+        self.typography_issues = []
+        # NUMBER OF OCCOURENCES OF EACH CLOSE WORD
+        self.close_words = {}
+        # TIME IN SECONDS SPENT BY ANALYSIS OF DOCUMENT
+        self.duration = 0
+
+    def to_dict(self) -> dict:
+        """
+        Exports the current state of the object to a dictionary.
+
+        :return: Dictionary containing the current state of the object.
+        """
+        return {
+            "name": self.name,
+            "path": self.path,
+            "project_path": self.project_path,
+            "error": self.error,
+            "characters": self.characters,
+            "words": self.words,
+            "unique_words": self.unique_words,
+            "pages": self.pages,
+            "readability": self.readability,
+            "long_sentences": self.long_sentences,
+            "mid_sentences": self.mid_sentences,
+            "grammar_errors": self.grammar_errors,
+            "typography_issues": self.typography_issues,
+            "close_words": self.close_words,
+            "duration": self.duration
+        }
+
+    def to_csv_row(self) -> list:
+        """Export report as single CSV row. Lists of errors and issues are replaced by their counts"""
+        data = self.to_dict()
+        data["grammar_errors"] = len(self.grammar_errors)
+        data["typography_issues"] = len(self.typography_issues)
+        data["close_words"] = len(self.close_words)
+        return [data[column] for column in BatchReport.CSV_COLUMNS]
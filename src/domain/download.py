@@ -0,0 +1,21 @@
+import os
+
+
+class Download:
+    """File downloaded by DownloadService"""
+
+    def __init__(self, url: str, path: str, sha256: str = None, headers: dict = None, checksums_url: str = None):
+        self.url = url
+        # PATH FILE IS SAVED TO. FILE IS CREATED ONLY AFTER DOWNLOAD IS FINISHED AND VERIFIED
+        self.path = path
+        # EXPECTED SHA-256 CHECKSUM. IF NOT GIVEN, CHECKSUM FROM MIRROR DIRECTORY OR PUBLISHED CHECKSUMS FILE IS USED
+        self.sha256 = sha256
+        # URL OF PUBLISHED CHECKSUMS FILE IN SAME FORMAT AS OUTPUT OF sha256sum
+        self.checksums_url = checksums_url
+        # EXTRA HTTP HEADERS, E.G. AUTHORIZATION
+        self.headers = headers or {}
+
+    @property
+    def file_name(self):
+        """Name of file. Files in mirror directory are looked up by this name"""
+        return os.path.basename(self.path)
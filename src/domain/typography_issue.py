@@ -0,0 +1,19 @@
+class TypographyIssue:
+    """Typography issue found in text. Offsets are char offsets relative to scanned text"""
+
+    def __init__(self, issue_type: str, start: int, end: int, text: str):
+        self.issue_type = issue_type
+        self.start = start
+        self.end = end
+        # MATCHED TEXT
+        self.text = text
+
+    def __eq__(self, other):
+        return (isinstance(other, TypographyIssue) and self.issue_type == other.issue_type
+                and self.start == other.start and self.end == other.end)
+
+    def __hash__(self):
+        return hash((self.issue_type, self.start, self.end))
+
+    def __repr__(self):
+        return f"TypographyIssue({self.issue_type}, {self.start}, {self.end})"
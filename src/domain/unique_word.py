@@ -1,6 +1,80 @@
+from array import array
+
+
 class UniqueWord:
-    """Unique word with it's occourences"""
+    """
+        Unique word with it's occourences. Occourences are stored in compact integer arrays,
+        spaCy tokens are created only when they are accessed
+    """
 
-    def __init__(self, text):
+    def __init__(self, text, doc=None, count=None, resolve=None):
         self.text = text
-        self.occourences = []
+        # DOCUMENT THAT CONTAINS OCCOURENCES
+        self.doc = doc
+        # TOKEN INDEXES OF OCCOURENCES
+        self._token_indexes = array('q')
+        # CHAR OFFSETS OF OCCOURENCES
+        self._char_offsets = array('q')
+        # LENGTHS OF OCCOURENCES IN CHARS
+        self._lengths = array('q')
+        # GLOBAL WORD INDEXES OF OCCOURENCES IN ASCENDING ORDER
+        self._word_indexes = array('q')
+        # NUMBER OF OCCOURENCES, THAT ARE NOT RESOLVED YET
+        self._count = count
+        # CALLABLE THAT APPENDS OCCOURENCES TO GIVEN UNIQUE WORD. NONE MEANS OCCOURENCES ARE ADDED BY append
+        self._resolve = resolve
+
+    def append(self, token_index: int, char_offset: int, length: int, word_index: int):
+        """Add occourence"""
+        self._token_indexes.append(token_index)
+        self._char_offsets.append(char_offset)
+        self._lengths.append(length)
+        self._word_indexes.append(word_index)
+
+    @property
+    def token_indexes(self):
+        self._load()
+        return self._token_indexes
+
+    @property
+    def char_offsets(self):
+        self._load()
+        return self._char_offsets
+
+    @property
+    def lengths(self):
+        self._load()
+        return self._lengths
+
+    @property
+    def word_indexes(self):
+        self._load()
+        return self._word_indexes
+
+    def token(self, i: int):
+        """Get token of i-th occourence"""
+        return self.doc[self.token_indexes[i]]
+
+    @property
+    def occourences(self):
+        """Tokens of all occourences. List is created on every access, so prefer arrays where possible"""
+        return [self.doc[token_index] for token_index in self.token_indexes]
+
+    def _load(self):
+        """Resolve occourences on first access"""
+        resolve = self._resolve
+        if resolve is None:
+            return
+        # OCCOURENCES ARE RESOLVED TO SEPARATE ARRAYS, SO OTHER THREADS NEVER SEE THEM HALF FILLED
+        resolved = UniqueWord(self.text)
+        resolve(resolved)
+        self._token_indexes = resolved._token_indexes
+        self._char_offsets = resolved._char_offsets
+        self._lengths = resolved._lengths
+        self._word_indexes = resolved._word_indexes
+        self._resolve = None
+
+    def __len__(self):
+        if self._resolve is not None:
+            return self._count
+        return len(self._token_indexes)
@@ -0,0 +1,92 @@
+import tkinter as tk
+from tkinter import ttk
+
+from src.backend.profiler import Profiler, CAPTURE_CPROFILE, CAPTURE_PYINSTRUMENT, pyinstrument
+from src.const.colors import TEXT_EDITOR_FRAME_BG, PANEL_TEXT_COLOR, PRIMARY_COLOR, TEXT_EDITOR_BG, EDITOR_TEXT_COLOR
+from src.const.fonts import BOLD_FONT
+from src.const.paths import PROFILE_LOG_FILE_PATH
+from src.gui.widgets.hector_button import HectorButton
+
+# HOW OFTEN IS LIST OF PROFILES REFRESHED IN MILISECONDS
+PROFILER_REFRESH_INTERVAL = 1000
+
+
+class ProfilerModal:
+    """Debug panel with measurements of last analysis runs"""
+
+    def __init__(self, root, on_capture):
+        self.root = root
+        self.on_capture = on_capture
+        self.displayed_profile = None
+        self.refresh_timer = None
+        self.toplevel = tk.Toplevel(self.root, background=TEXT_EDITOR_FRAME_BG)
+        self.toplevel.title("Meranie výkonu analýzy")
+        self.toplevel.columnconfigure(0, weight=1)
+        self.toplevel.rowconfigure(2, weight=1)
+        row = 0
+        self.enabled_var = tk.BooleanVar(value=Profiler.enabled)
+        ttk.Checkbutton(self.toplevel, text="Merať trvanie analýzy", variable=self.enabled_var,
+                        command=self.toggle_profiler, style='hector.TCheckbutton', cursor="hand2").grid(
+            row=row, column=0, padx=10, pady=(10, 2), sticky='w'
+        )
+        row += 1
+        buttons = tk.Frame(self.toplevel, background=TEXT_EDITOR_FRAME_BG)
+        buttons.grid(row=row, column=0, padx=10, pady=2, sticky='w')
+        HectorButton(buttons, text="Zachytiť cProfile", command=lambda: self.capture(CAPTURE_CPROFILE),
+                     cursor="hand2", background=PRIMARY_COLOR, foreground=PANEL_TEXT_COLOR, relief=tk.FLAT,
+                     borderwidth=0, padx=10, pady=5).pack(side=tk.LEFT, padx=(0, 10))
+        if pyinstrument is not None:
+            HectorButton(buttons, text="Zachytiť pyinstrument", command=lambda: self.capture(CAPTURE_PYINSTRUMENT),
+                         cursor="hand2", background=PRIMARY_COLOR, foreground=PANEL_TEXT_COLOR, relief=tk.FLAT,
+                         borderwidth=0, padx=10, pady=5).pack(side=tk.LEFT, padx=(0, 10))
+        tk.Label(buttons, text=f"Záznam: {PROFILE_LOG_FILE_PATH}", anchor='w', background=TEXT_EDITOR_FRAME_BG,
+                 foreground=PANEL_TEXT_COLOR).pack(side=tk.LEFT)
+        row += 1
+        self.text = tk.Text(self.toplevel, wrap=tk.NONE, background=TEXT_EDITOR_BG, foreground=EDITOR_TEXT_COLOR,
+                            font=("Courier", 10), borderwidth=0, highlightthickness=0)
+        self.text.grid(row=row, column=0, padx=10, pady=10, sticky='nsew')
+        self.text.tag_configure("header", font=("Courier", 10, BOLD_FONT))
+        self.toplevel.bind("<Destroy>", self.on_destroy)
+        self.refresh()
+
+    def toggle_profiler(self):
+        Profiler.enabled = self.enabled_var.get()
+
+    def capture(self, capture_format):
+        """Capture next analysis and run it immediately"""
+        Profiler.enabled = True
+        self.enabled_var.set(True)
+        Profiler.request_capture(capture_format)
+        self.on_capture()
+
+    def refresh(self):
+        """Display profiles, if new profile has finished"""
+        self.refresh_timer = self.toplevel.after(PROFILER_REFRESH_INTERVAL, self.refresh)
+        newest = Profiler.history[0] if len(Profiler.history) > 0 else None
+        if newest is self.displayed_profile:
+            return
+        self.displayed_profile = newest
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        if newest is None:
+            self.text.insert(tk.END, "Zatiaľ nebola zmeraná žiadna analýza.")
+        else:
+            self.text.insert(tk.END, f"  {'etapa':<48}{'trvanie':>13}{'tokeny':>10}{'bloky':>12}\n\n")
+        for profile in Profiler.history:
+            self.text.insert(tk.END, f"{profile.started_at.strftime('%H:%M:%S')}  revízia {profile.revision}  "
+                                     f"spolu {profile.total() * 1000:.1f} ms\n", "header")
+            if profile.capture_path is not None:
+                self.text.insert(tk.END, f"  {profile.capture_path}\n")
+            for stage in profile.stages:
+                indent = "  " * stage.name.count(".")
+                tokens = stage.tokens if stage.tokens is not None else ""
+                blocks = stage.allocated_blocks if stage.allocated_blocks is not None else ""
+                self.text.insert(tk.END, f"  {indent + stage.name:<48}{stage.duration * 1000:>10.1f} ms"
+                                         f"{tokens:>10}{blocks:>12}\n")
+            self.text.insert(tk.END, "\n")
+        self.text.config(state=tk.DISABLED)
+
+    def on_destroy(self, event):
+        if event.widget is self.toplevel and self.refresh_timer is not None:
+            self.toplevel.after_cancel(self.refresh_timer)
+            self.refresh_timer = None
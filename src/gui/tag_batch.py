@@ -0,0 +1,137 @@
+import bisect
+import itertools
+
+# MAXIMAL NUMBER OF RANGES PASSED TO SINGLE TCL CALL
+TAG_BATCH_CHUNK_SIZE = 5000
+
+
+class TagBatch:
+    """
+        Collects tag ranges given by char offsets and applies them to tkinter text widget in bulk.
+        Offsets are converted to line.column indexes using precomputed table of line starts, so Tk does not need to
+        resolve "1.0 + N chars" from start of buffer for every range. All ranges of one tag are added by single call.
+    """
+
+    def __init__(self, text: str):
+        """
+        Constructor for tag batch
+        :param text Text displayed in widget. Offsets of ranges are relative to start of this text
+        """
+        self.length = len(text)
+        self.line_starts = [0]
+        self.line_starts.extend(i + 1 for i, c in enumerate(text) if c == '\n')
+        self.ranges = {}
+
+    def index(self, offset: int):
+        """Convert char offset to tkinter line.column index"""
+        line = bisect.bisect_right(self.line_starts, offset)
+        return f"{line}.{offset - self.line_starts[line - 1]}"
+
+    def offset(self, index):
+        """Convert tkinter line.column index to char offset"""
+        line, column = str(index).split(".")
+        return self.line_starts[int(line) - 1] + int(column)
+
+    def line(self, offset: int):
+        """Get number of line that contains char offset"""
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def add(self, tag_name: str, start: int, end: int):
+        """Add range of tag. Empty ranges are ignored"""
+        if end > start:
+            self.ranges.setdefault(tag_name, []).append((start, end))
+
+    def coverage(self, tag_name: str):
+        """Get sorted ranges of tag with overlapping and adjacent ranges merged, the same way as Tk stores them"""
+        return merge_ranges(self.ranges.get(tag_name, []))
+
+    def indexes(self, tag_name: str):
+        """Get flat list of start and end indexes of all ranges of tag"""
+        return self.ranges_to_indexes(self.ranges.get(tag_name, []))
+
+    def ranges_to_indexes(self, ranges: list):
+        """Convert list of ranges to flat list of start and end indexes"""
+        return list(itertools.chain.from_iterable((self.index(start), self.index(end)) for start, end in ranges))
+
+    def apply(self, text_widget):
+        """Add all collected ranges to text widget"""
+        for tag_name in self.ranges:
+            TagBatch.add_indexes(text_widget, tag_name, self.indexes(tag_name))
+
+    @staticmethod
+    def add_indexes(text_widget, tag_name: str, indexes: list):
+        """Add tag to multiple ranges given as flat list of indexes using as few Tcl calls as possible"""
+        step = TAG_BATCH_CHUNK_SIZE * 2
+        for i in range(0, len(indexes), step):
+            text_widget.tag_add(tag_name, *indexes[i:i + step])
+
+    @staticmethod
+    def remove_indexes(text_widget, tag_name: str, indexes: list):
+        """Remove tag from multiple ranges given as flat list of indexes"""
+        step = TAG_BATCH_CHUNK_SIZE * 2
+        for i in range(0, len(indexes), step):
+            # TKINTER WRAPPER OF TAG REMOVE ACCEPTS ONLY ONE RANGE
+            text_widget.tk.call(text_widget._w, 'tag', 'remove', tag_name, *indexes[i:i + step])
+
+
+class PaintedTags:
+    """
+        Names of tags that were painted to text widget by tag batches.
+        When new batch is painted, current ranges of these tags are read from widget (widget moves tags together with
+        edited text) and only ranges that were removed or added are sent to widget.
+        Tags that are not painted by tag batches are never touched.
+    """
+
+    def __init__(self):
+        self.tag_names = set()
+
+    def reset(self):
+        """Forget painted tags. Should be called when tags were deleted from widget by other means"""
+        self.tag_names = set()
+
+    def paint(self, text_widget, batch: TagBatch):
+        """Update widget, so it displays exactly ranges of given batch"""
+        for tag_name in self.tag_names | set(batch.ranges):
+            new_ranges = batch.coverage(tag_name)
+            old_ranges = []
+            if tag_name in self.tag_names:
+                indexes = text_widget.tag_ranges(tag_name)
+                old_ranges = [(batch.offset(indexes[i]), batch.offset(indexes[i + 1]))
+                              for i in range(0, len(indexes), 2)]
+            removed = subtract_ranges(old_ranges, new_ranges)
+            added = subtract_ranges(new_ranges, old_ranges)
+            if removed:
+                TagBatch.remove_indexes(text_widget, tag_name, batch.ranges_to_indexes(removed))
+            if added:
+                TagBatch.add_indexes(text_widget, tag_name, batch.ranges_to_indexes(added))
+        self.tag_names = set(batch.ranges)
+
+
+def merge_ranges(ranges: list):
+    """Sort ranges and merge overlapping and adjacent ones"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(ranges: list, other: list):
+    """Get parts of merged ranges that are not covered by other merged ranges"""
+    result = []
+    j = 0
+    for start, end in ranges:
+        while j < len(other) and other[j][1] <= start:
+            j += 1
+        k = j
+        while start < end and k < len(other) and other[k][0] < end:
+            if other[k][0] > start:
+                result.append((start, other[k][0]))
+            start = max(start, other[k][1])
+            k += 1
+        if start < end:
+            result.append((start, end))
+    return result
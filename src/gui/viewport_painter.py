@@ -0,0 +1,96 @@
+from src.const.values import LAZY_HIGHLIGHT_MIN_TEXT_LENGTH, LAZY_HIGHLIGHT_CHUNK_SIZE, LAZY_HIGHLIGHT_MARGIN
+from src.gui.tag_batch import TagBatch, PaintedTags
+
+
+class ViewportPainter:
+    """
+        Paints tag batches to text widget. When nothing is painted yet and text is long, only visible part of text is
+        painted immediately (together with small margin). Rest of text is painted in small chunks when application is
+        idle, starting with chunks closest to the visible part. Chunks that become visible are painted immediately.
+        Offsets of pending chunks are valid only for text of batch, so painting must be cancelled when text changes.
+    """
+
+    def __init__(self, root, text_widget):
+        """
+        Constructor for viewport painter
+        :param root tkinter root widget used for scheduling idle callbacks
+        :param text_widget Text widget that is painted
+        """
+        self.root = root
+        self.text_widget = text_widget
+        self.painted_tags = PaintedTags()
+        self.batch = None
+        # RANGES OF PENDING CHUNKS. KEY IS INDEX OF CHUNK, VALUE IS DICTIONARY OF RANGES BY TAG NAME
+        self.pending_chunks = {}
+        self.idle_job = None
+
+    def paint(self, batch: TagBatch):
+        """Paint batch. If painting of previous batch is not finished yet, it is cancelled"""
+        self.cancel()
+        if self.painted_tags.tag_names or batch.length < LAZY_HIGHLIGHT_MIN_TEXT_LENGTH:
+            # PREVIOUS RANGES ARE READ FROM WIDGET, SO ONLY DIFFERENCES ARE PAINTED
+            self.painted_tags.paint(self.text_widget, batch)
+            return
+        # NOTHING IS PAINTED, SO RANGES CAN BE ONLY ADDED. TAGS ARE MARKED AS PAINTED IMMEDIATELY,
+        # SO NEXT PAINT REMOVES ALSO RANGES OF CHUNKS THAT WERE PAINTED LATER
+        self.painted_tags.tag_names = set(batch.ranges)
+        self.batch = batch
+        self.pending_chunks = {}
+        for tag_name, ranges in batch.ranges.items():
+            for start, end in ranges:
+                for chunk in range(start // LAZY_HIGHLIGHT_CHUNK_SIZE, (end - 1) // LAZY_HIGHLIGHT_CHUNK_SIZE + 1):
+                    chunk_start = chunk * LAZY_HIGHLIGHT_CHUNK_SIZE
+                    chunk_ranges = self.pending_chunks.setdefault(chunk, {}).setdefault(tag_name, [])
+                    chunk_ranges.append((max(start, chunk_start), min(end, chunk_start + LAZY_HIGHLIGHT_CHUNK_SIZE)))
+        self.paint_visible()
+        self._schedule()
+
+    def paint_visible(self):
+        """Immediately paint pending chunks that are visible. Should be called whenever widget is scrolled"""
+        if self.batch is None:
+            return
+        first_visible, last_visible = self._visible_range()
+        first_chunk = max(0, first_visible - LAZY_HIGHLIGHT_MARGIN) // LAZY_HIGHLIGHT_CHUNK_SIZE
+        last_chunk = (last_visible + LAZY_HIGHLIGHT_MARGIN) // LAZY_HIGHLIGHT_CHUNK_SIZE
+        for chunk in range(first_chunk, last_chunk + 1):
+            if chunk in self.pending_chunks:
+                self._paint_chunk(chunk)
+
+    def cancel(self):
+        """Stop painting of pending chunks"""
+        if self.idle_job is not None:
+            self.root.after_cancel(self.idle_job)
+            self.idle_job = None
+        self.batch = None
+        self.pending_chunks = {}
+
+    def reset(self):
+        """Forget painted tags. Should be called when tags were deleted from widget by other means"""
+        self.cancel()
+        self.painted_tags.reset()
+
+    def _schedule(self):
+        if self.pending_chunks and self.idle_job is None:
+            self.idle_job = self.root.after_idle(self._paint_next_chunk)
+
+    def _paint_next_chunk(self):
+        """Paint chunk closest to visible part of text"""
+        self.idle_job = None
+        if self.batch is None or not self.pending_chunks:
+            return
+        visible_chunk = self._visible_range()[0] // LAZY_HIGHLIGHT_CHUNK_SIZE
+        self._paint_chunk(min(self.pending_chunks, key=lambda c: abs(c - visible_chunk)))
+        if self.pending_chunks:
+            self._schedule()
+        else:
+            self.batch = None
+
+    def _paint_chunk(self, chunk: int):
+        for tag_name, ranges in self.pending_chunks.pop(chunk).items():
+            TagBatch.add_indexes(self.text_widget, tag_name, self.batch.ranges_to_indexes(ranges))
+
+    def _visible_range(self):
+        """Get char offsets of first and last visible char"""
+        first_visible = self.batch.offset(self.text_widget.index("@0,0"))
+        last_visible = self.batch.offset(self.text_widget.index(f"@0,{self.text_widget.winfo_height()} lineend"))
+        return first_visible, last_visible
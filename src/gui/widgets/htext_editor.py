@@ -7,11 +7,15 @@ from tkinter import ttk
 from spacy.tokens import Doc
 from tkinter_autoscrollbar import AutoScrollbar
 
+from src.backend.analysis_worker import AnalysisWorker
+from src.backend.profiler import Profiler
 from src.backend.run_context import RunContext
+from src.backend.service.analysis_service import AnalysisService
 from src.backend.service.config_service import ConfigService
 from src.backend.service.import_service import ImportService
 from src.backend.service.nlp_service import NlpService
 from src.backend.service.spellcheck_service import SpellcheckService
+from src.backend.suggestion_worker import SuggestionWorker
 from src.const.colors import TEXT_EDITOR_BG, ACCENT_2_COLOR, LIGHT_WHITE, EDITOR_TEXT_COLOR, PRIMARY_COLOR, \
     PANEL_TEXT_COLOR, LONG_SENTENCE_HIGHLIGHT_COLOR_MID, LONG_SENTENCE_HIGHLIGHT_COLOR_HIGH, \
     SEARCH_RESULT_HIGHLIGHT_COLOR, CURRENT_SEARCH_RESULT_HIGHLIGHT_COLOR, CLOSE_WORDS_PALLETE
@@ -27,15 +31,25 @@ from src.const.tags import ITALIC_TAG_NAME, BOLD_TAG_NAME, CLOSE_WORD_PREFIX, SE
     LONG_SENTENCE_TAG_NAME_HIGH, TRAILING_SPACES_TAG_NAME, COMPUTER_QUOTE_MARKS_TAG_NAME, DANGLING_QUOTE_MARK_TAG_NAME, \
     SHOULD_USE_LOWER_QUOTE_MARK_TAG_NAME, SHOULD_USE_UPPER_QUOTE_MARK_TAG_NAME, MULTIPLE_PUNCTUATION_TAG_NAME, \
     MULTIPLE_SPACES_TAG_NAME, GRAMMAR_ERROR_TAG_NAME, CLOSE_WORD_TAG_NAME, CLOSE_WORD_RANGE_PREFIX, BOLD_ITALIC_TAG_NAME
-from src.const.values import A4_SIZE_INCHES, NLP_BATCH_SIZE, READABILITY_MAX_VALUE
+from src.const.typography_issue_types import TYPOGRAPHY_MULTIPLE_SPACES, TYPOGRAPHY_TRAILING_SPACES, \
+    TYPOGRAPHY_MULTIPLE_PUNCTUATION, TYPOGRAPHY_COMPUTER_QUOTE_MARK, TYPOGRAPHY_DANGLING_QUOTE_MARK, \
+    TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK, TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK
+from src.const.values import A4_SIZE_INCHES, READABILITY_MAX_VALUE, SUGGESTION_CACHE_SIZE, \
+    STARTUP_RESOURCE_NLP, STARTUP_RESOURCE_DICTIONARIES
+from src.domain.analysis import AnalysisRequest, AnalysisResult
 from src.domain.config import Config
 from src.domain.htext_file import HTextFormattingTag
 from src.gui.gui_utils import GuiUtils
+from src.gui.tag_batch import TagBatch
+from src.gui.viewport_painter import ViewportPainter
 from src.gui.widgets.hector_button import HectorButton
 from src.gui.widgets.tooltip import Tooltip
 from src.utils import Utils
 
 NLP_DEBOUNCE_LENGTH = 500
+ANALYSIS_POLL_INTERVAL = 50
+SUGGESTION_POLL_INTERVAL = 50
+SUGGESTION_PLACEHOLDER = "hľadám návrhy..."
 
 
 class HTextEditor:
@@ -82,6 +96,19 @@ class HTextEditor:
         self.close_word_colors = {}
         # TIMERS FOR DEBOUNCING CHANGE EVENTS
         self.analyze_text_debounce_timer = None
+        # BACKGROUND ANALYSIS
+        self.revision = 0
+        self.last_submitted_text = None
+        self.analysis_poll_timer = None
+        self.analysis_worker = AnalysisWorker(self._run_analysis)
+        self.analysis_worker.start()
+        # IMPORT WORKER WHOSE PARAGRAPHS ARE ANALYZED IN BACKGROUND. SET BY MAIN WINDOW WHEN DOCUMENT IS IMPORTED
+        self.pending_import = None
+        # BACKGROUND HUNSPELL SUGGESTIONS
+        self.suggestion_worker = SuggestionWorker(self._suggest, SUGGESTION_CACHE_SIZE)
+        self.suggestion_worker.start()
+        self.suggestion_poll_timer = None
+        self.pending_tooltip = None
         # EDITOR TEXT SIZE
         self.text_size = 10
         # SEARCH DATA
@@ -92,6 +119,8 @@ class HTextEditor:
         # CLOSE WORDS METADATA
         self.close_words = {}
         self.highlighted_word = None
+        # TYPOGRAPHY ISSUES FOUND BY LAST ANALYSIS
+        self.typography_issues = []
         # GUI INITIALIZATION
         dpi = self.root.winfo_fpixels('1i')
         text_editor_scroll_frame = tk.Frame(text_editor_frame, width=10, relief=tk.FLAT, background=PRIMARY_COLOR)
@@ -145,7 +174,7 @@ class HTextEditor:
             cursor="hand2"
         ).pack(side=tk.RIGHT)
         self.text_editor = tk.Text(text_editor_outer_frame, wrap=tk.WORD, relief=tk.RAISED, highlightthickness=0,
-                                   yscrollcommand=text_editor_scroll.set, background=TEXT_EDITOR_BG,
+                                   yscrollcommand=self._on_editor_scroll, background=TEXT_EDITOR_BG,
                                    foreground=EDITOR_TEXT_COLOR, borderwidth=0,
                                    spacing1=1.2, spacing2=1.2, spacing3=1.2, undo=True, autoseparators=True, maxundo=-1,
                                    insertbackground=PANEL_TEXT_COLOR)
@@ -153,6 +182,10 @@ class HTextEditor:
         self.text_editor.pack(expand=1, fill=tk.BOTH, padx=20, pady=20)
         text_editor_outer_frame.pack_propagate(False)
         text_editor_scroll.config(command=self.text_editor.yview)
+        self.text_editor_scroll = text_editor_scroll
+        # TAGS PAINTED AFTER ANALYSIS. ONLY CHANGED RANGES ARE REPAINTED AFTER PARTIAL ANALYSIS
+        self.analysis_painter = ViewportPainter(self.root, self.text_editor)
+        self.frequent_word_painter = ViewportPainter(self.root, self.text_editor)
 
     def bind_events(self):
         """Apply mouse and keyboard bindings"""
@@ -164,6 +197,7 @@ class HTextEditor:
         self.text_editor.unbind('<Control-Shift-Z>')
         self.text_editor.bind("<Return>", self._on_enter)
         self.text_editor.bind("<KeyRelease>", self._on_typing_done)
+        self.text_editor.bind("<<Modified>>", self._on_text_modified)
         self.text_editor.bind("<Button-1>", lambda e: self.root.after(0, self.on_word_selected))
         self.text_editor.bind("<Control-a>", self.select_all)
         self.text_editor.bind("<Control-A>", self.select_all)
@@ -273,6 +307,11 @@ class HTextEditor:
         """Add tag"""
         self.text_editor.tag_add(tag_name, start_index, end_index)
 
+    # noinspection PyMethodMayBeStatic
+    def apply_tag_batch(self, batch: TagBatch, painter: ViewportPainter):
+        """Update tags, so they match ranges collected in tag batch"""
+        painter.paint(batch)
+
     def tag_bind(self, tag_name, event_name, func):
         """Bind tag to event"""
         self.text_editor.tag_bind(tag_name, event_name, func)
@@ -290,6 +329,8 @@ class HTextEditor:
         for tag in self.text_editor.tag_names():
             if tag != PARAGRAPH_TAG_NAME and tag not in FORMATTING_TAGS:
                 self.text_editor.tag_delete(tag)
+        self.analysis_painter.reset()
+        self.frequent_word_painter.reset()
 
     def setup_tags(self, config):
         """Setup tag colors and priorities"""
@@ -541,10 +582,27 @@ class HTextEditor:
                     self.move_carret(next_range[1])
         return "break"
 
-    # noinspection PyMethodMayBeStatic
     def get_hunspell_suggestions(self, token):
-        """Get hunspell suggestion for token"""
-        return ", ".join(RunContext().spellcheck_dictionary.suggest(token.lower_))
+        """Get cached hunspell suggestion for token. Returns None, if suggestions are not computed yet"""
+        suggestions = self.suggestion_worker.get(token.lower_)
+        if suggestions is None:
+            return None
+        return ", ".join(suggestions)
+
+    def prefetch_visible_suggestions(self):
+        """Queue suggestions of all misspelled words in visible part of editor"""
+        first_visible = self.text_editor.count("1.0", self.text_editor.index("@0,0"), "chars")
+        last_visible = self.text_editor.count(
+            "1.0", self.text_editor.index(f"@0,{self.text_editor.winfo_height()} lineend"), "chars"
+        )
+        start = first_visible[0] if first_visible is not None else 0
+        end = last_visible[0] if last_visible is not None else len(self.doc.text)
+        span = self.doc.char_span(start, min(end, len(self.doc.text)), alignment_mode='expand')
+        if span is None:
+            return
+        self.suggestion_worker.prefetch(
+            token.lower_ for token in span if token._.grammar_error_type == GRAMMAR_ERROR_TYPE_MISSPELLED_WORD
+        )
 
     def handle_clipboard_paste(self, event):
         """Handle paste event"""
@@ -559,57 +617,129 @@ class HTextEditor:
         return "break"
 
     def analyze_text(self, force_full_analysis=False):
-        """Execute test analysis"""
+        """Submit text to background analysis. Results are applied, when they are ready"""
+        # CLEAR DEBOUNCE TIMER IF ANY
+        self.analyze_text_debounce_timer = None
+        # GET TEXT FROM EDITOR
         text = self.text_editor.get(1.0, tk.END)
-        if not force_full_analysis and self.doc.text == text:
+        if not force_full_analysis and (self.doc.text == text or self.last_submitted_text == text):
             return
         ctx = RunContext()
         config = ConfigService.select_config(ctx.global_config, ctx.project, ctx.current_file)
-        # GET TEXT FROM EDITOR
-        # RUN ANALYSIS
-        if not force_full_analysis and len(text) > 100 and abs(
-                len(self.doc.text) - len(text)) < 20 and config.analysis_settings.enable_partial_nlp:
-            # PARTIAL NLP
-            carret_position = self.get_carret_position(tk.INSERT)
-            if carret_position is not None:
-                self.doc = NlpService.partial_analysis(text, self.doc, ctx.nlp, config, carret_position)
-                self.mark_edit_separator()
-            else:
-                # FALLBACK TO FULL NLP
-                self.doc = NlpService.full_analysis(text, ctx.nlp, NLP_BATCH_SIZE, config)
-                self.mark_edit_separator()
-                self.reset_search()
+        self.revision += 1
+        self.last_submitted_text = text
+        self.analysis_worker.submit(AnalysisRequest(
+            self.revision,
+            text,
+            self.doc,
+            config,
+            force_full_analysis=force_full_analysis
+        ))
+        self.mark_edit_separator()
+        if self.analysis_poll_timer is None:
+            self.analysis_poll_timer = self.root.after(ANALYSIS_POLL_INTERVAL, self._poll_analysis_result)
+
+    def stop_analysis(self):
+        """Stop background analysis. Should be called before editor is destroyed"""
+        if self.analysis_poll_timer is not None:
+            self.root.after_cancel(self.analysis_poll_timer)
+            self.analysis_poll_timer = None
+        if self.analyze_text_debounce_timer is not None:
+            self.root.after_cancel(self.analyze_text_debounce_timer)
+            self.analyze_text_debounce_timer = None
+        if self.suggestion_poll_timer is not None:
+            self.root.after_cancel(self.suggestion_poll_timer)
+            self.suggestion_poll_timer = None
+        self.analysis_painter.cancel()
+        self.frequent_word_painter.cancel()
+        self.analysis_worker.stop()
+        self.suggestion_worker.stop()
+
+    # noinspection PyMethodMayBeStatic
+    def _suggest(self, word):
+        """Executed in suggestion worker thread. Must not touch any widgets"""
+        ctx = RunContext()
+        # SUGGESTIONS REQUESTED DURING STARTUP WAIT UNTIL DICTIONARIES ARE LOADED
+        if ctx.startup is not None and not ctx.startup.wait(STARTUP_RESOURCE_DICTIONARIES):
+            return []
+        return SpellcheckService.suggest(ctx.spellcheck_dictionary, word)
+
+    def _run_analysis(self, request: AnalysisRequest):
+        """Executed in worker thread. Must not touch any widgets"""
+        ctx = RunContext()
+        # ANALYSIS REQUESTED DURING STARTUP IS QUEUED UNTIL PIPELINE IS WARM. POOL IS OPTIONAL, SO IT IS NOT AWAITED
+        if ctx.startup is not None and not ctx.startup.wait(STARTUP_RESOURCE_NLP, STARTUP_RESOURCE_DICTIONARIES):
+            return None
+        # PARAGRAPHS OF IMPORTED DOCUMENT ARE ALREADY ANALYZED IN BACKGROUND. WAIT FOR THEM, SO THEY ARE TAKEN FROM CACHE
+        pending_import = self.pending_import
+        if pending_import is not None:
+            pending_import.wait_for_analysis()
+            # ONLY FIRST ANALYSIS OF IMPORTED TEXT NEEDS TO WAIT. WORKER IS RELEASED, SO IT IS NOT KEPT IN MEMORY
+            if self.pending_import is pending_import:
+                self.pending_import = None
+        return AnalysisService.analyze(request, ctx.nlp, ctx.spellcheck_dictionary, ctx.nlp_pool)
+
+    def _poll_analysis_result(self):
+        """Check if background analysis has finished and apply its result"""
+        self.analysis_poll_timer = None
+        # BUSY STATE MUST BE CHECKED BEFORE POLLING, OTHERWISE WE COULD MISS RESULT FINISHED IN BETWEEN
+        busy = self.analysis_worker.is_busy()
+        result = self.analysis_worker.poll()
+        if result is not None and result.revision == self.revision:
+            self.last_submitted_text = None
+            # IF TEXT WAS CHANGED WHILE ANALYSIS WAS RUNNING, RESULT IS STALE. NEW ANALYSIS IS ALREADY DEBOUNCED
+            if result.text == self.text_editor.get(1.0, tk.END):
+                self._apply_analysis_result(result)
+        elif busy:
+            # NEWEST RESULT IS NOT AVAILABLE YET
+            self.analysis_poll_timer = self.root.after(ANALYSIS_POLL_INTERVAL, self._poll_analysis_result)
         else:
-            # FULL NLP
-            # FALLBACK TO FULL NLP
-            self.doc = NlpService.full_analysis(text, ctx.nlp, NLP_BATCH_SIZE, config)
-            self.mark_edit_separator()
+            # NEWEST ANALYSIS HAS FAILED. ALLOW RESUBMITTING SAME TEXT
+            self.last_submitted_text = None
+
+    def _apply_analysis_result(self, result: AnalysisResult):
+        """Apply analysis result to editor. Runs in GUI thread"""
+        with Profiler.stage("gui", profile=result.profile):
+            self._apply_analysis_result_to_widgets(result)
+        Profiler.finish(result.profile)
+
+    def _apply_analysis_result_to_widgets(self, result: AnalysisResult):
+        profile = result.profile
+        self.doc = result.doc
+        self.close_words = result.close_words
+        self.typography_issues = result.typography_issues
+        self.last_submitted_text = None
+        if result.full_analysis:
             self.reset_search()
-        # CLEAR TAGS
-        self.clear_tags()
-        # SETUP PARAGRAPH TAGGING
-        for paragraph in self.doc._.paragraphs:
-            start_index = f"1.0 + {paragraph.start_char} chars"
-            end_index = f"1.0 + {paragraph.end_char} chars"
-            self.tag_add(PARAGRAPH_TAG_NAME, start_index, end_index)
-        # RUN ANALYSIS FUNCTIONS
-        self._highlight_long_sentences(self.doc, config)
-        self._highlight_close_words(self.doc, config)
-        self._highlight_multiple_spaces(self.doc, config)
-        self._highlight_multiple_punctuation(self.doc, config)
-        self._highlight_trailing_spaces(self.doc, config)
-        self._highlight_quote_mark_errors(self.doc, config)
-        self._run_spellcheck(self.doc, config)
-        self.setup_tags(config)
+        config = result.config
+        # FULL ANALYSIS REPAINTS EVERYTHING. AFTER PARTIAL ANALYSIS ONLY DIFFERENCES ARE APPLIED
+        if result.full_analysis:
+            self.clear_tags()
+        with Profiler.stage("gui.highlight", profile=profile):
+            # ALL RANGES ARE COLLECTED FIRST AND THEN APPLIED TO EDITOR WITH ONE CALL PER TAG
+            batch = TagBatch(self.doc.text)
+            # SETUP PARAGRAPH TAGGING
+            for paragraph in self.doc._.paragraphs:
+                batch.add(PARAGRAPH_TAG_NAME, paragraph.start_char, paragraph.end_char)
+            # RUN ANALYSIS FUNCTIONS
+            self._highlight_long_sentences(self.doc, config, batch)
+            self._highlight_close_words(self.doc, config, batch)
+            self._highlight_typography_issues(config, batch)
+            self._highlight_grammar_errors(self.doc, config, batch)
+        with Profiler.stage("gui.paint", profile=profile):
+            self.apply_tag_batch(batch, self.analysis_painter)
+            self.setup_tags(config)
+        # SUGGESTIONS ARE READY BEFORE USER HOVERS OVER MISSPELLED WORD
+        if config.analysis_settings.enable_spellcheck:
+            self.prefetch_visible_suggestions()
         # MOUSE BINDINGS
         GuiUtils.bind_tag_mouse_event(CLOSE_WORD_TAG_NAME,
                                       self.text_editor,
                                       lambda e: self.highlight_same_word(e, self.text_editor),
                                       lambda e: self.unhighlight_same_word(e)
                                       )
-        # CLEAR DEBOUNCE TIMER IF ANY
-        self.analyze_text_debounce_timer = None
-        self.on_text_analyzed(self.doc)
+        with Profiler.stage("gui.panels", profile=profile):
+            self.on_text_analyzed(self.doc)
 
     def highlight_same_word(self, event, trigger, tag_prefix=CLOSE_WORD_PREFIX, tooltip=None):
         """Highlight tag prefixed by tag_prefix"""
@@ -654,17 +784,13 @@ class HTextEditor:
         index = self.text_editor.index(f"@{x},{y}")
         current_tags = set(self.tag_names(index)) - FORMATTING_TAGS
         if current_tags != self.last_tags:
+            self.pending_tooltip = None
             if current_tags:
                 # There are tags under the mouse
-                error_messages = self._convert_tags_to_error_messages(current_tags, index)
-                if error_messages:
-                    tooltip_text = "\n---\n".join(error_messages)
-                    # Get the absolute position of the mouse
-                    abs_x = self.text_editor.winfo_rootx() + x
-                    abs_y = self.text_editor.winfo_rooty() + y
-                    self.tooltip.show(tooltip_text, abs_x, abs_y)
-                else:
-                    self.tooltip.hide()
+                # Get the absolute position of the mouse
+                abs_x = self.text_editor.winfo_rootx() + x
+                abs_y = self.text_editor.winfo_rooty() + y
+                self._show_error_tooltip(current_tags, index, abs_x, abs_y)
             else:
                 # No tags under the mouse
                 self.tooltip.hide()
@@ -672,9 +798,31 @@ class HTextEditor:
 
     def _editor_on_mouse_leave(self, event):
         """Mouse leave handling"""
+        self.pending_tooltip = None
         self.tooltip.hide()
         self.last_tags = set()
 
+    def _show_error_tooltip(self, current_tags, index, abs_x, abs_y):
+        """Show tooltip with error messages. If suggestions are not ready yet, tooltip is refreshed when they are"""
+        error_messages = self._convert_tags_to_error_messages(current_tags, index)
+        if not error_messages:
+            self.tooltip.hide()
+            return
+        self.tooltip.show("\n---\n".join(error_messages), abs_x, abs_y)
+        if any(SUGGESTION_PLACEHOLDER in message for message in error_messages):
+            self.pending_tooltip = (current_tags, index, abs_x, abs_y)
+            if self.suggestion_poll_timer is None:
+                self.suggestion_poll_timer = self.root.after(SUGGESTION_POLL_INTERVAL, self._poll_suggestions)
+
+    def _poll_suggestions(self):
+        """Refresh tooltip waiting for suggestions"""
+        self.suggestion_poll_timer = None
+        if self.pending_tooltip is None:
+            return
+        current_tags, index, abs_x, abs_y = self.pending_tooltip
+        self.pending_tooltip = None
+        self._show_error_tooltip(current_tags, index, abs_x, abs_y)
+
     def _convert_tags_to_error_messages(self, current_tags, index):
         """Convert set of tags (usually under cursor) to set of error messages for user"""
         error_messages = set()
@@ -705,8 +853,7 @@ class HTextEditor:
                     if span is not None:
                         token = span.root
                         grammar_error_map = {
-                            GRAMMAR_ERROR_TYPE_MISSPELLED_WORD: lambda: f'Možný preklep v slove.\n\nNávrhy: '
-                                                                        f'{self.get_hunspell_suggestions(token)}',
+                            GRAMMAR_ERROR_TYPE_MISSPELLED_WORD: lambda: self._misspelled_word_message(token),
                             GRAMMAR_ERROR_NON_LITERAL_WORD: lambda: f'Slovo nie je spisovné.\n\n'
                                                                     f'Návrh: {NON_LITERAL_WORDS[token.lower_]}',
                             GRAMMAR_ERROR_TOMU_INSTEAD_OF_TO: lambda: 'Výraz nie je spisovný.\n\nNávrh: to',
@@ -729,6 +876,13 @@ class HTextEditor:
                             error_messages.add(grammar_error_map[token._.grammar_error_type]())
         return error_messages
 
+    def _misspelled_word_message(self, token):
+        """Error message for misspelled word. Shows placeholder until suggestions are computed"""
+        suggestions = self.get_hunspell_suggestions(token)
+        if suggestions is None:
+            suggestions = SUGGESTION_PLACEHOLDER
+        return f'Možný preklep v slove.\n\nNávrhy: {suggestions}'
+
     def _paste_text(self, text, event, force_full_analysis=True):
         """Paste text"""
         # IF THERE SI SELECTED TEXT IN EDITOR, OVERWRITE IT WITH SELECTED TEXT
@@ -740,7 +894,7 @@ class HTextEditor:
         self.analyze_text(force_full_analysis=force_full_analysis)
         self.on_text_paste(event)
 
-    def _highlight_long_sentences(self, doc: Doc, config: Config):
+    def _highlight_long_sentences(self, doc: Doc, config: Config, batch: TagBatch):
         if not config.analysis_settings.enable_long_sentences:
             return
         doc_size = len(doc.text)
@@ -750,103 +904,63 @@ class HTextEditor:
                 start = sentence.start_char
                 while start < doc_size - 1 and (doc_text[start] == '\n' or doc_text[start] == '\r'):
                     start += 1
-                start_index = f"1.0 + {start} chars"
-                end_index = f"1.0 + {sentence.end_char} chars"
                 if sentence._.is_long_sentence:
-                    self.tag_add(LONG_SENTENCE_TAG_NAME_HIGH, start_index, end_index)
+                    batch.add(LONG_SENTENCE_TAG_NAME_HIGH, start, sentence.end_char)
                 else:
-                    self.tag_add(LONG_SENTENCE_TAG_NAME_MID, start_index, end_index)
-
-    def _highlight_multiple_spaces(self, doc: Doc, config: Config):
-        self.tag_remove(MULTIPLE_SPACES_TAG_NAME, "1.0", tk.END)
-        if config.analysis_settings.enable_multiple_spaces:
-            matches = NlpService.find_multiple_spaces(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(MULTIPLE_SPACES_TAG_NAME, start_index, end_index)
-
-    def _highlight_multiple_punctuation(self, doc: Doc, config: Config):
-        if config.analysis_settings.enable_multiple_punctuation:
-            matches = NlpService.find_multiple_punctuation(doc)
-            for match in matches:
-                if match.group() not in ["?!"]:
-                    start_index = f"1.0 + {match.start()} chars"
-                    end_index = f"1.0 + {match.end()} chars"
-                    self.tag_add(MULTIPLE_PUNCTUATION_TAG_NAME, start_index, end_index)
-
-    def _highlight_trailing_spaces(self, doc: Doc, config: Config):
-        if config.analysis_settings.enable_trailing_spaces:
-            matches = NlpService.find_trailing_spaces(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(TRAILING_SPACES_TAG_NAME, start_index, end_index)
-
-    def _highlight_quote_mark_errors(self, doc: Doc, config: Config):
-        if config.analysis_settings.enable_quote_corrections:
-            matches = NlpService.find_computer_quote_marks(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(COMPUTER_QUOTE_MARKS_TAG_NAME, start_index, end_index)
-            matches = NlpService.find_dangling_quote_marks(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(DANGLING_QUOTE_MARK_TAG_NAME, start_index, end_index)
-            matches = NlpService.find_incorrect_lower_quote_marks(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(SHOULD_USE_UPPER_QUOTE_MARK_TAG_NAME, start_index, end_index)
-            matches = NlpService.find_incorrect_upper_quote_marks(doc)
-            for match in matches:
-                start_index = f"1.0 + {match.start()} chars"
-                end_index = f"1.0 + {match.end()} chars"
-                self.tag_add(SHOULD_USE_LOWER_QUOTE_MARK_TAG_NAME, start_index, end_index)
-
-    def _run_spellcheck(self, doc: Doc, config: Config):
+                    batch.add(LONG_SENTENCE_TAG_NAME_MID, start, sentence.end_char)
+
+    def _highlight_typography_issues(self, config: Config, batch: TagBatch):
+        issue_tags = {
+            TYPOGRAPHY_MULTIPLE_SPACES: MULTIPLE_SPACES_TAG_NAME,
+            TYPOGRAPHY_MULTIPLE_PUNCTUATION: MULTIPLE_PUNCTUATION_TAG_NAME,
+            TYPOGRAPHY_TRAILING_SPACES: TRAILING_SPACES_TAG_NAME,
+            TYPOGRAPHY_COMPUTER_QUOTE_MARK: COMPUTER_QUOTE_MARKS_TAG_NAME,
+            TYPOGRAPHY_DANGLING_QUOTE_MARK: DANGLING_QUOTE_MARK_TAG_NAME,
+            TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK: SHOULD_USE_UPPER_QUOTE_MARK_TAG_NAME,
+            TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK: SHOULD_USE_LOWER_QUOTE_MARK_TAG_NAME,
+        }
+        for issue in self.typography_issues:
+            if NlpService.is_typography_issue_enabled(issue, config):
+                batch.add(issue_tags[issue.issue_type], issue.start, issue.end)
+
+    # noinspection PyMethodMayBeStatic
+    def _highlight_grammar_errors(self, doc: Doc, config: Config, batch: TagBatch):
         if config.analysis_settings.enable_spellcheck:
-            SpellcheckService.spellcheck(RunContext().spellcheck_dictionary, doc)
-            for word in self.doc._.words:
+            for word in doc._.words:
                 if word._.has_grammar_error:
-                    start_index = f"1.0 + {word.idx} chars"
-                    end_index = f"1.0 + {word.idx + len(word.lower_)} chars"
-                    self.tag_add(GRAMMAR_ERROR_TAG_NAME, start_index, end_index)
+                    batch.add(GRAMMAR_ERROR_TAG_NAME, word.idx, word.idx + len(word.lower_))
 
-    def _highlight_close_words(self, doc: Doc, config: Config):
+    def _highlight_close_words(self, doc: Doc, config: Config, batch: TagBatch):
         if config.analysis_settings.enable_close_words:
-            self.tag_remove("close_word", "1.0", tk.END)
-            raw_close_words = NlpService.evaluate_close_words(doc, config)
-            self.close_words = {}
-            for word in raw_close_words:
+            for word in self.close_words:
                 tag_name = f"{CLOSE_WORD_PREFIX}{word}"
-                word_partitions = NlpService.partition_close_words(
-                    raw_close_words[word],
-                    config.analysis_settings.close_words_min_distance_between_words
-                )
-                self.close_words[word] = {"total": len(raw_close_words[word]), "repetition_groups": word_partitions}
+                color = self.close_word_colors.get(tag_name, "")
+                if color == "":
+                    color = random.choice(CLOSE_WORDS_PALLETE)
+                    self.close_word_colors[tag_name] = color
+                word_partitions = self.close_words[word]["repetition_groups"]
                 for word_partition in word_partitions:
-                    first_token = word_partition[0]
-                    first_token_index = self.text_editor.index(f"1.0+{first_token.idx} chars")
-                    first_token_par = first_token_index.split(".")[0]
-                    prefix = f"{tag_name}:{CLOSE_WORD_RANGE_PREFIX}"
-                    range_tag_name = f"{prefix}{first_token_par}"
+                    first_token_par = batch.line(word_partition[0].idx)
+                    range_tag_name = f"{tag_name}:{CLOSE_WORD_RANGE_PREFIX}{first_token_par}"
                     for occ in word_partition:
-                        color = random.choice(CLOSE_WORDS_PALLETE)
-                        start_index = f"1.0 + {occ.idx} chars"
-                        end_index = f"1.0 + {occ.idx + len(occ.lower_)} chars"
-                        tag_name = f"{CLOSE_WORD_PREFIX}{word}"
-                        original_color = self.close_word_colors.get(tag_name, "")
-                        if original_color != "":
-                            color = original_color
-                        else:
-                            self.close_word_colors[tag_name] = color
-                        self.tag_add(tag_name, start_index, end_index)
-                        self.tag_add(range_tag_name, start_index, end_index)
-                        self.tag_add(CLOSE_WORD_TAG_NAME, start_index, end_index)
-                        self.tag_config(tag_name, foreground=color)
+                        end = occ.idx + len(occ.lower_)
+                        batch.add(tag_name, occ.idx, end)
+                        batch.add(range_tag_name, occ.idx, end)
+                        batch.add(CLOSE_WORD_TAG_NAME, occ.idx, end)
+                self.tag_config(tag_name, foreground=color)
+
+    def _on_editor_scroll(self, first, last):
+        """Update scrollbar and paint highlights that became visible"""
+        self.text_editor_scroll.set(first, last)
+        self.analysis_painter.paint_visible()
+        self.frequent_word_painter.paint_visible()
+
+    def _on_text_modified(self, event):
+        """Stop lazy painting of highlights, because offsets of pending chunks do not match changed text"""
+        # RESET FLAG, SO EVENT IS GENERATED AGAIN ON NEXT CHANGE
+        self.text_editor.edit_modified(False)
+        self.analysis_painter.cancel()
+        self.frequent_word_painter.cancel()
 
     def _on_typing_done(self, event):
         if self.analyze_text_debounce_timer is not None:
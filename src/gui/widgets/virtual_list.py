@@ -0,0 +1,136 @@
+import tkinter as tk
+from tkinter import font as tkfont
+
+
+class VirtualListRow:
+    """Single row of virtual list. Callbacks are called with tkinter event"""
+
+    def __init__(self, text: str, tags: tuple = (), on_enter=None, on_leave=None, on_click=None):
+        self.text = text
+        self.tags = tags
+        self.on_enter = on_enter
+        self.on_leave = on_leave
+        self.on_click = on_click
+
+
+class VirtualList:
+    """
+        List of rows displayed in tkinter text widget. Only rows that fit into widget are inserted to it, so refreshing
+        list does not depend on number of rows. Widget has single set of mouse bindings and rows under mouse are found
+        by hit-testing. Tags of row are added only while row is visible.
+    """
+
+    def __init__(self, text_widget: tk.Text, scrollbar):
+        """
+        Constructor for virtual list
+        :param text_widget Text widget used to display visible rows
+        :param scrollbar Scrollbar of text widget
+        """
+        self.text_widget = text_widget
+        self.scrollbar = scrollbar
+        self.rows = []
+        self.first_row = 0
+        self.hovered_row = None
+        self.font = tkfont.Font(font=text_widget.cget("font"))
+        self.text_widget.config(wrap=tk.NONE, yscrollcommand="")
+        self.scrollbar.config(command=self.yview)
+        self.text_widget.bind("<Motion>", self._on_motion)
+        self.text_widget.bind("<Leave>", self._on_leave)
+        self.text_widget.bind("<Button-1>", self._on_click)
+        self.text_widget.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.text_widget.bind("<Button-4>", self._on_mouse_wheel)
+        self.text_widget.bind("<Button-5>", self._on_mouse_wheel)
+        self.text_widget.bind("<Configure>", lambda e: self.render())
+
+    def set_rows(self, rows: list):
+        """Replace rows. Scroll position is kept, so list is updated in place"""
+        self.rows = rows
+        self.hovered_row = None
+        self.first_row = min(self.first_row, self._max_first_row())
+        self.render()
+
+    def visible_row_count(self):
+        """Number of rows that fit into widget"""
+        line_height = max(1, self.font.metrics("linespace"))
+        return self.text_widget.winfo_height() // line_height + 1
+
+    def row_at(self, y: int):
+        """Get index of row at y coordinate of widget, or None if there is no row"""
+        line = int(self.text_widget.index(f"@0,{y}").split(".")[0])
+        row = self.first_row + line - 1
+        if row >= len(self.rows) or row >= self.first_row + self.visible_row_count():
+            return None
+        return row
+
+    def render(self):
+        """Insert visible rows to widget"""
+        visible_rows = self.rows[self.first_row:self.first_row + self.visible_row_count()]
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.delete(1.0, tk.END)
+        self.text_widget.insert(tk.END, "".join(row.text for row in visible_rows))
+        for line, row in enumerate(visible_rows, start=1):
+            for tag in row.tags:
+                self.text_widget.tag_add(tag, f"{line}.0", f"{line + 1}.0")
+        self.text_widget.config(state=tk.DISABLED)
+        self._update_scrollbar()
+
+    def yview(self, *args):
+        """Scrollbar command"""
+        visible_row_count = self.visible_row_count()
+        if args[0] == "moveto":
+            first_row = int(float(args[1]) * len(self.rows))
+        elif args[1] and args[2] == "pages":
+            first_row = self.first_row + int(args[1]) * visible_row_count
+        else:
+            first_row = self.first_row + int(args[1])
+        self.scroll_to(first_row)
+
+    def scroll_to(self, first_row: int):
+        """Scroll list, so given row is first visible row"""
+        first_row = max(0, min(first_row, self._max_first_row()))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.render()
+
+    def _max_first_row(self):
+        # LAST VISIBLE ROW CAN BE DISPLAYED ONLY PARTIALLY
+        return max(0, len(self.rows) - self.visible_row_count() + 1)
+
+    def _update_scrollbar(self):
+        if not self.rows:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.first_row / len(self.rows),
+                           min(1, (self.first_row + self.visible_row_count() - 1) / len(self.rows)))
+
+    def _on_motion(self, event):
+        row = self.row_at(event.y)
+        if row == self.hovered_row:
+            return
+        self._on_leave(event)
+        self.hovered_row = row
+        if row is not None and self.rows[row].on_enter is not None:
+            self.rows[row].on_enter(event)
+
+    def _on_leave(self, event):
+        if self.hovered_row is not None and self.hovered_row < len(self.rows):
+            if self.rows[self.hovered_row].on_leave is not None:
+                self.rows[self.hovered_row].on_leave(event)
+        self.hovered_row = None
+
+    def _on_click(self, event):
+        row = self.row_at(event.y)
+        if row is not None and self.rows[row].on_click is not None:
+            return self.rows[row].on_click(event)
+        return None
+
+    def _on_mouse_wheel(self, event):
+        # CTRL + MOUSEWHEEL IS HANDLED BY WINDOW
+        if event.state & 0x0004:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.first_row - 3)
+        else:
+            self.scroll_to(self.first_row + 3)
+        self._on_motion(event)
+        return "break"
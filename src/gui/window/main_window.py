@@ -15,10 +15,10 @@ from spacy.tokens import Doc
 from svglib.svglib import svg2rlg
 from tkinter_autoscrollbar import AutoScrollbar
 
+from src.backend.import_worker import ImportWorker
 from src.backend.run_context import RunContext
 from src.backend.service.config_service import ConfigService
 from src.backend.service.export_service import ExportService
-from src.backend.service.import_service import ImportService
 from src.backend.service.metadata_service import MetadataService
 from src.backend.service.nlp_service import NlpService
 from src.backend.service.project_service import ProjectService
@@ -31,7 +31,8 @@ from src.const.grammar_error_types import GRAMMAR_ERROR_TYPE_MISSPELLED_WORD
 from src.const.paths import CONFIG_FILE_PATH, METADATA_FILE_PATH
 from src.const.tags import CLOSE_WORD_PREFIX, CLOSE_WORD_TAG_NAME, \
     FREQUENT_WORD_PREFIX, FREQUENT_WORD_TAG_NAME, CLOSE_WORD_RANGE_PREFIX
-from src.const.values import READABILITY_MAX_VALUE, DOCUMENTATION_LINK
+from src.const.values import READABILITY_MAX_VALUE, DOCUMENTATION_LINK, STARTUP_RESOURCE_PANDOC, \
+    STARTUP_RESOURCE_DICTIONARIES, STARTUP_RESOURCE_NLP, NLP_BATCH_SIZE, IMPORT_POLL_INTERVAL, STARTUP_POLL_INTERVAL
 from src.domain.config import Config, ConfigLevel
 from src.domain.htext_file import HTextFile
 from src.domain.metadata import RecentProject
@@ -41,10 +42,13 @@ from src.gui.modal.analysis_settings_modal import AnalysisSettingsModal
 from src.gui.modal.appearance_settings_modal import AppearanceSettingsModal
 from src.gui.modal.new_project_item_modal import NewProjectItemModal
 from src.gui.modal.project_edit_modal import EditProjectModal
+from src.gui.modal.profiler_modal import ProfilerModal
 from src.gui.navigator import Navigator
+from src.gui.tag_batch import TagBatch
 from src.gui.widgets.menu import MenuItem, HectorMenu, MenuSeparator, ContextMenu
 from src.gui.widgets.htext_editor import HTextEditor
 from src.gui.widgets.tooltip import Tooltip
+from src.gui.widgets.virtual_list import VirtualList, VirtualListRow
 from src.gui.window.splash_window import SplashWindow
 from src.utils import Utils
 
@@ -78,8 +82,8 @@ class MainWindow:
         # TOOLTIP WINDOW
         self.tooltip = Tooltip(self.root)
         self.last_tags = set()
-        # DEFAULT NLP DOCUMENT INITIALIZED ON EMPTY TEXT
-        self.doc = self.ctx.nlp('')
+        # DEFAULT EMPTY NLP DOCUMENT. IT DOES NOT NEED PIPELINE, SO EDITOR CAN BE SHOWN BEFORE MODEL IS LOADED
+        self.doc = NlpService.create_empty_doc()
         # TOKEN SELECTED IN LEFT BOTTOM INTOSPECTION WINDOW
         self.current_instrospection_token = None
         # LOAD CONFIG
@@ -189,6 +193,10 @@ class MainWindow:
                     label="Exportovať zoznam viet",
                     command=self.export_sentences,
                 ),
+                MenuItem(
+                    label="Meranie výkonu",
+                    command=self.show_profiler,
+                ),
 
             ]),
             MenuItem(label="Nastavenia", underline_index=0, submenu=[
@@ -351,7 +359,7 @@ class MainWindow:
                                         width=20, background=PRIMARY_COLOR, foreground=PANEL_TEXT_COLOR,
                                         yscrollcommand=left_side_frame_scroll.set, cursor="xterm")
         self.close_words_text.pack(fill=tk.BOTH, expand=1, pady=10, padx=10)
-        left_side_frame_scroll.config(command=self.close_words_text.yview)
+        self.close_words_list = VirtualList(self.close_words_text, left_side_frame_scroll)
         # RIGHT PANEL CONTENTS
         tk.Label(right_side_panel, pady=10, compound=tk.LEFT, background=PRIMARY_COLOR, foreground=PANEL_TEXT_COLOR,
                  text="Hľadať", font=(HELVETICA_FONT_NAME, TEXT_SIZE_SECTION_HEADER),
@@ -379,7 +387,7 @@ class MainWindow:
                                       width=20, background=PRIMARY_COLOR, foreground=PANEL_TEXT_COLOR,
                                       yscrollcommand=right_side_frame_scroll.set, cursor="xterm")
         self.word_freq_text.pack(fill=tk.BOTH, expand=1, pady=10, padx=10)
-        right_side_frame_scroll.config(command=self.word_freq_text.yview)
+        self.word_freq_list = VirtualList(self.word_freq_text, right_side_frame_scroll)
         # RICH TEXT EDITOR
         self.text_editor = HTextEditor(self.root, text_editor_frame, self.tooltip, self.doc,
                                        self.close_words_text, self.word_freq_text,
@@ -492,111 +500,81 @@ class MainWindow:
     # CALCULATE AND DISPLAY FREQUENT WORDS
     def display_word_frequencies(self, doc: Doc, config: Config):
         if not config.analysis_settings.enable_frequent_words:
+            # REMOVE OCCOURENCES PAINTED BY PREVIOUS ANALYSIS
+            self.text_editor.apply_tag_batch(TagBatch(doc.text), self.text_editor.frequent_word_painter)
             return
         word_counts = NlpService.compute_word_frequencies(doc, config)
-        # NOTE
-        # In tk, there is problem with scrolling so we default to using on big text to dispaly frequencies
-        # There is way of making canvas with scrollregion but this is more performant
-        self.word_freq_text.config(state=tk.NORMAL)
-        self.word_freq_text.delete(1.0, tk.END)
-        start_char = 0
-        for word in word_counts:
-            word_text = f"{word.text}\t\t{len(word.occourences)}x\n"
-            tag_name = f"{FREQUENT_WORD_PREFIX}{word.text}"
-            # Insert the text
-            self.word_freq_text.insert(tk.END, word_text)
-            # Add the tag to the inserted text
-            start_index = f"1.0 + {start_char} chars"
-            end_index = f"1.0 + {start_char + len(word_text)} chars"
-            self.word_freq_text.tag_add(tag_name, start_index, end_index)
-            self.word_freq_text.tag_add(FREQUENT_WORD_TAG_NAME, start_index, end_index)
-            start_char += len(word_text)
-            GuiUtils.bind_tag_mouse_event(tag_name,
-                                          self.word_freq_text,
-                                          on_enter=lambda e: self.text_editor.highlight_same_word(
-                                              e,
-                                              self.word_freq_text,
-                                              tag_prefix=FREQUENT_WORD_PREFIX,
-                                              tooltip="Kliknutím nájsť další výskyt."
-                                          ),
-                                          on_leave=lambda e: self.text_editor.unhighlight_same_word(e),
-                                          on_click=lambda e: self.text_editor.jump_to_next_word_occourence(
-                                              e, self.word_freq_text, tag_prefix=FREQUENT_WORD_PREFIX)
-                                          )
-        self.word_freq_text.config(state=tk.DISABLED)
+        # ONLY VISIBLE ROWS ARE RENDERED. MOUSE EVENTS ARE HANDLED BY LIST, HANDLERS FIND WORD BY TAGS OF ROW
+        self.word_freq_list.set_rows([
+            VirtualListRow(
+                f"{word.text}\t\t{len(word)}x\n",
+                (f"{FREQUENT_WORD_PREFIX}{word.text}", FREQUENT_WORD_TAG_NAME),
+                on_enter=self._on_frequent_word_enter,
+                on_leave=self._on_panel_row_leave,
+                on_click=self._on_frequent_word_click
+            )
+            for word in word_counts
+        ])
         # ADD TAG TO ALL OCCOURENCES
+        batch = TagBatch(doc.text)
         for word in word_counts:
-            for occourence in word.occourences:
-                start_index = f"1.0 + {occourence.idx} chars"
-                end_index = f"1.0 + {occourence.idx + len(occourence.lower_)} chars"
-                self.text_editor.tag_add(f'{FREQUENT_WORD_PREFIX}{word.text}', start_index, end_index)
+            tag_name = f'{FREQUENT_WORD_PREFIX}{word.text}'
+            for char_offset, length in zip(word.char_offsets, word.lengths):
+                batch.add(tag_name, char_offset, char_offset + length)
+        self.text_editor.apply_tag_batch(batch, self.text_editor.frequent_word_painter)
 
     # HIGHLIGHT WORDS THAT REPEATS CLOSE TO EACH OTHER
     def highlight_close_words(self, config: Config):
+        rows = []
         if config.analysis_settings.enable_close_words:
             close_words = self.text_editor.close_words
-            # NOTE
-            # In tk, there is problem with scrolling so we default to using on big text to dispaly frequencies
-            # There is way of making canvas with scrollregion but this is more performant
-            self.close_words_text.config(state=tk.NORMAL)
-            self.close_words_text.delete(1.0, tk.END)
-            panel_start_char = 0
+            batch = TagBatch(self.text_editor.doc.text)
             for word in close_words:
-                word_text = f"{word.lower()}\t\t{close_words[word]['total']}x\n"
                 tag_name = f"{CLOSE_WORD_PREFIX}{word}"
-                # Insert the text
-                self.close_words_text.insert(tk.END, word_text)
-                # Add the tag to the inserted text
-                panel_start_index = f"1.0 + {panel_start_char} chars"
-                panel_end_index = f"1.0 + {panel_start_char + len(word_text)} chars"
-                self.close_words_text.tag_add(tag_name, panel_start_index, panel_end_index)
-                self.close_words_text.tag_add(CLOSE_WORD_TAG_NAME, panel_start_index, panel_end_index)
-                panel_start_char += len(word_text)
-                GuiUtils.bind_tag_mouse_event(tag_name,
-                                              self.close_words_text,
-                                              lambda e: self.text_editor.highlight_same_word(
-                                                  e,
-                                                  self.close_words_text,
-                                                  tooltip="Kliknutím nájsť další výskyt."
-                                              ),
-                                              lambda e: self.text_editor.unhighlight_same_word(e),
-                                              on_click=lambda e: self.text_editor.jump_to_next_word_occourence(
-                                                  e, self.close_words_text, tag_prefix=CLOSE_WORD_PREFIX)
-                                              )
+                rows.append(VirtualListRow(
+                    f"{word.lower()}\t\t{close_words[word]['total']}x\n",
+                    (tag_name, CLOSE_WORD_TAG_NAME),
+                    on_enter=self._on_close_word_enter,
+                    on_leave=self._on_panel_row_leave,
+                    on_click=self._on_close_word_click
+                ))
                 word_partitions = close_words[word]["repetition_groups"]
+                if len(word_partitions) > 1:
+                    for word_partition in word_partitions:
+                        first_token_index = batch.index(word_partition[0].idx)
+                        first_token_par = batch.line(word_partition[0].idx)
+                        last_token_par = batch.line(word_partition[-1].idx)
+                        prefix = f"{tag_name}:{CLOSE_WORD_RANGE_PREFIX}"
+                        rows.append(VirtualListRow(
+                            f" ods.{first_token_par}-{last_token_par} \t\t{len(word_partition)}x\n",
+                            (f"{prefix}{first_token_par}",),
+                            on_enter=partial(self._on_close_word_range_enter, prefix,
+                                             f"Kliknutím prejsť na odsek {first_token_par}."),
+                            on_leave=self._on_panel_row_leave,
+                            on_click=partial(self.text_editor.move_carret, first_token_index)
+                        ))
+        self.close_words_list.set_rows(rows)
+
+    def _on_frequent_word_enter(self, event):
+        self.text_editor.highlight_same_word(event, self.word_freq_text, tag_prefix=FREQUENT_WORD_PREFIX,
+                                             tooltip="Kliknutím nájsť další výskyt.")
+
+    def _on_frequent_word_click(self, event):
+        return self.text_editor.jump_to_next_word_occourence(event, self.word_freq_text,
+                                                             tag_prefix=FREQUENT_WORD_PREFIX)
+
+    def _on_close_word_enter(self, event):
+        self.text_editor.highlight_same_word(event, self.close_words_text, tooltip="Kliknutím nájsť další výskyt.")
+
+    def _on_close_word_click(self, event):
+        return self.text_editor.jump_to_next_word_occourence(event, self.close_words_text,
+                                                             tag_prefix=CLOSE_WORD_PREFIX)
+
+    def _on_close_word_range_enter(self, prefix, tooltip, event):
+        self.text_editor.highlight_same_word(event, self.close_words_text, tag_prefix=prefix, tooltip=tooltip)
 
-                for word_partition in word_partitions:
-                    first_token = word_partition[0]
-                    last_token = word_partition[-1]
-                    first_token_index = self.text_editor.index(f"1.0+{first_token.idx} chars")
-                    first_token_par = first_token_index.split(".")[0]
-                    last_token_par = self.text_editor.index(f"1.0+{last_token.idx} chars").split(".")[0]
-                    prefix = f"{tag_name}:{CLOSE_WORD_RANGE_PREFIX}"
-                    range_tag_name = f"{prefix}{first_token_par}"
-                    if len(word_partitions) > 1:
-                        partition_text = f" ods.{first_token_par}-{last_token_par} \t\t{len(word_partition)}x\n"
-                        panel_start_index = f"1.0 + {panel_start_char} chars"
-                        panel_end_index = f"1.0 + {panel_start_char + len(partition_text)} chars"
-                        self.close_words_text.insert(tk.END, partition_text)
-                        self.close_words_text.tag_add(range_tag_name, panel_start_index, panel_end_index)
-                        tooltip = f"Kliknutím prejsť na odsek {first_token_par}."
-                        GuiUtils.bind_tag_mouse_event(range_tag_name,
-                                                      self.close_words_text,
-                                                      lambda e, p=prefix,
-                                                             t=tooltip: self.text_editor.highlight_same_word(
-                                                          e,
-                                                          self.close_words_text,
-                                                          tag_prefix=p,
-                                                          tooltip=t
-                                                      ),
-                                                      lambda e: self.text_editor.unhighlight_same_word(e),
-                                                      on_click=partial(
-                                                          self.text_editor.move_carret,
-                                                          first_token_index
-                                                      )
-                                                      )
-                        panel_start_char += len(partition_text)
-            self.close_words_text.config(state=tk.DISABLED)
+    def _on_panel_row_leave(self, event):
+        self.text_editor.unhighlight_same_word(event)
 
     def undo(self, event=None):
         self.text_editor.edit_undo()
@@ -614,11 +592,41 @@ class MainWindow:
 
     # LOAD TEXT FILE
     def import_file_contents(self, item, file_path):
-        text = ImportService.import_document(file_path)
-        item.contents = HTextFile(text, [])
-        item.imported_path = file_path
+        self.when_pandoc_ready(lambda: self._start_import(item, file_path))
+
+    def _start_import(self, item, file_path):
+        ctx = self.ctx
+
+        def analyze_paragraphs(paragraphs):
+            # DOCUMENT MAY BE IMPORTED BEFORE PIPELINE IS LOADED. POOL IS OPTIONAL, SO IT IS NOT AWAITED
+            if ctx.startup is None or ctx.startup.wait(STARTUP_RESOURCE_NLP):
+                NlpService.prefetch_paragraphs(paragraphs, ctx.nlp, NLP_BATCH_SIZE, ctx.nlp_pool)
+
+        # DOCUMENT IS IMPORTED AND ANALYZED IN BACKGROUND, SO GUI CAN SHOW PROGRESS OF LARGE DOCUMENTS
+        worker = ImportWorker(file_path, analyze_paragraphs)
+        worker.start()
+        splash = SplashWindow(self.root)
+        splash.update_status("importujem dokument...")
+        self.root.after(IMPORT_POLL_INTERVAL, self._poll_import, worker, splash, item)
+
+    # CHECK PROGRESS OF DOCUMENT IMPORT AND OPEN IMPORTED TEXT WHEN IT IS FINISHED
+    def _poll_import(self, worker, splash, item):
+        if not worker.is_finished():
+            splash.update_status(f"importujem dokument... (importované znaky: {worker.imported_chars})")
+            self.root.after(IMPORT_POLL_INTERVAL, self._poll_import, worker, splash, item)
+            return
+        self._close_splash(splash)
+        if worker.error is not None:
+            messagebox.showerror("Chyba", "Dokument sa nepodarilo importovať.")
+            return
+        item.contents = HTextFile(worker.text, [])
+        item.imported_path = worker.file_path
+        # IMPORTED TEXT IS OWNED BY PROJECT ITEM FROM NOW ON
+        worker.text = None
         ProjectService.save_file_contents(self.ctx.project, item)
         ProjectService.save(self.ctx.project, self.ctx.project.path)
+        # ANALYSIS OF OPENED TEXT REUSES PARAGRAPHS ANALYZED DURING IMPORT
+        self.text_editor.pending_import = worker
         self._show_project_files()
         self.open_text_file(item)
 
@@ -626,6 +634,7 @@ class MainWindow:
     def close_project(self, navigate_to_selector=True):
         self.ctx.current_file = None
         self.ctx.project = None
+        self.text_editor.stop_analysis()
         self.main_frame.destroy()
         self.menu_bar.destroy()
         self.tooltip.destroy()
@@ -765,6 +774,41 @@ class MainWindow:
             return
         self.import_file_contents(self.ctx.current_file, self.ctx.current_file.imported_path)
 
+    # PANDOC IS DOWNLOADED IN BACKGROUND DURING STARTUP. IMPORT AND EXPORT ARE EXECUTED WHEN IT IS READY
+    def when_pandoc_ready(self, action):
+        if self.ctx.startup is None or self.ctx.startup.is_ready(STARTUP_RESOURCE_PANDOC):
+            action()
+            return
+        splash = SplashWindow(self.root)
+        splash.update_status("sťahujem modul pandoc...")
+
+        def on_finished(ready):
+            self._close_splash(splash)
+            if ready:
+                action()
+            else:
+                messagebox.showerror("Chyba", "Nepodarilo sa stiahnuť modul pandoc. Overte prosím, že máte "
+                                              "internetové pripojenie!")
+
+        self.root.after(STARTUP_POLL_INTERVAL, self._poll_startup_resource, STARTUP_RESOURCE_PANDOC, on_finished)
+
+    # CHECK IF RESOURCE LOADED DURING STARTUP IS FINISHED. GUI IS NOT BLOCKED WHILE IT IS LOADED
+    def _poll_startup_resource(self, name, on_finished):
+        startup = self.ctx.startup
+        ready = startup is None or startup.is_ready(name)
+        if not ready and name not in startup.failed():
+            self.root.after(STARTUP_POLL_INTERVAL, self._poll_startup_resource, name, on_finished)
+            return
+        on_finished(ready)
+
+    def _close_splash(self, splash):
+        splash.close()
+        self.root.deiconify()
+        if platform.system() == "Windows" or platform.system() == "Darwin":
+            self.root.state("zoomed")
+        else:
+            self.root.attributes('-zoomed', True)
+
     # SAVE TEXT FILE
     def export_file(self):
         file_path = filedialog.asksaveasfilename(
@@ -780,15 +824,18 @@ class MainWindow:
             text = self.text_editor.get_text(1.0, tk.END)
             ExportService.export_text_file(file_path, text)
         else:
-            text = self.text_editor.get_text_as_html()
-            config = self.ctx.global_config
-            ExportService.export_rich_file(
-                file_path,
-                text,
-                first_line_indent=config.appearance_settings.paragraph_lmargin1,
-                spacing_after=config.appearance_settings.paragraph_spacing3,
-                spacing_before=0,
-            )
+            self.when_pandoc_ready(lambda: self._export_rich_file(file_path))
+
+    def _export_rich_file(self, file_path):
+        text = self.text_editor.get_text_as_html()
+        config = self.ctx.global_config
+        ExportService.export_rich_file(
+            file_path,
+            text,
+            first_line_indent=config.appearance_settings.paragraph_lmargin1,
+            spacing_after=config.appearance_settings.paragraph_spacing3,
+            spacing_before=0,
+        )
 
     # SAVE SETTINGS TO FILE
     def export_settings(self):
@@ -857,7 +904,10 @@ class MainWindow:
                     dep_view = ImageTk.PhotoImage(dep_image.resize((200, math.ceil(dep_image.height * scaling_ratio))))
                     self.dep_image_holder.config(image=dep_view)
                     self.dep_image_holder.image = dep_view
-                thes_result = self.ctx.thesaurus.lookup(self.current_instrospection_token.lemma_)
+                # THESAURUS MAY STILL BE LOADING DURING STARTUP
+                thes_result = None
+                if self.ctx.thesaurus is not None:
+                    thes_result = self.ctx.thesaurus.lookup(self.current_instrospection_token.lemma_)
                 morph = self.current_instrospection_token.morph.to_dict()
                 formatted_morph = ''.join([f"  {key}:\t{value}\n" for key, value in morph.items()])
 
@@ -947,7 +997,7 @@ class MainWindow:
                         # FOR NOW, WE SUPPORT ONLY HUNSPELL SUGGESTIONS, BUT WE MAY PROVIDE SUGGESTION
                         # FOR MORE ADVANCED SPELLCHECKS IN FUTURE
                         if token._.grammar_error_type == GRAMMAR_ERROR_TYPE_MISSPELLED_WORD:
-                            suggestions = self.ctx.spellcheck_dictionary.suggest(token.text)
+                            suggestions = self.text_editor.suggestion_worker.get_now(token.text)
                             for index, suggestion in enumerate(suggestions):
                                 s = suggestion
                                 context_menu_items.append(
@@ -995,6 +1045,12 @@ class MainWindow:
                                               self.on_project_change)
         GuiUtils.configure_modal(self.root, edit_project_modal.toplevel, width=500, height=180)
 
+    # SHOW PROFILER DEBUG PANEL
+    def show_profiler(self):
+        profiler_modal = ProfilerModal(self.root, lambda: self.text_editor.analyze_text(True))
+        # PANEL IS NOT MODAL, SO MEASUREMENTS CAN BE WATCHED WHILE TYPING
+        profiler_modal.toplevel.geometry("900x600")
+
     def on_project_change(self):
         self.update_title()
         self.project_name_element.config(text=self.ctx.project.name)
@@ -1039,16 +1095,18 @@ class MainWindow:
         splash = SplashWindow(self.root)
         # noinspection PyBroadException
         splash.update_status("aktualizujem a reinicializujem slovníky...")
+        # DICTIONARIES LOADED DURING STARTUP WOULD OTHERWISE REPLACE UPGRADED ONES
+        self.root.after(STARTUP_POLL_INTERVAL, self._poll_startup_resource, STARTUP_RESOURCE_DICTIONARIES,
+                        lambda ready: self._upgrade_dictionaries(splash))
+
+    def _upgrade_dictionaries(self, splash):
         dictionaries = SpellcheckService.upgrade_dictionaries()
-        splash.close()
-        self.root.deiconify()
-        if platform.system() == "Windows" or platform.system() == "Darwin":
-            self.root.state("zoomed")
-        else:
-            self.root.attributes('-zoomed', True)
+        self._close_splash(splash)
         if dictionaries is not None:
             self.ctx.spellcheck_dictionary = dictionaries["spellcheck"]
             self.ctx.thesaurus = dictionaries["thesaurus"]
+            # SUGGESTIONS OF OLD DICTIONARY ARE NOT VALID ANYMORE
+            self.text_editor.suggestion_worker.clear()
         else:
             messagebox.showerror("Chyba!", "Slovníky sa nepodarilo aktualizovať. Skontrolujte internetové pripojenie.")
 
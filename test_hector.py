@@ -1,35 +1,71 @@
+import csv
+import hashlib
+import http.client
+import io
+import json
 import os
 import platform
 import re
 import shutil
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from hunspell import Hunspell
 from pythes import PyThes
 from spacy.lang.sk import Slovak
 from spacy.tokens import Doc
-
+from spacy.vocab import Vocab
+
+from src.backend.analysis_server import AnalysisServer, ServerBusyError
+from src.backend.analysis_worker import AnalysisWorker
+from src.backend.import_worker import ImportWorker
+import src.backend.morphodita_tagger_morphologizer_lemmatizer as morphodita_component
+from src.backend.morphodita_tagger_morphologizer_lemmatizer import TAG_CACHE, LEMMA_CACHE
+from src.backend.profiler import Profiler
 from src.backend.run_context import RunContext
+from src.backend.service.batch_analysis_service import BatchAnalysisService
+from src.backend.service.analysis_service import AnalysisService
+from src.backend.spellcheck_cache import SpellcheckCache
+from src.backend.startup_loader import StartupLoader
+from src.backend.suggestion_worker import SuggestionWorker
 from src.backend.service.config_service import ConfigService
+from src.backend.service.download_service import DownloadService, DownloadError
 from src.backend.service.export_service import ExportService
 from src.backend.service.import_service import ImportService
 from src.backend.service.metadata_service import MetadataService
-from src.backend.service.nlp_service import NlpService
+from src.backend.service.nlp_service import NlpService, HectorTokenizer
 from src.backend.service.project_service import ProjectService
-from src.backend.service.spellcheck_service import SpellcheckService
+from src.backend.service.spellcheck_service import SpellcheckService, BASIC_SPELLING_TIMING, \
+    DEPENDENCY_MATCHER_TIMING, DEPENDENCY_RULES
 from src.const.grammar_error_types import GRAMMAR_ERROR_TYPE_MISSPELLED_WORD, GRAMMAR_ERROR_TYPE_WRONG_Y_SUFFIX, \
     GRAMMAR_ERROR_TYPE_WRONG_I_SUFFIX, NON_LITERAL_WORDS, GRAMMAR_ERROR_NON_LITERAL_WORD, \
     GRAMMAR_ERROR_TOMU_INSTEAD_OF_TO, GRAMMAR_ERROR_Z_INSTEAD_OF_S, GRAMMAR_ERROR_S_INSTEAD_OF_Z, \
     GRAMMAR_ERROR_SVOJ_MOJ_TVOJ_PLUR, GRAMMAR_ERROR_SVOJ_MOJ_TVOJ_SING
 from src.const.paths import DATA_DIRECTORY, CONFIG_FILE_PATH, METADATA_FILE_PATH
 from src.const.tags import BOLD_TAG_NAME
-from src.const.values import NLP_BATCH_SIZE
+from src.const.typography_issue_types import TYPOGRAPHY_MULTIPLE_SPACES, TYPOGRAPHY_TRAILING_SPACES, \
+    TYPOGRAPHY_MULTIPLE_PUNCTUATION, TYPOGRAPHY_COMPUTER_QUOTE_MARK, TYPOGRAPHY_DANGLING_QUOTE_MARK, \
+    TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK, TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK
+from src.const.values import NLP_BATCH_SIZE, NLP_PARALLEL_MIN_TEXT_LENGTH, SPELLCHECK_CACHE_SIZE, \
+    BATCH_REPORT_FORMAT_JSON, BATCH_REPORT_FORMAT_CSV, MIRROR_CHECKSUMS_FILE_NAME, \
+    DOWNLOAD_PART_SUFFIX, DOWNLOAD_VALIDATOR_SUFFIX
+from src.domain.analysis import AnalysisRequest, AnalysisResult
+from src.domain.batch_analysis import BatchReport
 from src.domain.config import Config
+from src.domain.download import Download
 from src.domain.htext_file import HTextFile, HTextFormattingTag
 from src.domain.metadata import Metadata
 from src.domain.project import Project, ProjectItemType, ProjectItem, DirectoryProjectItem
+from src.gui.tag_batch import TagBatch, merge_ranges, subtract_ranges
 from src.utils import Utils
-from test_utils import TestUtils
+from test_utils import TestUtils, MORPHODITA_PIPE_NAME, PAGE_SIZE
 
 SENTENCES_FILE = "sentences.txt"
 TXT_EXPORT_FILE = "export.txt"
@@ -222,25 +258,469 @@ def test_partial_nlp(setup_teardown):
     original_doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
     assert original_doc is not None
     assert isinstance(original_doc, Doc)
-    doc1 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_AT_START, original_doc, nlp, Config(), 6)
+    doc1 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_AT_START, original_doc, nlp, Config())
     assert doc1 is not None
     assert isinstance(doc1, Doc)
     assert doc1._.total_chars == len(TEST_TEXT_4_CHANGE_AT_START.replace('\n', ''))
     assert doc1.text == Utils.normalize_spaces(TEST_TEXT_4_CHANGE_AT_START)
-    doc2 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_AT_END, original_doc, nlp, Config(),
-                                       len(TEST_TEXT_4_CHANGE_AT_END) - 1)
+    doc2 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_AT_END, original_doc, nlp, Config())
     assert doc2 is not None
     assert isinstance(doc2, Doc)
     assert doc2._.total_chars == len(TEST_TEXT_4_CHANGE_AT_END.replace('\n', ''))
     assert doc2.text == Utils.normalize_spaces(TEST_TEXT_4_CHANGE_AT_END)
-    doc3 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_IN_MID, original_doc, nlp, Config(),
-                                       897)
+    doc3 = NlpService.partial_analysis(TEST_TEXT_4_CHANGE_IN_MID, original_doc, nlp, Config())
     assert doc3 is not None
     assert isinstance(doc3, Doc)
     assert doc3._.total_chars == len(TEST_TEXT_4_CHANGE_AT_END.replace('\n', ''))
     assert doc3.text == Utils.normalize_spaces(TEST_TEXT_4_CHANGE_IN_MID)
 
 
+# TEST IF SPLITTING TEXT TO PARAGRAPHS AND CHUNKS KEEPS WHOLE TEXT
+def test_split_to_chunks():
+    paragraphs = NlpService.split_to_paragraphs(TEST_TEXT_4)
+    assert "".join(paragraphs) == TEST_TEXT_4
+    assert all(paragraph.endswith("\n") for paragraph in paragraphs[:-1])
+    assert NlpService.split_to_paragraphs("") == [""]
+    chunks = NlpService.split_to_chunks(paragraphs, 4)
+    assert len(chunks) == 4
+    assert [p for chunk in chunks for p in chunk] == paragraphs
+    assert NlpService.split_to_chunks(paragraphs, 1) == [paragraphs]
+
+
+# TEST IF ONLY CHANGED PARAGRAPHS ARE ANALYZED AGAIN
+def test_paragraph_cache(setup_teardown):
+    nlp = setup_teardown[0]
+    cache = NlpService.paragraph_cache
+    cache.clear()
+    doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
+    paragraph_count = len(NlpService.split_to_paragraphs(TEST_TEXT_4))
+    assert cache.misses == paragraph_count and cache.hits == 0
+    cache.hits = 0
+    cache.misses = 0
+    changed_doc = NlpService.full_analysis(TEST_TEXT_4_CHANGE_IN_MID, nlp, NLP_BATCH_SIZE, Config())
+    assert cache.misses == 1 and cache.hits == paragraph_count - 1
+    assert changed_doc.text == Utils.normalize_spaces(TEST_TEXT_4_CHANGE_IN_MID)
+    # CACHED RESULT IS SAME AS FRESH RESULT
+    cached_doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
+    assert [t.lemma_ for t in cached_doc] == [t.lemma_ for t in doc]
+    assert cached_doc._.total_words == doc._.total_words
+    assert len(cached_doc._.paragraphs) == len(doc._.paragraphs)
+
+
+# TEST IF STATISTICS UPDATED BY CHANGED PARAGRAPHS ARE SAME AS FRESHLY COMPUTED STATISTICS
+def test_incremental_stats(setup_teardown):
+    nlp = setup_teardown[0]
+    original_doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
+    doc = NlpService.full_analysis(TEST_TEXT_4_CHANGE_IN_MID, nlp, NLP_BATCH_SIZE, Config(),
+                                   previous_doc=original_doc)
+    fresh_doc = NlpService.full_analysis(TEST_TEXT_4_CHANGE_IN_MID, nlp, NLP_BATCH_SIZE, Config())
+    assert doc._.stats.word_counts == fresh_doc._.stats.word_counts
+    assert doc._.stats.lemma_counts == fresh_doc._.stats.lemma_counts
+    assert doc._.total_words == fresh_doc._.total_words
+    assert doc._.total_unique_words == len(doc._.unique_words)
+    assert [w._.word_index for w in doc._.words] == list(range(doc._.total_words))
+    for paragraph in doc._.paragraphs:
+        assert all(t._.paragraph == paragraph for t in paragraph)
+    # OCCOURENCE INDEX OF PREVIOUS DOCUMENT IS REUSED. ONLY WORDS OF CHANGED PARAGRAPHS GET NEW SET OF PARAGRAPHS
+    previous_stats = original_doc._.stats
+    stats = doc._.stats
+    changed_keys = set(previous_stats.paragraph_keys) ^ set(stats.paragraph_keys)
+    assert len(changed_keys) > 0
+    changed_words = set()
+    for s in [previous_stats, stats]:
+        for key, paragraph_stats in zip(s.paragraph_keys, s.paragraph_stats):
+            if key in changed_keys:
+                changed_words.update(paragraph_stats.words)
+    reused_words = [w for w in stats.word_paragraphs if w not in changed_words]
+    assert len(reused_words) > 0
+    assert all(stats.word_paragraphs[w] is previous_stats.word_paragraphs[w] for w in reused_words)
+    assert all(stats.word_paragraphs[w] is not previous_stats.word_paragraphs.get(w) for w in changed_words
+               if w in stats.word_paragraphs)
+    assert stats.word_paragraphs == fresh_doc._.stats.word_paragraphs
+    assert stats.lemma_paragraphs == fresh_doc._.stats.lemma_paragraphs
+    # OCCOURENCES RESOLVED FROM REUSED INDEX ARE SAME AS OCCOURENCES OF FRESHLY ANALYZED DOCUMENT
+    fresh_unique_words = fresh_doc._.unique_words
+    for key, unique_word in doc._.unique_words.items():
+        fresh_word = fresh_unique_words[key]
+        assert len(unique_word) == len(fresh_word)
+        assert unique_word.token_indexes == fresh_word.token_indexes
+        assert unique_word.char_offsets == fresh_word.char_offsets
+        assert unique_word.word_indexes == fresh_word.word_indexes
+
+
+# TEST IF ANALYSIS IN PROCESS POOL GIVES SAME RESULT AS ANALYSIS IN MAIN PROCESS
+def test_parallel_full_analysis(setup_teardown):
+    nlp = setup_teardown[0]
+    text = "\n".join([TEST_TEXT_4] * (NLP_PARALLEL_MIN_TEXT_LENGTH // len(TEST_TEXT_4) + 1))
+    NlpService.paragraph_cache.clear()
+    pool = NlpService.create_pool(2)
+    assert pool is not None
+    # POOL IS STARTED LAZILY, FIRST LONG TEXT IS ANALYZED IN MAIN PROCESS
+    assert pool.get_executor() is None
+    assert pool.start(wait=True)
+    try:
+        parallel_doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, Config(), pool)
+    finally:
+        pool.shutdown()
+    NlpService.paragraph_cache.clear()
+    doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, Config())
+    assert parallel_doc.text == doc.text
+    assert [t.idx for t in parallel_doc] == [t.idx for t in doc]
+    assert [t.lemma_ for t in parallel_doc] == [t.lemma_ for t in doc]
+    assert [t._.pdt_morph for t in parallel_doc] == [t._.pdt_morph for t in doc]
+    assert parallel_doc._.total_words == doc._.total_words
+    assert len(parallel_doc._.paragraphs) == len(doc._.paragraphs)
+    assert parallel_doc._.total_unique_words == doc._.total_unique_words
+
+
+# TEST IF BACKGROUND ANALYSIS PRODUCES SAME RESULTS AS DIRECT NLP
+def test_analysis_service(setup_teardown):
+    nlp = setup_teardown[0]
+    spellcheck_dictionary = setup_teardown[1]
+    c = Config()
+    c.analysis_settings.close_words_min_frequency = 1
+    result = AnalysisService.analyze(AnalysisRequest(1, TEST_TEXT_4, None, c), nlp, spellcheck_dictionary)
+    assert result.revision == 1
+    assert result.full_analysis
+    assert result.doc.text == Utils.normalize_spaces(TEST_TEXT_4)
+    assert len(result.close_words) > 0
+    result = AnalysisService.analyze(
+        AnalysisRequest(2, TEST_TEXT_4_CHANGE_AT_START, result.doc, c), nlp, spellcheck_dictionary
+    )
+    assert result.revision == 2
+    assert not result.full_analysis
+    assert result.doc.text == Utils.normalize_spaces(TEST_TEXT_4_CHANGE_AT_START)
+
+
+# TEST THAT WORKER DROPS STALE REQUESTS
+def test_analysis_worker():
+    started = threading.Event()
+    release = threading.Event()
+    analyzed = []
+
+    def analyze(request):
+        started.set()
+        release.wait(5)
+        analyzed.append(request.revision)
+        return AnalysisResult(request.revision, request.text, None, request.config, True)
+
+    worker = AnalysisWorker(analyze)
+    worker.start()
+    worker.submit(AnalysisRequest(1, "a", None, Config()))
+    assert started.wait(5)
+    # REVISION 2 IS REPLACED BY REVISION 3 BEFORE WORKER PICKS IT UP
+    worker.submit(AnalysisRequest(2, "ab", None, Config()))
+    worker.submit(AnalysisRequest(3, "abc", None, Config()))
+    release.set()
+    for _ in range(500):
+        if not worker.is_busy():
+            break
+        time.sleep(0.01)
+    worker.stop()
+    assert analyzed == [1, 3]
+    result = worker.poll()
+    assert result.revision == 3 and result.text == "abc"
+    assert worker.poll() is None
+
+
+def test_benchmark_helpers():
+    assert TestUtils.percentile([5, 1, 4, 2, 3], 50) == 3
+    assert TestUtils.percentile([5, 1, 4, 2, 3], 99) == 5
+    with open("test_files/sample.txt", 'r', encoding='utf-8') as file:
+        source_text = file.read()
+    corpus = TestUtils.create_corpus(source_text, 10, 42)
+    assert len(corpus) >= 10 * PAGE_SIZE
+    assert corpus == TestUtils.create_corpus(source_text, 10, 42)
+    paragraphs = corpus.split("\n")
+    assert len(set(paragraphs)) == len(paragraphs)
+
+
+def test_profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.backend.profiler.PROFILE_CAPTURES_DIR", str(tmp_path))
+    monkeypatch.setattr(Profiler, "enabled", False)
+    assert Profiler.begin(1) is None
+    with Profiler.stage("nlp") as timing:
+        assert timing is None
+    monkeypatch.setattr(Profiler, "enabled", True)
+    Profiler.request_capture()
+    profile = Profiler.begin(2)
+    with Profiler.stage("nlp", 10):
+        with Profiler.stage("nlp.pipe"):
+            time.sleep(0.01)
+    Profiler.record("spellcheck", 0.5)
+    assert Profiler.end() is profile
+    assert Profiler.current() is None
+    assert [s.name for s in profile.stages] == ["nlp", "nlp.pipe", "spellcheck"]
+    assert profile.stages[0].duration >= profile.stages[1].duration >= 0.01
+    assert profile.stages[0].tokens == 10
+    assert profile.total() == profile.stages[0].duration + 0.5
+    assert os.path.isfile(profile.capture_path)
+    # CAPTURE IS DONE ONLY ONCE
+    Profiler.begin(3)
+    assert Profiler.end().capture_path is None
+
+
+def test_pipeline_snapshot(setup_teardown, tmp_path):
+    nlp = NlpService._build_pipeline()
+    path = os.path.join(tmp_path, "snapshot")
+    NlpService._save_snapshot(nlp, path)
+    assert os.listdir(tmp_path) == ["snapshot"]
+    snapshot_nlp = NlpService._load_snapshot(path)
+    assert isinstance(snapshot_nlp.tokenizer, HectorTokenizer)
+    assert snapshot_nlp.pipe_names == nlp.pipe_names
+    for text in [TEST_TEXT_1, TEST_TEXT_3, TEST_TEXT_4]:
+        assert [(t.text, t.lemma_, t.pos_, t.dep_, str(t.morph)) for t in snapshot_nlp(text)] == \
+               [(t.text, t.lemma_, t.pos_, t.dep_, str(t.morph)) for t in nlp(text)]
+    # BROKEN SNAPSHOT IS REMOVED, SO PIPELINE IS ASSEMBLED AGAIN
+    with open(os.path.join(path, "config.cfg"), 'w', encoding='utf-8') as file:
+        file.write("broken")
+    assert NlpService._load_snapshot(path) is None
+    assert not os.path.exists(path)
+
+
+def test_startup_loader():
+    order = []
+    model_loading = threading.Event()
+
+    def load_model():
+        model_loading.wait(5)
+        order.append("model")
+
+    def fail():
+        raise RuntimeError("offline")
+
+    loader = StartupLoader()
+    loader.add("model", load_model)
+    loader.add("pool", lambda: order.append("pool"), depends_on=["model"])
+    loader.add("dictionary", lambda: order.append("dictionary"))
+    loader.add("pandoc", fail)
+    loader.add("converter", lambda: order.append("converter"), depends_on=["pandoc"])
+    loader.start()
+    # INDEPENDENT RESOURCES DO NOT WAIT FOR SLOW ONES
+    assert loader.wait("dictionary")
+    assert not loader.is_ready("model", "pool")
+    assert not loader.wait("model", timeout=0.01)
+    model_loading.set()
+    assert loader.wait("pool")
+    assert order.index("model") < order.index("pool")
+    assert not loader.wait("converter")
+    assert sorted(loader.failed()) == ["converter", "pandoc"]
+    assert loader.is_finished()
+    # RESOURCES NOT MANAGED BY LOADER ARE ALWAYS READY
+    assert loader.is_ready("unknown")
+
+
+# TEST IF EDITOR DOCUMENT CAN BE CREATED BEFORE PIPELINE IS LOADED
+def test_empty_doc():
+    doc = NlpService.create_empty_doc()
+    assert doc.text == ""
+    assert doc._.total_words == 0
+    assert doc._.paragraphs == []
+    assert NlpService.compute_readability(doc) == 0
+
+
+# ENTRY POINTS OF APPLICATION, WHOSE IMPORT IS MEASURED. TOGETHER THEY IMPORT ALL MODULES OF APPLICATION
+IMPORT_TIME_MODULES = ["hector", "src.backend.service.batch_analysis_service", "src.backend.analysis_server"]
+# MAXIMAL SELF IMPORT TIME OF EACH APPLICATION MODULE IN SECONDS. SELF TIME DOES NOT INCLUDE IMPORTED LIBRARIES LIKE
+# SPACY, SO IT MEASURES ONLY WORK DONE IN MODULE BODY. IT IS FEW MILLISECONDS, SO BUDGET HAS HEADROOM FOR SLOW CI RUNNERS.
+# SUBPROCESSES AND READING OF DATA FILES ON IMPORT ARE CAUGHT BY test_import_has_no_side_effects
+IMPORT_SELF_TIME_BUDGET = 0.1
+
+
+def get_import_self_times(module):
+    """Self import time of application modules imported by module in fresh interpreter, measured by python -X importtime"""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    # FIRST IMPORT COMPILES BYTECODE, WHICH WOULD OTHERWISE BE COUNTED TO SELF TIME
+    subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True, cwd=cwd, check=True)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                            text=True, cwd=cwd, check=True)
+    self_times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].strip()
+        if name == "hector" or name == "src" or name.startswith("src."):
+            self_times[name] = int(parts[0].split(":")[-1]) / 1000000
+    return self_times
+
+
+def test_import_time_budget():
+    for module in IMPORT_TIME_MODULES:
+        self_times = get_import_self_times(module)
+        assert module in self_times
+        for name, self_time in self_times.items():
+            assert self_time < IMPORT_SELF_TIME_BUDGET, f"{name} imported in {self_time:.3f}s"
+
+
+def test_import_has_no_side_effects():
+    # IMPORT OF SERVICES AND ENTRY POINTS MUST NOT START SUBPROCESSES OR READ DATA FILES
+    code = "\n".join([
+        "import builtins, subprocess",
+        "def forbidden(*args, **kwargs):",
+        "    raise AssertionError('subprocess started on import')",
+        "subprocess.Popen = forbidden",
+        "original_open = builtins.open",
+        "def checked_open(file, *args, **kwargs):",
+        "    assert 'data_files' not in str(file), f'{file} read on import'",
+        "    return original_open(file, *args, **kwargs)",
+        "builtins.open = checked_open",
+        "import src.backend.service.import_service",
+        "import src.backend.service.export_service",
+        "import src.backend.service.batch_analysis_service",
+        "import src.backend.analysis_server",
+        "import hector",
+        "from src.backend.service.spellcheck_service import SpellcheckService",
+        "assert SpellcheckService._misstagged_words is None",
+    ])
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    assert "ďalší" in SpellcheckService.get_misstagged_words()
+
+
+def test_download_service(tmp_path, monkeypatch):
+    content = os.urandom(3 * 1024 * 1024)
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode='w:gz') as tar_file:
+        info = tarfile.TarInfo("model-1.0/model.bin")
+        info.size = len(content)
+        tar_file.addfile(info, io.BytesIO(content))
+    archive = archive.getvalue()
+    checksum = hashlib.sha256(archive).hexdigest()
+    requested_ranges = []
+    archive_requests = []
+
+    class ArchiveHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.endswith("/SHA256SUMS"):
+                checksums = f"{checksum}  model-1.0.tar.gz\n{checksum}  *copy.tar.gz\n".encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(checksums)))
+                self.end_headers()
+                self.wfile.write(checksums)
+                return
+            archive_requests.append(self.path)
+            start = 0
+            # RANGE IS HONORED ONLY IF PART FILE WAS STARTED FROM CURRENT VERSION OF FILE
+            if "Range" in self.headers and self.headers.get("If-Range") == '"v2"':
+                start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+                requested_ranges.append(start)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(archive) - 1}/{len(archive)}")
+            else:
+                self.send_response(200)
+            self.send_header("ETag", '"v2"')
+            self.send_header("Content-Length", str(len(archive) - start))
+            self.end_headers()
+            # FIRST RESPONSE IS INTERRUPTED IN THE MIDDLE OF FILE
+            end = len(archive) if start > 0 else len(archive) // 2
+            self.wfile.write(archive[start:end])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/model-1.0.tar.gz"
+    checksums_url = f"http://127.0.0.1:{server.server_address[1]}/SHA256SUMS"
+    try:
+        download = Download(url, os.path.join(tmp_path, "model-1.0.tar.gz"), sha256=checksum)
+        DownloadService.download_all([download])
+        assert len(requested_ranges) == 1 and requested_ranges[0] > 0
+        DownloadService.extract(download.path, str(tmp_path), "model-1.0")
+        assert os.listdir(tmp_path) == ["model-1.0"]
+        with open(os.path.join(tmp_path, "model-1.0", "model.bin"), 'rb') as file:
+            assert file.read() == content
+        with pytest.raises(DownloadError):
+            DownloadService.download(Download(url, os.path.join(tmp_path, "broken.tar.gz"), sha256="0" * 64))
+        assert os.listdir(tmp_path) == ["model-1.0"]
+        # PART FILE OF OLDER VERSION OF FILE IS NOT RESUMED, WHOLE NEW FILE IS DOWNLOADED INSTEAD
+        stale_path = os.path.join(tmp_path, "stale.tar.gz")
+        with open(stale_path + DOWNLOAD_PART_SUFFIX, 'wb') as file:
+            file.write(os.urandom(len(archive) // 2))
+        with open(stale_path + DOWNLOAD_PART_SUFFIX + DOWNLOAD_VALIDATOR_SUFFIX, 'w', encoding='utf-8') as file:
+            file.write('"v1"')
+        requested_ranges.clear()
+        DownloadService.download_all([Download(url, stale_path)])
+        # ONLY INTERRUPTED DOWNLOAD OF NEW VERSION IS RESUMED
+        assert len(requested_ranges) == 1 and requested_ranges[0] <= len(archive) // 2
+        assert DownloadService.compute_checksum(stale_path) == checksum
+        os.remove(stale_path)
+        assert os.listdir(tmp_path) == ["model-1.0"]
+        # EXISTING FILE IS VERIFIED BY PUBLISHED CHECKSUM AND DOWNLOADED AGAIN ONLY IF IT DOES NOT MATCH
+        copy_path = os.path.join(tmp_path, "copy.tar.gz")
+        with open(copy_path, 'wb') as file:
+            file.write(archive[:-1] + b"x")
+        archive_requests.clear()
+        DownloadService.download(Download(url, copy_path, checksums_url=checksums_url))
+        assert DownloadService.compute_checksum(copy_path) == checksum
+        assert len(archive_requests) > 0
+        archive_requests.clear()
+        DownloadService.download(Download(url, copy_path, checksums_url=checksums_url))
+        assert archive_requests == []
+        os.remove(copy_path)
+        # FILE WITHOUT PUBLISHED CHECKSUM IS NOT DOWNLOADED
+        with pytest.raises(DownloadError):
+            DownloadService.download(Download(url, os.path.join(tmp_path, "other.tar.gz"), checksums_url=checksums_url))
+        assert archive_requests == []
+        assert os.listdir(tmp_path) == ["model-1.0"]
+        mirror_dir = os.path.join(tmp_path, "mirror")
+        DownloadService.create_mirror([Download(url, os.path.join(tmp_path, "model-1.0.tar.gz"))], mirror_dir)
+    finally:
+        server.shutdown()
+        server.server_close()
+    with open(os.path.join(mirror_dir, MIRROR_CHECKSUMS_FILE_NAME), 'r', encoding='utf-8') as file:
+        assert file.read() == f"{checksum}  model-1.0.tar.gz\n"
+    # SERVER IS STOPPED, SO FILE CAN BE ONLY COPIED FROM MIRROR
+    monkeypatch.setattr(DownloadService, "mirror_dir", mirror_dir)
+    DownloadService.download(Download(url, os.path.join(tmp_path, "model-1.0.tar.gz")))
+    assert DownloadService.compute_checksum(os.path.join(tmp_path, "model-1.0.tar.gz")) == checksum
+
+
+# TEST IF BATCHED MORPHODITA TAGGING GIVES SAME RESULTS AS TAGGING OF SINGLE DOCUMENTS
+def test_morphodita_pipe(setup_teardown):
+    nlp = setup_teardown[0]
+    texts = [TEST_TEXT_1, TEST_TEXT_3, TEST_TEXT_5]
+    for piped_doc, text in zip(nlp.pipe(texts, batch_size=2), texts):
+        doc = nlp(text)
+        assert [t.lemma_ for t in piped_doc] == [t.lemma_ for t in doc]
+        assert [t.pos_ for t in piped_doc] == [t.pos_ for t in doc]
+        assert [str(t.morph) for t in piped_doc] == [str(t.morph) for t in doc]
+        assert [t._.lemma_comments for t in piped_doc] == [t._.lemma_comments for t in doc]
+        assert [t._.pdt_morph for t in piped_doc] == [t._.pdt_morph for t in doc]
+    # CACHED CONVERSIONS GIVE SAME RESULT AS ORIGINAL IMPLEMENTATION
+    component = nlp.get_pipe(MORPHODITA_PIPE_NAME)
+    sentencizer = nlp.get_pipe('sentencizer')
+    legacy_doc = TestUtils.legacy_call(component, sentencizer(nlp.make_doc(TEST_TEXT_4)))
+    doc = component(sentencizer(nlp.make_doc(TEST_TEXT_4)))
+    assert [(t.lemma_, t.pos_, str(t.morph), t._.lemma_comments) for t in doc] == \
+           [(t.lemma_, t.pos_, str(t.morph), t._.lemma_comments) for t in legacy_doc]
+
+
+# TEST IF PROCESS WIDE TAG CACHE HOLDS SAME MORPHS AS THOSE ASSIGNED TO TOKENS
+def test_morphodita_tag_cache(setup_teardown):
+    nlp = setup_teardown[0]
+    doc = nlp(TEST_TEXT_3)
+    assert len(TAG_CACHE) > 0
+    for token in doc:
+        pos, morph_attrs, morph = TAG_CACHE[token._.pdt_morph]
+        assert token.pos_ == pos
+        assert token.morph.key == morph
+        assert token.morph.to_dict() == morph_attrs
+        assert LEMMA_CACHE[token._.full_lemma] == (token.lemma_, token._.lemma_comments)
+
+
+# TEST IF FULL LEMMA CACHE EVICTS ONLY LEAST RECENTLY USED LEMMAS
+def test_morphodita_lemma_cache_eviction(setup_teardown, monkeypatch):
+    nlp = setup_teardown[0]
+    monkeypatch.setattr(morphodita_component, "LEMMA_CACHE_SIZE", 5)
+    LEMMA_CACHE.clear()
+    doc = nlp(TEST_TEXT_3)
+    assert len(set(t._.full_lemma for t in doc)) > 5
+    assert len(LEMMA_CACHE) == 5
+    assert doc[-1]._.full_lemma in LEMMA_CACHE
+    LEMMA_CACHE.clear()
+
+
 # TEST IF CUSTOM_EXTENSION ARE CORRECTLY FILLES
 def test_custom_extenstions(setup_teardown):
     nlp = setup_teardown[0]
@@ -285,6 +765,28 @@ def test_find_dangling_quote_marks(setup_teardown):
     assert sum(1 for _ in NlpService.find_dangling_quote_marks(doc)) == 2
 
 
+def test_typography_scanner_matches_legacy(setup_teardown):
+    nlp = setup_teardown[0]
+    legacy_functions = {
+        TYPOGRAPHY_MULTIPLE_SPACES: NlpService.find_multiple_spaces,
+        TYPOGRAPHY_MULTIPLE_PUNCTUATION: NlpService.find_multiple_punctuation,
+        TYPOGRAPHY_TRAILING_SPACES: NlpService.find_trailing_spaces,
+        TYPOGRAPHY_COMPUTER_QUOTE_MARK: NlpService.find_computer_quote_marks,
+        TYPOGRAPHY_DANGLING_QUOTE_MARK: NlpService.find_dangling_quote_marks,
+        TYPOGRAPHY_INCORRECT_LOWER_QUOTE_MARK: NlpService.find_incorrect_lower_quote_marks,
+        TYPOGRAPHY_INCORRECT_UPPER_QUOTE_MARK: NlpService.find_incorrect_upper_quote_marks,
+    }
+    for text in [TEST_TEXT_2, TEST_TEXT_QUOTES_1, TEST_TEXT_QUOTES_2, TEST_TEXT_QUOTES_3]:
+        doc = NlpService.full_analysis(text, nlp, NLP_BATCH_SIZE, Config())
+        # SECOND SCAN USES CACHED PARAGRAPHS
+        for _ in range(2):
+            issues = NlpService.find_typography_issues(doc)
+            for issue_type, legacy_function in legacy_functions.items():
+                expected = sorted((m.start(), m.end(), m.group()) for m in legacy_function(doc))
+                actual = sorted((i.start, i.end, i.text) for i in issues if i.issue_type == issue_type)
+                assert actual == expected
+
+
 def test_readability(setup_teardown):
     nlp = setup_teardown[0]
     doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
@@ -303,6 +805,13 @@ def test_word_frequencies(setup_teardown):
     assert word_frequencies[2].text == "tri" and len(word_frequencies[2].occourences) == 6
     assert word_frequencies[3].text == "dva" and len(word_frequencies[3].occourences) == 4
     assert word_frequencies[4].text == "jeden" and len(word_frequencies[4].occourences) == 2
+    # OCCOURENCE INDEX POINTS TO SAME TOKENS
+    for word in word_frequencies:
+        assert len(word) == len(word.occourences)
+        for token, char_offset, length in zip(word.occourences, word.char_offsets, word.lengths):
+            assert token.lower_ == word.text
+            assert token.idx == char_offset and len(token.text) == length
+        assert list(word.word_indexes) == [token._.word_index for token in word.occourences]
 
 
 def test_evaluate_close_words(setup_teardown):
@@ -325,6 +834,20 @@ def test_evaluate_close_words(setup_teardown):
     assert len(close_words["toto"]) == 2
 
 
+# TEST IF SLIDING WINDOW CLOSE WORDS GIVE SAME RESULTS AS LEGACY IMPLEMENTATION
+def test_close_words_match_legacy(setup_teardown):
+    nlp = setup_teardown[0]
+    doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
+    for min_frequency, min_distance, use_lemma in [(1, 10, False), (2, 50, True), (3, 100, False), (0, 5, True)]:
+        c = Config()
+        c.analysis_settings.close_words_min_frequency = min_frequency
+        c.analysis_settings.close_words_min_distance_between_words = min_distance
+        c.analysis_settings.close_words_use_lemma = use_lemma
+        assert NlpService.evaluate_close_words(doc, c) == TestUtils.legacy_evaluate_close_words(doc, c)
+    assert NlpService.find_close_occourences([0, 5, 6, 20, 40, 41, 42], 3, 1) == [1, 2, 4, 5, 6]
+    assert NlpService.find_close_occourences([0, 5, 6, 20, 40, 41, 42], 3, 2) == [4, 5, 6]
+
+
 def test_remove_accents(setup_teardown):
     assert Utils.remove_accents(TEST_TEXT_6) == TEST_TEXT_6_NON_ACCENTED
 
@@ -340,6 +863,118 @@ def test_file_imports():
     assert len(rtf) > 0
 
 
+# TEST IF STREAMED PARAGRAPHS JOIN BACK TO IMPORTED TEXT AND MATCH PARAGRAPHS OF EDITOR ANALYSIS
+def test_streamed_import():
+    for file_path in ["test_files/sample.docx", "test_files/sample.odt", "test_files/sample.rtf"]:
+        paragraphs = []
+        text = ImportService.import_document(file_path, paragraphs.append)
+        assert "\r" not in text
+        assert "\n\n" not in text
+        # EDITOR TEXT ALWAYS ENDS WITH NEWLINE
+        assert paragraphs == NlpService.split_to_paragraphs(text + "\n")
+    paragraphs = []
+    text = ImportService.import_document("test_files/sample.txt", paragraphs.append)
+    assert "".join(paragraphs) == text
+    assert text == open("test_files/sample.txt", "r", encoding="utf-8").read()
+
+
+# TEST IF PARAGRAPHS ANALYZED DURING IMPORT ARE REUSED BY ANALYSIS OF IMPORTED TEXT
+def test_import_worker(setup_teardown):
+    nlp = setup_teardown[0]
+    cache = NlpService.paragraph_cache
+    cache.clear()
+    worker = ImportWorker(
+        "test_files/sample.docx",
+        lambda paragraphs: NlpService.prefetch_paragraphs(paragraphs, nlp, NLP_BATCH_SIZE)
+    )
+    worker.start()
+    worker.wait_for_analysis(timeout=60)
+    assert worker.is_finished()
+    assert worker.error is None
+    assert worker.text == ImportService.import_document("test_files/sample.docx")
+    assert worker.imported_chars == len(worker.text) + 1
+    cache.hits = 0
+    cache.misses = 0
+    NlpService.full_analysis(worker.text + "\n", nlp, NLP_BATCH_SIZE, Config())
+    assert cache.misses == 0 and cache.hits > 0
+    failed_worker = ImportWorker("test_files/missing.docx", lambda paragraphs: None)
+    failed_worker.start()
+    failed_worker.wait_for_analysis(timeout=60)
+    assert failed_worker.is_finished()
+    assert failed_worker.text is None and failed_worker.error is not None
+
+
+def test_batch_analysis(setup_teardown, tmp_path):
+    nlp = setup_teardown[0]
+    spellcheck_dictionary = setup_teardown[1]
+    p = ProjectService.create_project("batch", "desc", os.path.join(tmp_path, "batch"))
+    item = ProjectService.new_item(p, "001", None, ProjectItemType.HTEXT)
+    item.contents = HTextFile(TEST_TEXT_2, [])
+    ProjectService.save_file_contents(p, item)
+    sources = BatchAnalysisService.collect_sources(["test_files", p.path], Config())
+    assert [s.name for s in sources] == ["sample.docx", "sample.odt", "sample.rtf", "sample.txt", "batch/001"]
+    with pytest.raises(ValueError):
+        BatchAnalysisService.collect_sources([os.path.join(p.path, "missing.pdf")], Config())
+    reports = list(BatchAnalysisService.analyze_sources(sources, nlp, spellcheck_dictionary))
+    assert all(r.error is None and r.words > 0 for r in reports)
+    assert reports[-1].project_path == p.path
+    assert len(reports[-1].typography_issues) > 0
+    output = io.StringIO()
+    assert BatchAnalysisService.write_reports(reports, output, BATCH_REPORT_FORMAT_JSON) == len(reports)
+    assert [json.loads(line)["name"] for line in output.getvalue().splitlines()] == [s.name for s in sources]
+    output = io.StringIO()
+    BatchAnalysisService.write_reports(reports, output, BATCH_REPORT_FORMAT_CSV)
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows[0] == BatchReport.CSV_COLUMNS
+    assert len(rows) == len(reports) + 1
+
+
+def test_analysis_server(setup_teardown):
+    server = AnalysisServer(Config(), "127.0.0.1", 0, 1, queue_size=0)
+    assert server.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.port}"
+    c = Config()
+    c.analysis_settings.close_words_min_frequency = 1
+    try:
+        with urllib.request.urlopen(f"{url}/health") as response:
+            assert json.loads(response.read())["status"] == "ok"
+        body = json.dumps({"text": TEST_TEXT_1, "config": c.to_dict()}).encode("utf-8")
+        for endpoint in AnalysisServer.endpoints:
+            request = urllib.request.Request(f"{url}/{endpoint}", body, {"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as response:
+                assert response.status == 200
+                data = json.loads(response.read())
+        assert data["close_words"]["toto"]["total"] == 2
+        with pytest.raises(urllib.error.HTTPError) as e_info:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/analyze", b"[]"))
+        assert e_info.value.code == 400
+        for content_length, status in [(None, 411), ("abc", 400), ("-1", 400)]:
+            connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+            connection.putrequest("POST", "/analyze")
+            if content_length is not None:
+                connection.putheader("Content-Length", content_length)
+            connection.endheaders()
+            assert connection.getresponse().status == status
+            connection.close()
+        # CRASHED WORKER FAILS ONLY REQUEST IT WAS HANDLING, NEXT REQUEST IS HANDLED BY NEW POOL
+        for process in list(server.pool._processes.values()):
+            process.kill()
+        with pytest.raises(urllib.error.HTTPError) as e_info:
+            urllib.request.urlopen(urllib.request.Request(f"{url}/readability", body))
+        assert e_info.value.code == 500
+        with urllib.request.urlopen(urllib.request.Request(f"{url}/readability", body)) as response:
+            assert response.status == 200
+        # ONLY ONE REQUEST CAN RUN, NONE CAN WAIT
+        assert server.slots.acquire(blocking=False)
+        with pytest.raises(ServerBusyError):
+            server.handle("readability", {"text": TEST_TEXT_1})
+        server.slots.release()
+    finally:
+        server.stop()
+
+
 # SPELLCHECK SUITE
 def test_spellcheck_identifies_misspelled_words(setup_teardown):
     nlp = setup_teardown[0]
@@ -606,7 +1241,7 @@ def test_spellcheck_optimizes_on_small_changes(setup_teardown):
     SpellcheckService.spellcheck(hunspell, doc)
     # Simulujeme malú zmenu v texte
     text_changed = "Toto je testovacíy text. " + text
-    doc_changed = NlpService.partial_analysis(text_changed, doc, nlp, Config(), 10)
+    doc_changed = NlpService.partial_analysis(text_changed, doc, nlp, Config())
     SpellcheckService.spellcheck(hunspell, doc_changed)
     # Skontrolujeme, či je iba zmenený token označený ako chybný
     for token in doc_changed:
@@ -617,6 +1252,98 @@ def test_spellcheck_optimizes_on_small_changes(setup_teardown):
             assert not token._.has_grammar_error
 
 
+# TEST IF DEPENDENCY MATCHER IS COMPILED ONCE AND SPELLCHECK REPORTS TIMING OF EACH RULE
+def test_spellcheck_reuses_dependency_matcher(setup_teardown):
+    nlp = setup_teardown[0]
+    spellcheck_dictionary = setup_teardown[1]
+    doc = NlpService.full_analysis(TEST_TEXT_3, nlp, NLP_BATCH_SIZE, Config())
+    timings = SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+    matcher = SpellcheckService._get_dependency_matcher(doc.vocab)
+    assert set(timings) == {BASIC_SPELLING_TIMING, DEPENDENCY_MATCHER_TIMING, *DEPENDENCY_RULES}
+    assert all(t >= 0 for t in timings.values())
+    doc = NlpService.full_analysis(TEST_TEXT_4, nlp, NLP_BATCH_SIZE, Config())
+    SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+    assert SpellcheckService._get_dependency_matcher(doc.vocab) is matcher
+    # MATCHER OF ANOTHER VOCAB REPLACES CACHED MATCHER, SO MATCHERS OF UNLOADED PIPELINES ARE NOT KEPT
+    other_matcher = SpellcheckService._get_dependency_matcher(Vocab())
+    assert other_matcher is not matcher
+    assert SpellcheckService.dependency_matcher[1] is other_matcher
+    assert SpellcheckService._get_dependency_matcher(doc.vocab) is not other_matcher
+
+
+# TEST IF SPELLCHECK RESULTS ARE REUSED ACROSS ANALYSES AND SURVIVE SAVE AND LOAD
+def test_spellcheck_cache(setup_teardown, tmp_path):
+    nlp = setup_teardown[0]
+    spellcheck_dictionary = setup_teardown[1]
+    cache = SpellcheckService.spell_cache
+    cache.clear()
+    doc = NlpService.full_analysis(TEST_TEXT_3, nlp, NLP_BATCH_SIZE, Config())
+    SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+    assert cache.misses > 0
+    assert len(cache) == len({w.text for w in doc._.words})
+    misses = cache.misses
+    doc = NlpService.full_analysis(TEST_TEXT_3, nlp, NLP_BATCH_SIZE, Config())
+    SpellcheckService.spellcheck(spellcheck_dictionary, doc)
+    assert cache.misses == misses
+    path = os.path.join(tmp_path, "spellcheck_cache.json")
+    cache.save(path)
+    loaded_cache = SpellcheckCache(SPELLCHECK_CACHE_SIZE, cache.version)
+    loaded_cache.load(path)
+    assert len(loaded_cache) == len(cache)
+    assert all(loaded_cache.get(w.text) == cache.get(w.text) for w in doc._.words)
+    other_version_cache = SpellcheckCache(SPELLCHECK_CACHE_SIZE, "other")
+    other_version_cache.load(path)
+    assert len(other_version_cache) == 0
+
+
+def test_suggestion_worker(setup_teardown):
+    spellcheck_dictionary = setup_teardown[1]
+    worker = SuggestionWorker(lambda w: SpellcheckService.suggest(spellcheck_dictionary, w), 2)
+    worker.start()
+    try:
+        # FIRST REQUEST ONLY QUEUES WORD, RESULT IS READY LATER
+        assert worker.get("mačka") is None or worker.is_cached("mačka")
+        worker.prefetch(["pes", "mačka"])
+        deadline = time.time() + 10
+        while not (worker.is_cached("mačka") and worker.is_cached("pes")) and time.time() < deadline:
+            time.sleep(0.01)
+        assert worker.get("mačka") == SpellcheckService.suggest(spellcheck_dictionary, "mačka")
+        assert worker.get_now("dom") == SpellcheckService.suggest(spellcheck_dictionary, "dom")
+        # LEAST RECENTLY USED WORD IS EVICTED
+        assert len(worker) == 2
+        assert not worker.is_cached("pes")
+        worker.clear()
+        assert len(worker) == 0
+    finally:
+        worker.stop()
+
+
+def test_tag_batch():
+    text = "Prvý odsek.\n\nDruhý odsek\ns novým riadkom.\n"
+    batch = TagBatch(text)
+    assert batch.index(0) == "1.0"
+    assert batch.index(text.index("Druhý")) == "3.0"
+    assert batch.index(text.index("novým")) == "4.2"
+    assert batch.index(len(text)) == "5.0"
+    assert batch.line(text.index("odsek\n")) == 3
+    batch.add("tag", 0, 4)
+    batch.add("tag", text.index("novým"), text.index("novým") + 5)
+    batch.add("empty", 3, 3)
+    assert batch.indexes("tag") == ["1.0", "1.4", "4.2", "4.7"]
+    assert "empty" not in batch.ranges
+    assert batch.offset("4.2") == text.index("novým")
+
+
+def test_tag_ranges_diff():
+    old_ranges = merge_ranges([(10, 20), (0, 5), (5, 8), (30, 40)])
+    assert old_ranges == [(0, 8), (10, 20), (30, 40)]
+    new_ranges = merge_ranges([(0, 8), (12, 20), (35, 45)])
+    # ONLY CHANGED PARTS ARE REMOVED AND ADDED
+    assert subtract_ranges(old_ranges, new_ranges) == [(10, 12), (30, 35)]
+    assert subtract_ranges(new_ranges, old_ranges) == [(40, 45)]
+    assert subtract_ranges(old_ranges, old_ranges) == []
+
+
 def test_spellcheck_handles_empty_document(setup_teardown):
     nlp = setup_teardown[0]
     hunspell = setup_teardown[1]
@@ -1,5 +1,18 @@
+import random
 import socket
 
+import spacy
+import ufal.morphodita as morphodita
+
+from src.domain.config import Config
+
+# NAME OF MORPHODITA COMPONENT IN NLP PIPELINE
+MORPHODITA_PIPE_NAME = 'morphodita_tagger_morphologizer_lemmatizer'
+# NUMBER OF CHARS OF ONE PAGE, SAME AS IN NlpService._fill_custom_data
+PAGE_SIZE = 1800
+# NUMBER OF SENTENCES IN ONE GENERATED PARAGRAPH
+SENTENCES_PER_PARAGRAPH = 6
+
 
 class TestUtils:
 
@@ -17,3 +30,80 @@ class TestUtils:
     def enable_socket(monkeypatch):
         """Restore socket.socket and socket.create_connection to their original state."""
         monkeypatch.undo()
+
+    @staticmethod
+    def create_corpus(source_text, pages, seed):
+        """
+        Create text with given number of pages from sentences of source text. Sentences are shuffled, so paragraphs are
+        unique and analysis can not be skipped by paragraph cache
+        """
+        sentences = [s.strip() + "." for s in source_text.replace("\n", " ").split(".") if len(s.strip()) > 0]
+        rnd = random.Random(seed)
+        paragraphs = []
+        length = 0
+        while length < pages * PAGE_SIZE:
+            paragraph = " ".join(rnd.choice(sentences) for _ in range(SENTENCES_PER_PARAGRAPH))
+            paragraphs.append(paragraph)
+            length += len(paragraph) + 1
+        return "\n".join(paragraphs)
+
+    @staticmethod
+    def percentile(values, p):
+        """Get percentile of values using nearest rank method"""
+        ordered = sorted(values)
+        rank = max(1, -(-p * len(ordered) // 100))
+        return ordered[rank - 1]
+
+    @staticmethod
+    def legacy_evaluate_close_words(doc, config: Config):
+        """Original implementation of NlpService.evaluate_close_words kept for comparison"""
+        close_words = {}
+        x = doc._.unique_words
+        if config.analysis_settings.close_words_use_lemma:
+            x = doc._.lemmas
+        words_nlp = {k: v for (k, v) in x.items() if
+                     len(k) >= config.analysis_settings.close_words_min_word_length}
+        for key, unique_word in words_nlp.items():
+            if len(unique_word.occourences) < config.analysis_settings.close_words_min_frequency + 1:
+                continue
+            for idx, word_occource in enumerate(unique_word.occourences):
+                repetitions = []
+                for possible_repetition in unique_word.occourences[idx + 1:len(unique_word.occourences) + 1]:
+                    word_distance = possible_repetition._.word_index - word_occource._.word_index
+                    if word_distance <= config.analysis_settings.close_words_min_distance_between_words:
+                        repetitions.append(word_occource)
+                        repetitions.append(possible_repetition)
+                    else:
+                        break
+                if len(repetitions) > config.analysis_settings.close_words_min_frequency:
+                    if key not in close_words:
+                        close_words[key] = set()
+                    close_words[key].update(repetitions)
+        return dict(sorted(close_words.items(), key=lambda item: len(item[1]), reverse=True))
+
+    @staticmethod
+    def legacy_call(component, doc):
+        """Original implementation of MorphoditaTaggerMorphologizerLemmatizer.__call__ kept for comparison"""
+        for sent in doc.sents:
+            forms = morphodita.Forms()
+            sentence_tokens = [token for token in sent]
+            for token in sent:
+                forms.push_back(token.text)
+            lemmas = morphodita.TaggedLemmas()
+            component.tagger.tag(forms, lemmas)
+            for token, tagged_lemma in zip(sentence_tokens, lemmas):
+                lemma = tagged_lemma.lemma
+                tag = tagged_lemma.tag
+                token._.full_lemma = lemma
+                token._.pdt_morph = tag
+                token.lemma_ = component.morpho.rawLemma(lemma)
+                token._.lemma_comments = (lemma.replace(token.lemma_, "")
+                                          .replace("_", " ")
+                                          .replace("^", "")
+                                          .replace("`", "")
+                                          .strip())
+                morph_attrs = component.convert_pdt_tag_to_spacy(tag)
+                token.pos_ = morph_attrs.get('POS', 'X')
+                morph_attrs.pop('POS', None)
+                token.morph = spacy.tokens.MorphAnalysis(doc.vocab, morph_attrs)
+        return doc